@@ -0,0 +1,259 @@
+"""
+Cohort analytics over every user's topic scores
+Per-topic scores live in columnar NumPy arrays (one row per user) that are loaded once
+from the per-user knowledge blobs and then kept current from the knowledge write log
+"""
+
+import os
+import json
+import time
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from keys import get_all, knowledge_key, knowledge_user
+from storage import KNOWLEDGE_LOG_KEY
+
+# Cached results are recomputed at most this often, and only if scores changed
+ANALYTICS_REFRESH_SECONDS = float(os.getenv("ANALYTICS_REFRESH_SECONDS", 30))
+
+# Keys per SCAN/GET pipeline round trip when loading, and log entries per XRANGE when refreshing
+LOAD_BATCH = 5000
+LOG_BATCH = 10000
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+IMPROVEMENT_BINS = np.linspace(-1.0, 1.0, 21)
+
+# Same window as SessionStorage.get_knowledge_map's current level
+RECENT_SCORES = 3
+
+
+def _stream_id(entry_id: str) -> Tuple[int, int]:
+    ms, seq = entry_id.split("-")
+    return int(ms), int(seq)
+
+
+def _rounded(value: float) -> Optional[float]:
+    # NaN (no data) isn't valid JSON
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+class CohortAnalytics:
+    """Columnar topic scores for all users, with vectorized cohort statistics"""
+    
+    def __init__(self, redis_client, refresh_seconds: float = ANALYTICS_REFRESH_SECONDS):
+        self.redis = redis_client
+        self.refresh_seconds = refresh_seconds
+        
+        self.rows: Dict[str, int] = {}
+        self.topics: Dict[str, int] = {}
+        # users x topics; NaN where a user has no (or too few) scores for a topic
+        self.level = np.empty((0, 0), dtype=np.float32)
+        self.improvement = np.empty((0, 0), dtype=np.float32)
+        self.count = np.empty((0, 0), dtype=np.int32)
+        
+        self._last_id: Optional[str] = None
+        self._lock = threading.Lock()
+        self._result: Optional[Dict] = None
+        self._computed_at = 0.0
+    
+    def cohort(self) -> Dict:
+        """Cached cohort statistics, refreshed from the write log at most every refresh_seconds"""
+        with self._lock:
+            if self._result is None or time.monotonic() - self._computed_at >= self.refresh_seconds:
+                changed = self.refresh()
+                if changed or self._result is None:
+                    self._result = self.compute()
+                self._computed_at = time.monotonic()
+            return self._result
+    
+    def load(self) -> int:
+        """Full load from every user's knowledge blob"""
+        # Note the log position first; replaying entries the scan already saw is harmless
+        newest = self.redis.xrevrange(KNOWLEDGE_LOG_KEY, count=1)
+        self._last_id = newest[0][0] if newest else "0-0"
+        
+        self.rows = {}
+        self.topics = {}
+        self._resize(0, 0)
+        
+        loaded = 0
+        batch = []
+        for key in self.redis.scan_iter(match="knowledge:{*", count=LOAD_BATCH):
+            batch.append(knowledge_user(key))
+            if len(batch) >= LOAD_BATCH:
+                loaded += self._reload_users(batch)
+                batch = []
+        if batch:
+            loaded += self._reload_users(batch)
+        return loaded
+    
+    def refresh(self) -> int:
+        """Re-read the users named in the write log since the last load or refresh"""
+        if self._last_id is None:
+            return self.load()
+        
+        # If the capped log was trimmed past our position, writes were missed
+        oldest = self.redis.xrange(KNOWLEDGE_LOG_KEY, count=1)
+        if oldest and self._last_id != "0-0" and _stream_id(oldest[0][0]) > _stream_id(self._last_id):
+            return self.load()
+        
+        changed = set()
+        while True:
+            entries = self.redis.xrange(KNOWLEDGE_LOG_KEY, min=f"({self._last_id}", count=LOG_BATCH)
+            if not entries:
+                break
+            changed.update(fields["user_id"] for _, fields in entries)
+            self._last_id = entries[-1][0]
+        
+        if changed:
+            changed = list(changed)
+            for start in range(0, len(changed), LOAD_BATCH):
+                self._reload_users(changed[start:start + LOAD_BATCH])
+        return len(changed)
+    
+    def _reload_users(self, user_ids: List[str]) -> int:
+        return self.apply(user_ids, get_all(self.redis, [knowledge_key(user_id) for user_id in user_ids]))
+    
+    def apply(self, user_ids: Iterable[str], blobs: Iterable[Optional[str]]) -> int:
+        """Recompute the rows of the given users from their knowledge blobs"""
+        rows, cols, levels, gains, counts = [], [], [], [], []
+        for user_id, blob in zip(user_ids, blobs):
+            if blob is None:
+                continue
+            
+            row = self.rows.get(user_id)
+            if row is None:
+                row = self._add_row(user_id)
+            for topic, scores in json.loads(blob).items():
+                col = self.topics.get(topic)
+                if col is None:
+                    col = self._add_topic(topic)
+                level, gain = self._summarize(scores)
+                rows.append(row)
+                cols.append(col)
+                levels.append(level)
+                gains.append(gain)
+                counts.append(len(scores))
+        
+        # One scatter per column array instead of a NumPy call per cell
+        self.level[rows, cols] = levels
+        self.improvement[rows, cols] = gains
+        self.count[rows, cols] = counts
+        return len(set(rows))
+    
+    def _summarize(self, scores: List[float]) -> Tuple[float, float]:
+        """Current level and improvement (both 0-1 scale) from one topic's scores, oldest first"""
+        n = len(scores)
+        if n == 0:
+            return np.nan, np.nan
+        
+        recent = scores[-RECENT_SCORES:]
+        level = sum(recent) / len(recent) / 10.0
+        
+        # Earliest vs latest scores, in equal non-overlapping windows
+        window = min(RECENT_SCORES, n // 2)
+        if not window:
+            return level, np.nan
+        return level, (sum(scores[-window:]) - sum(scores[:window])) / window / 10.0
+    
+    def _add_row(self, user_id: str) -> int:
+        row = len(self.rows)
+        if row >= self.level.shape[0]:
+            # Grow geometrically so a full load is amortized O(users)
+            self._resize(max(1024, row * 2), self.level.shape[1])
+        self.rows[user_id] = row
+        return row
+    
+    def _add_topic(self, topic: str) -> int:
+        col = len(self.topics)
+        if col >= self.level.shape[1]:
+            self._resize(self.level.shape[0], col + 4)
+        self.topics[topic] = col
+        return col
+    
+    def _resize(self, rows: int, cols: int):
+        old_rows, old_cols = self.level.shape
+        keep_rows, keep_cols = min(rows, old_rows), min(cols, old_cols)
+        
+        level = np.full((rows, cols), np.nan, dtype=np.float32)
+        improvement = np.full((rows, cols), np.nan, dtype=np.float32)
+        count = np.zeros((rows, cols), dtype=np.int32)
+        level[:keep_rows, :keep_cols] = self.level[:keep_rows, :keep_cols]
+        improvement[:keep_rows, :keep_cols] = self.improvement[:keep_rows, :keep_cols]
+        count[:keep_rows, :keep_cols] = self.count[:keep_rows, :keep_cols]
+        self.level, self.improvement, self.count = level, improvement, count
+    
+    def compute(self) -> Dict:
+        """Percentiles, improvement distributions and topic correlations, all vectorized per topic"""
+        users = len(self.rows)
+        names = sorted(self.topics, key=self.topics.get)
+        level = self.level[:users, :len(names)]
+        improvement = self.improvement[:users, :len(names)]
+        
+        topics = {}
+        for col, topic in enumerate(names):
+            scores = level[:, col]
+            scores = scores[~np.isnan(scores)]
+            gains = improvement[:, col]
+            gains = gains[~np.isnan(gains)]
+            topics[topic] = {
+                "users": int(scores.size),
+                "mean": _rounded(scores.mean()) if scores.size else None,
+                "percentiles": self._percentiles(scores),
+                "improvement": {
+                    "users": int(gains.size),
+                    "mean": _rounded(gains.mean()) if gains.size else None,
+                    "percentiles": self._percentiles(gains),
+                    "histogram": {
+                        "bins": IMPROVEMENT_BINS.round(2).tolist(),
+                        "counts": np.histogram(gains, bins=IMPROVEMENT_BINS)[0].tolist()
+                    }
+                }
+            }
+        
+        # Slowest first; topics nobody has improvement data for go last
+        slowest = sorted(
+            names,
+            key=lambda t: (topics[t]["improvement"]["percentiles"].get("p50") is None, topics[t]["improvement"]["percentiles"].get("p50") or 0.0)
+        )
+        
+        return {
+            "users": users,
+            "generated_at": datetime.now().isoformat(),
+            "topics": topics,
+            "slowest_improving": slowest,
+            "correlations": self._correlations(level, names)
+        }
+    
+    def _percentiles(self, values: np.ndarray) -> Dict[str, Optional[float]]:
+        if not values.size:
+            return {}
+        return {f"p{p}": _rounded(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    
+    def _correlations(self, level: np.ndarray, names: List[str]) -> Dict[str, Dict[str, Optional[float]]]:
+        """Pearson correlation of current levels for every topic pair, over users scored in both"""
+        present = ~np.isnan(level)
+        x = np.where(present, level, 0.0).astype(np.float64)
+        m = present.astype(np.float64)
+        
+        # Pairwise-complete sums as topics x topics matrix products
+        n = m.T @ m
+        sum_x = x.T @ m          # [i, j]: sum of topic i over users who also have j
+        sum_xx = (x * x).T @ m
+        sum_xy = x.T @ x
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = n * sum_xy - sum_x * sum_x.T
+            var = (n * sum_xx - sum_x ** 2) * (n * sum_xx.T - sum_x.T ** 2)
+            corr = cov / np.sqrt(var)
+        corr[n < 2] = np.nan
+        
+        return {
+            a: {b: _rounded(corr[i, j]) for j, b in enumerate(names)}
+            for i, a in enumerate(names)
+        }
+    
+    def memory_bytes(self) -> int:
+        return self.level.nbytes + self.improvement.nbytes + self.count.nbytes
@@ -0,0 +1,260 @@
+"""
+Cold storage for ended sessions
+Sessions ended more than ARCHIVE_AFTER_SECONDS ago are appended as zstd frames to
+segment files, with an offset index per segment, and their Redis blob is replaced by a
+summary pointing at the frame. SessionStorage.get_session rehydrates them transparently
+
+Run from backend/: python archive.py             (one archiving pass)
+                   python archive.py --backfill  (index sessions ended before archiving existed)
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import zstandard
+
+from keys import connect, get_all, session_key, is_session_key
+
+# Shared by every API node (e.g. a network volume); segments are only ever appended to
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".archive"))
+
+# Ended sessions older than this are archived; 0 turns the background archiver off
+ARCHIVE_AFTER_SECONDS = float(os.getenv("ARCHIVE_AFTER_SECONDS", 7 * 24 * 3600))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", 300))
+
+# Rehydrated sessions stay cached in Redis this long after a read
+ARCHIVE_CACHE_SECONDS = int(os.getenv("ARCHIVE_CACHE_SECONDS", 3600))
+
+# A segment stops taking new sessions past this size
+ARCHIVE_SEGMENT_BYTES = int(os.getenv("ARCHIVE_SEGMENT_BYTES", 256 * 1024 * 1024))
+
+# Sessions per archiving round trip
+ARCHIVE_BATCH = 500
+
+# Sorted set of ended session ids scored by ended_at (epoch seconds): the archiver's work queue
+ENDED_SESSIONS_KEY = "sessions:ended"
+ARCHIVE_LOCK_KEY = "archive:lock"
+
+# Replace the blob only if nobody rewrote the session since it was read
+_SWAP_IF_UNCHANGED = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+# Extend or drop the archiver lock only while it still holds our token, so an archiver whose lock
+# expired can't extend or delete the next holder's lock
+_RENEW_LOCK = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+"""
+
+_RELEASE_LOCK = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+return redis.call('DEL', KEYS[1])
+"""
+
+
+def ended_score(ended_at: str) -> float:
+    return datetime.fromisoformat(ended_at).timestamp()
+
+
+def summarize(session: Dict, pointer: Dict) -> Dict:
+    """What stays in Redis for an archived session: enough for listings and history charts"""
+    scores = [q["score"] for q in session["questions"]]
+    return {
+        "id": session["id"],
+        "user_id": session["user_id"],
+        "started_at": session["started_at"],
+        "ended_at": session["ended_at"],
+        "current_scores": session.get("current_scores", {}),
+        "questions_asked": len(scores),
+        "average_score": sum(scores) / len(scores) if scores else 0,
+        "archived": pointer
+    }
+
+
+class ColdArchive:
+    """Append-only zstd segment files, one independently decompressible frame per session"""
+    
+    def __init__(self, archive_dir: str = ARCHIVE_DIR, segment_bytes: int = ARCHIVE_SEGMENT_BYTES):
+        self.archive_dir = archive_dir
+        self.segment_bytes = segment_bytes
+        self._compressor = zstandard.ZstdCompressor(level=6)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._lock = threading.Lock()
+    
+    def _path(self, segment: int, suffix: str = "zst") -> str:
+        return os.path.join(self.archive_dir, f"segment-{segment:06d}.{suffix}")
+    
+    def _current_segment(self) -> int:
+        """Newest segment, or the next one if it is full"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        segments = [int(name[8:14]) for name in os.listdir(self.archive_dir) if name.startswith("segment-") and name.endswith(".zst")]
+        if not segments:
+            return 1
+        newest = max(segments)
+        return newest + 1 if os.path.getsize(self._path(newest)) >= self.segment_bytes else newest
+    
+    def append(self, sessions: List[Dict]) -> List[Dict]:
+        """
+        Write sessions to the current segment and its index, returns one pointer per session
+        The data is fsynced before returning, so pointers are never published to unwritten frames
+        """
+        segment = self._current_segment()
+        frames = [self._compressor.compress(json.dumps(session).encode("utf-8")) for session in sessions]
+        
+        pointers = []
+        with self._lock, open(self._path(segment), "ab") as data, open(self._path(segment, "idx"), "a") as index:
+            offset = data.tell()
+            for session, frame in zip(sessions, frames):
+                data.write(frame)
+                index.write(f"{session['id']} {offset} {len(frame)}\n")
+                pointers.append({"segment": segment, "offset": offset, "length": len(frame)})
+                offset += len(frame)
+            data.flush()
+            os.fsync(data.fileno())
+            index.flush()
+        return pointers
+    
+    def read(self, pointer: Dict) -> Dict:
+        with open(self._path(pointer["segment"]), "rb") as f:
+            f.seek(pointer["offset"])
+            frame = f.read(pointer["length"])
+        return json.loads(self._decompressor.decompress(frame))
+    
+    def index(self, segment: int) -> Dict[str, Dict]:
+        """Session id -> pointer for one segment; the latest copy wins if a session was archived twice"""
+        pointers = {}
+        with open(self._path(segment, "idx")) as f:
+            for line in f:
+                session_id, offset, length = line.split()
+                pointers[session_id] = {"segment": segment, "offset": int(offset), "length": int(length)}
+        return pointers
+
+
+class SessionArchiver:
+    """Moves sessions that ended long enough ago from Redis into the cold archive"""
+    
+    def __init__(self, redis_client, archive: ColdArchive, after_seconds: float = ARCHIVE_AFTER_SECONDS):
+        self.redis = redis_client
+        self.archive = archive
+        self.after_seconds = after_seconds
+    
+    def run_once(self) -> int:
+        """Archive every due session, returns how many were moved; one archiver runs at a time across nodes"""
+        lock_ttl = int(ARCHIVE_INTERVAL_SECONDS * 1000)
+        token = uuid.uuid4().hex
+        if not self.redis.set(ARCHIVE_LOCK_KEY, token, nx=True, px=lock_ttl):
+            return 0
+        
+        archived = 0
+        try:
+            cutoff = time.time() - self.after_seconds
+            # Renewed before every batch: a pass after a backfill can outlast one TTL, and two
+            # archivers appending to the same segment would record wrong offsets
+            while self.redis.eval(_RENEW_LOCK, 1, ARCHIVE_LOCK_KEY, token, lock_ttl):
+                session_ids = self.redis.zrangebyscore(ENDED_SESSIONS_KEY, "-inf", cutoff, start=0, num=ARCHIVE_BATCH)
+                if not session_ids:
+                    break
+                archived += self._archive_batch(session_ids)
+            else:
+                print(f"⚠️ Archiver lock lost after {archived} sessions, stopping this pass")
+        finally:
+            self.redis.eval(_RELEASE_LOCK, 1, ARCHIVE_LOCK_KEY, token)
+        return archived
+    
+    def _archive_batch(self, session_ids: List[str]) -> int:
+        due = []
+        for blob in get_all(self.redis, [session_key(session_id) for session_id in session_ids]):
+            if blob is None:
+                continue
+            session = json.loads(blob)
+            if "archived" not in session:
+                due.append((blob, session))
+        
+        swapped = []
+        if due:
+            pointers = self.archive.append([session for _, session in due])
+            pipe = self.redis.pipeline(transaction=False)
+            for (blob, session), pointer in zip(due, pointers):
+                # EVAL rather than a registered script: a cluster pipeline can't reload one on NOSCRIPT
+                pipe.eval(_SWAP_IF_UNCHANGED, 1, session_key(session["id"]), blob, json.dumps(summarize(session, pointer)))
+            swapped = pipe.execute()
+        
+        self.redis.zrem(ENDED_SESSIONS_KEY, *session_ids)
+        # A session rewritten meanwhile keeps its full blob (its frame is dead space in the
+        # segment) and is queued again as if it had just ended
+        rewritten = {session["id"]: time.time() for (_, session), ok in zip(due, swapped) if not ok}
+        if rewritten:
+            self.redis.zadd(ENDED_SESSIONS_KEY, rewritten)
+        return len(due) - len(rewritten)
+    
+    def backfill(self) -> int:
+        """Queue ended sessions written before the ended-sessions index existed"""
+        queued = 0
+        batch = []
+        for key in self.redis.scan_iter(match="session:*", count=ARCHIVE_BATCH):
+            if is_session_key(key):
+                batch.append(key)
+            if len(batch) >= ARCHIVE_BATCH:
+                queued += self._backfill_batch(batch)
+                batch = []
+        if batch:
+            queued += self._backfill_batch(batch)
+        return queued
+    
+    def _backfill_batch(self, keys: List[str]) -> int:
+        ended = {}
+        for blob in get_all(self.redis, keys):
+            session = json.loads(blob) if blob else None
+            if session and session.get("ended_at") and "archived" not in session:
+                ended[session["id"]] = ended_score(session["ended_at"])
+        if ended:
+            self.redis.zadd(ENDED_SESSIONS_KEY, ended)
+        return len(ended)
+
+
+async def run_archiver(archiver: SessionArchiver):
+    """Background loop for the API process"""
+    while True:
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+        try:
+            archived = await asyncio.to_thread(archiver.run_once)
+            if archived:
+                print(f"✅ Archived {archived} ended sessions to {archiver.archive.archive_dir}")
+        except Exception as e:
+            print(f"⚠️ Session archiver error: {e}")
+
+
+def main():
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backfill", action="store_true", help="Queue every ended session in Redis first")
+    parser.add_argument("--after-seconds", type=float, default=ARCHIVE_AFTER_SECONDS, help="Archive sessions ended this long ago")
+    args = parser.parse_args()
+    
+    archiver = SessionArchiver(connect(), ColdArchive(), args.after_seconds)
+    if args.backfill:
+        print(f"⏳ Queued {archiver.backfill()} ended sessions")
+    print(f"✅ Archived {archiver.run_once()} sessions to {archiver.archive.archive_dir}")
+
+
+if __name__ == "__main__":
+    main()
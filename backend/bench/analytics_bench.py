@@ -0,0 +1,75 @@
+"""
+Cohort analytics at scale, without Redis
+Feeds synthetic knowledge blobs for N users into CohortAnalytics and times the
+initial load, the vectorized statistics, and an incremental refresh of a few users
+
+Run from backend/: python -m bench.analytics_bench --users 1000000
+"""
+
+import json
+import time
+import random
+import argparse
+
+from analytics import CohortAnalytics
+
+TOPICS = ["leadership", "algorithms", "system_design", "conflict_resolution", "communication", "behavioral"]
+
+
+def synthetic_blobs(users: int, seed: int):
+    """Knowledge blobs shaped like SessionStorage's: topic -> list of 0-10 scores, oldest first"""
+    rng = random.Random(seed)
+    for i in range(users):
+        knowledge = {}
+        for topic in rng.sample(TOPICS, rng.randint(1, len(TOPICS))):
+            start = rng.uniform(2, 7)
+            slope = rng.gauss(0.3, 0.4)
+            knowledge[topic] = [round(min(10.0, max(0.0, start + slope * k + rng.gauss(0, 1))), 1) for k in range(rng.randint(1, 12))]
+        yield f"user_{i}", json.dumps(knowledge)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--updates", type=int, default=10_000, help="Users re-applied in the incremental step")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+    
+    blobs = list(synthetic_blobs(args.users, args.seed))
+    engine = CohortAnalytics(redis_client=None)
+    
+    start = time.perf_counter()
+    engine.apply((user_id for user_id, _ in blobs), (blob for _, blob in blobs))
+    load_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    stats = engine.compute()
+    compute_seconds = time.perf_counter() - start
+    
+    updates = random.Random(args.seed).sample(blobs, min(args.updates, len(blobs)))
+    start = time.perf_counter()
+    engine.apply((user_id for user_id, _ in updates), (blob for _, blob in updates))
+    engine.compute()
+    refresh_seconds = time.perf_counter() - start
+    
+    result = {
+        "users": stats["users"],
+        "topics": len(stats["topics"]),
+        "load_seconds": round(load_seconds, 2),
+        "load_users_per_second": round(args.users / load_seconds),
+        "compute_seconds": round(compute_seconds, 3),
+        "refresh_seconds": round(refresh_seconds, 3),
+        "array_bytes": engine.memory_bytes(),
+        "slowest_improving": stats["slowest_improving"][0]
+    }
+    if args.json:
+        print(json.dumps(result))
+        return
+    
+    for key, value in result.items():
+        print(f"{key:<24}{value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Question bank benchmark: load time, memory and get_question latency by bank size
+Writes a synthetic JSON Lines bank per size and compiles it as question_bank does; memory
+is compared against holding the same questions as a dict of lists of str. The similarity
+index over the bank (question_index.py) is compiled too, as a reload does
+
+Run from backend/: python -m bench.bank_bench
+                   python -m bench.bank_bench --questions 100000 --json
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from typing import Dict
+
+from bench import percentile
+from bench.question_bench import TOPICS, DIFFICULTIES, synthetic_questions
+from question_bank import CompiledQuestionBank
+from question_index import QuestionIndex
+
+
+def write_bank(path: str, size: int, rng: random.Random):
+    with open(path, "w", encoding="utf-8") as f:
+        for text, topic, difficulty in synthetic_questions(size, rng):
+            f.write(json.dumps({"topic": topic, "difficulty": difficulty, "question": text}) + "\n")
+
+
+def dict_bank_bytes(path: str) -> int:
+    """Memory held by the old in-code layout, topic -> difficulty -> list of questions"""
+    tracemalloc.start()
+    bank: Dict[str, Dict[str, list]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            bank.setdefault(row["topic"], {}).setdefault(row["difficulty"], []).append(row["question"])
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def bench_size(size: int, lookups: int, directory: str, rng: random.Random) -> Dict:
+    path = os.path.join(directory, f"bank-{size}.jsonl")
+    write_bank(path, size, rng)
+    
+    start = time.perf_counter()
+    bank = CompiledQuestionBank.load(path)
+    load_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    index = QuestionIndex.load(bank, os.path.join(directory, "index"))
+    index_seconds = time.perf_counter() - start
+    
+    latencies = []
+    for _ in range(lookups):
+        topic, difficulty = rng.choice(TOPICS), rng.choice(DIFFICULTIES)
+        start = time.perf_counter()
+        bank.random_question(topic, difficulty)
+        latencies.append(time.perf_counter() - start)
+    
+    return {
+        "questions": len(bank),
+        "file_mb": round(os.path.getsize(path) / 1e6, 2),
+        "load_seconds": round(load_seconds, 3),
+        "compiled_mb": round(bank.memory_bytes() / 1e6, 2),
+        "dict_mb": round(dict_bank_bytes(path) / 1e6, 2),
+        "index_seconds": round(index_seconds, 3),
+        "index_mb": round(index.memory_bytes() / 1e6, 2),
+        "get_question_p50_us": round(percentile(latencies, 50) * 1e6, 2),
+        "get_question_p99_us": round(percentile(latencies, 99) * 1e6, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, nargs="+", default=[1000, 10000, 100000], help="Bank sizes")
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        results = [bench_size(size, args.lookups, directory, rng) for size in args.questions]
+    
+    if args.json:
+        print(json.dumps(results))
+        return
+    
+    print(f"{'questions':>10}{'file MB':>9}{'load s':>9}{'compiled MB':>13}{'dict MB':>9}{'index s':>9}{'index MB':>10}{'p50 us':>9}{'p99 us':>9}")
+    for r in results:
+        print(f"{r['questions']:>10}{r['file_mb']:>9}{r['load_seconds']:>9}{r['compiled_mb']:>13}{r['dict_mb']:>9}{r['index_seconds']:>9}{r['index_mb']:>10}{r['get_question_p50_us']:>9}{r['get_question_p99_us']:>9}")
+
+
+if __name__ == "__main__":
+    main()
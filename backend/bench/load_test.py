@@ -0,0 +1,241 @@
+"""
+HTTP load test for the FastAPI app, fully in-process
+Runs main.app over httpx's ASGI transport with SessionStorage on MemoryRedis and a stub
+InterviewEvaluator, against seeded users with varied history lengths. Virtual users
+follow the frontend's flows; results are written as a JSON baseline CI can compare against
+
+Run from backend/: python -m bench.load_test --output load_baseline.json    (record a baseline)
+                   python -m bench.load_test --baseline load_baseline.json  (exit 1 on regression)
+"""
+
+import io
+import sys
+import json
+import time
+import types
+import random
+import asyncio
+import argparse
+import contextlib
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from storage import SessionStorage
+from bench import percentile
+from bench.memory_redis import MemoryRedis
+
+TOPICS = ["leadership", "algorithms", "system_design", "conflict_resolution"]
+
+
+class StubEvaluator:
+    """Stands in for InterviewEvaluator, whose import needs Weave and Anthropic credentials"""
+    
+    def evaluate_answer(self, question: str, answer: str, topic: str):
+        return 7.0, ["Missing specific metrics"]
+    
+    def generate_next_question(self, topic: str, difficulty: str, knowledge_map: dict, **kwargs) -> str:
+        return f"Tell me about a {difficulty} {topic.replace('_', ' ')} problem you solved."
+    
+    def select_next_topic(self, knowledge_map: dict, previous_topics: List[str]) -> str:
+        return min(knowledge_map, key=knowledge_map.get) if knowledge_map else TOPICS[0]
+
+
+def load_app(storage: SessionStorage):
+    """Import main with the stub evaluator, voice and Daily off, and the given storage"""
+    evaluator = types.ModuleType("evaluator")
+    evaluator.InterviewEvaluator = StubEvaluator
+    sys.modules["evaluator"] = evaluator
+    
+    # main prints its connection banners at import time; keep --json output clean
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+    main.storage = storage
+    main.VOICE_ENABLED = False
+    main.room_pool = None
+    return main.app
+
+
+def seed_users(storage: SessionStorage, users: int, rng: random.Random, max_sessions: int) -> List[str]:
+    """Users with a long-tailed number of past sessions, 3 answered questions each"""
+    user_ids = []
+    for i in range(users):
+        user_id = f"load_user_{i}"
+        sessions = min(max_sessions, int(rng.paretovariate(1.2)))
+        for _ in range(sessions):
+            session_id = storage.create_session(user_id)
+            for _ in range(3):
+                topic = rng.choice(TOPICS)
+                storage.add_question(session_id, "Seeded question?", "Seeded answer.", round(rng.uniform(3, 9), 1), topic, [])
+            storage.end_session(session_id)
+        user_ids.append(user_id)
+    return user_ids
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[name].append(time.perf_counter() - start)
+        self.statuses[name][response.status_code] += 1
+        return response
+
+
+class VirtualUser:
+    """Dashboard visit, an interview with status polling while the bot answers, then the dashboard again"""
+    
+    def __init__(self, user_id: str, client: httpx.AsyncClient, recorder: Recorder, storage: SessionStorage, rng: random.Random, args):
+        self.user_id = user_id
+        self.client = client
+        self.recorder = recorder
+        self.storage = storage
+        self.rng = rng
+        self.args = args
+        # Like the browser's HTTP cache: revalidate with the last ETag seen per URL
+        self.etags: Dict[str, str] = {}
+    
+    async def _get_cached(self, name: str, url: str):
+        headers = {"If-None-Match": self.etags[url]} if url in self.etags else {}
+        response = await self.recorder.call(self.client, name, "GET", url, headers=headers)
+        if "etag" in response.headers:
+            self.etags[url] = response.headers["etag"]
+    
+    async def dashboard(self):
+        await self._get_cached("/sessions", f"/sessions?user_id={self.user_id}")
+        await self._get_cached("/knowledge-map", f"/knowledge-map?user_id={self.user_id}")
+    
+    async def interview(self):
+        response = await self.recorder.call(self.client, "/start-session", "POST", "/start-session", json={"user_id": self.user_id})
+        session_id = response.json()["session_id"]
+        
+        for _ in range(self.args.questions):
+            for _ in range(self.args.polls_per_question):
+                await self.recorder.call(self.client, "/session-status", "GET", f"/session-status?session_id={session_id}")
+                await asyncio.sleep(self.args.think_seconds * self.rng.random())
+            # The bot's write for the answered question
+            self.storage.add_question(session_id, "Load question?", "Load answer.", round(self.rng.uniform(3, 9), 1), self.rng.choice(TOPICS), [])
+        
+        await self.recorder.call(self.client, "/end-session", "POST", "/end-session", json={"session_id": session_id})
+    
+    async def run(self, deadline: float):
+        while time.perf_counter() < deadline:
+            await self.dashboard()
+            if self.rng.random() < self.args.interview_ratio:
+                await self.interview()
+                await self.dashboard()
+
+
+async def run_load(args) -> Dict:
+    rng = random.Random(args.seed)
+    storage = SessionStorage(redis_client=MemoryRedis())
+    app = load_app(storage)
+    
+    seed_start = time.perf_counter()
+    user_ids = seed_users(storage, args.users, rng, args.max_sessions)
+    seed_seconds = time.perf_counter() - seed_start
+    
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://forge.bench") as client:
+        virtual_users = [
+            VirtualUser(rng.choice(user_ids), client, recorder, storage, random.Random(rng.random()), args)
+            for _ in range(args.concurrency)
+        ]
+        
+        # The app prints per request; keep the report readable without skipping that work
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.gather(*(vu.run(start + args.duration) for vu in virtual_users))
+        elapsed = time.perf_counter() - start
+    
+    endpoints = {}
+    for name, latencies in sorted(recorder.latencies.items()):
+        endpoints[name] = {
+            "requests": len(latencies),
+            "requests_per_second": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(max(latencies) * 1000, 2),
+            "statuses": {str(code): count for code, count in sorted(recorder.statuses[name].items())}
+        }
+    
+    all_latencies = [latency for latencies in recorder.latencies.values() for latency in latencies]
+    return {
+        "config": {key: value for key, value in vars(args).items() if key not in ("baseline", "output", "json")},
+        "seed_seconds": round(seed_seconds, 2),
+        "elapsed_seconds": round(elapsed, 2),
+        "requests": len(all_latencies),
+        "requests_per_second": round(len(all_latencies) / elapsed, 1),
+        "p95_ms": round(percentile(all_latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(all_latencies, 99) * 1000, 2),
+        "endpoints": endpoints
+    }
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Regressions beyond `tolerance` (a fraction) in throughput or p95, overall and per endpoint
+    p99 is reported but not gated: in-process runs of this length move it by 30% between identical runs
+    """
+    problems = []
+    pairs = [("overall", result, baseline)] + [
+        (name, stats, baseline["endpoints"][name])
+        for name, stats in result["endpoints"].items() if name in baseline.get("endpoints", {})
+    ]
+    for name, current, previous in pairs:
+        if current["requests_per_second"] < previous["requests_per_second"] * (1 - tolerance):
+            problems.append(f"{name}: {current['requests_per_second']} req/s vs baseline {previous['requests_per_second']}")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {current['p95_ms']} ms vs baseline {previous['p95_ms']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="Seeded users")
+    parser.add_argument("--max-sessions", type=int, default=200, help="Cap on a seeded user's past sessions")
+    parser.add_argument("--concurrency", type=int, default=50, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load")
+    parser.add_argument("--questions", type=int, default=3, help="Questions per interview")
+    parser.add_argument("--polls-per-question", type=int, default=5, help="/session-status calls per question")
+    parser.add_argument("--think-seconds", type=float, default=0.05, help="Max pause between polls")
+    parser.add_argument("--interview-ratio", type=float, default=0.5, help="Share of visits that run an interview")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the result JSON here (e.g. a new baseline)")
+    parser.add_argument("--baseline", help="Compare against this result JSON; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression vs the baseline")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+    
+    result = asyncio.run(run_load(args))
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"{result['requests']} requests in {result['elapsed_seconds']}s: {result['requests_per_second']} req/s, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms")
+        print(f"{'endpoint':<18}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}  statuses")
+        for name, stats in result["endpoints"].items():
+            print(f"{name:<18}{stats['requests_per_second']:>10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}  {stats['statuses']}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(result, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"❌ Regression: {problem}")
+        if problems:
+            sys.exit(1)
+        print("✅ Within tolerance of the baseline")
+
+
+if __name__ == "__main__":
+    main()
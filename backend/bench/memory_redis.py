@@ -0,0 +1,169 @@
+"""
+In-process stand-in for the subset of Redis commands Forge uses
+Lets benchmarks run SessionStorage without a Redis server. Values are stored
+as decoded strings, matching a client created with decode_responses=True
+"""
+
+import time
+import threading
+from typing import Dict, List, Optional
+
+from storage import ADVANCE_VERSIONS_SCRIPT
+
+
+class MemoryRedis:
+    def __init__(self):
+        self._data: Dict[str, object] = {}
+        self._lock = threading.RLock()
+    
+    def pipeline(self, transaction: bool = True) -> "MemoryPipeline":
+        return MemoryPipeline(self)
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._data.get(key)
+    
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        with self._lock:
+            return [self._data.get(key) for key in keys]
+    
+    def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        # Expiry is ignored: benchmarks don't run long enough for it to matter
+        with self._lock:
+            self._data[key] = str(value)
+            return True
+    
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            value = int(self._data.get(key, 0)) + amount
+            self._data[key] = str(value)
+            return value
+    
+    def incrby(self, key: str, amount: int = 1) -> int:
+        return self.incr(key, amount)
+    
+    def setbit(self, key: str, offset: int, value: int) -> int:
+        with self._lock:
+            bits = self._data.setdefault(key, set())
+            previous = int(offset in bits)
+            if value:
+                bits.add(offset)
+            else:
+                bits.discard(offset)
+            return previous
+    
+    def getbit(self, key: str, offset: int) -> int:
+        with self._lock:
+            return int(offset in self._data.get(key, ()))
+    
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+    
+    def exists(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for key in keys if key in self._data)
+    
+    def hset(self, key: str, field: Optional[str] = None, value=None, mapping: Optional[Dict] = None) -> int:
+        with self._lock:
+            fields = self._data.setdefault(key, {})
+            items = dict(mapping or {})
+            if field is not None:
+                items[field] = value
+            added = sum(1 for name in items if name not in fields)
+            fields.update((name, str(v)) for name, v in items.items())
+            return added
+    
+    def hsetnx(self, key: str, field: str, value) -> int:
+        with self._lock:
+            fields = self._data.setdefault(key, {})
+            if field in fields:
+                return 0
+            fields[field] = str(value)
+            return 1
+    
+    def hmget(self, key: str, fields: List[str]) -> List[Optional[str]]:
+        with self._lock:
+            values = self._data.get(key, {})
+            return [values.get(field) for field in fields]
+    
+    def hgetall(self, key: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._data.get(key, {}))
+    
+    def lpush(self, key: str, *values) -> int:
+        with self._lock:
+            items = self._data.setdefault(key, [])
+            for value in values:
+                items.insert(0, str(value))
+            return len(items)
+    
+    def lrange(self, key: str, start: int, end: int) -> List[str]:
+        with self._lock:
+            items = self._data.get(key, [])
+            end = len(items) if end == -1 else end + 1
+            return list(items[start:end])
+    
+    def llen(self, key: str) -> int:
+        with self._lock:
+            return len(self._data.get(key, []))
+    
+    def xadd(self, key: str, fields: Dict, maxlen: Optional[int] = None, approximate: bool = True) -> str:
+        with self._lock:
+            entries = self._data.setdefault(key, [])
+            last_ms, last_seq = map(int, entries[-1][0].split("-")) if entries else (0, 0)
+            now_ms = int(time.time() * 1000)
+            entry_id = f"{now_ms}-0" if now_ms > last_ms else f"{last_ms}-{last_seq + 1}"
+            entries.append((entry_id, {name: str(value) for name, value in fields.items()}))
+            if maxlen is not None and len(entries) > maxlen:
+                del entries[:len(entries) - maxlen]
+            return entry_id
+    
+    def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        with self._lock:
+            scores = self._data.setdefault(key, {})
+            added = sum(1 for member in mapping if member not in scores)
+            scores.update((member, float(score)) for member, score in mapping.items())
+            return added
+    
+    def eval(self, script: str, numkeys: int, *keys_and_args):
+        """Runs the storage scripts as Python, atomically under the lock"""
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        if script != ADVANCE_VERSIONS_SCRIPT:
+            raise NotImplementedError("MemoryRedis only runs storage.ADVANCE_VERSIONS_SCRIPT")
+        with self._lock:
+            top = self.incr(keys[0], int(args[0]))
+            base = top - int(args[0])
+            if len(args) > 1:
+                self.hset(keys[1], mapping={args[i]: base + int(args[i + 1]) for i in range(1, len(args), 2)})
+            return top
+    
+    def publish(self, channel: str, message: str) -> int:
+        # Nobody subscribes in-process
+        return 0
+    
+    def flushall(self):
+        with self._lock:
+            self._data.clear()
+
+
+class MemoryPipeline:
+    """Queues commands and runs them together on execute(), like redis-py's Pipeline"""
+    
+    def __init__(self, client: MemoryRedis):
+        self._client = client
+        self._commands = []
+    
+    def __getattr__(self, name: str):
+        method = getattr(self._client, name)
+        
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+        return queue
+    
+    def execute(self) -> List:
+        with self._client._lock:
+            results = [method(*args, **kwargs) for method, args, kwargs in self._commands]
+        self._commands = []
+        return results
@@ -0,0 +1,265 @@
+"""
+Offline simulator and turn-throughput benchmark for InterviewBotProcessor
+Drives many concurrent interviews through the real processor with scripted
+STT frames, a stub TTS and a stub evaluator whose latencies are sampled from
+lognormal distributions. No Daily, Deepgram, Claude or Redis is needed.
+
+Run from backend/: python -m bench.pipeline_sim --interviews 200
+"""
+
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from loguru import logger
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    InterimTranscriptionFrame,
+    TranscriptionFrame,
+    TTSSpeakFrame,
+    TTSStartedFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame
+)
+from pipecat.processors.frame_processor import FrameDirection
+
+import pipecat_bot
+from pipecat_bot import InterviewBotProcessor
+from storage import SessionStorage
+from bench import percentile
+from bench.memory_redis import MemoryRedis
+
+ANSWER_WORDS = (
+    "In my last role I owned the migration of our billing service. The situation was that "
+    "latency had doubled, so I set a target, split the work across three engineers, and we "
+    "shipped in six weeks, cutting p99 latency by forty percent and saving real money."
+).split()
+
+
+class LatencyModel:
+    """Lognormal latency described by its median and p99, in milliseconds"""
+    
+    def __init__(self, median_ms: float, p99_ms: float):
+        self.mu = math.log(max(median_ms, 1e-3) / 1000.0)
+        # z(0.99) = 2.326
+        self.sigma = max(math.log(max(p99_ms, median_ms) / max(median_ms, 1e-3)) / 2.326, 0.0)
+    
+    def sample(self, rng: random.Random) -> float:
+        return rng.lognormvariate(self.mu, self.sigma)
+
+
+class SimClock:
+    """Scales simulated durations so long interviews run quickly"""
+    
+    def __init__(self, scale: float):
+        self.scale = scale
+    
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds * self.scale)
+    
+    def block(self, seconds: float, cancel_event: Optional[threading.Event] = None) -> bool:
+        """Block like a synchronous call; returns False if cancel_event was set first"""
+        if cancel_event is None:
+            time.sleep(seconds * self.scale)
+            return True
+        return not cancel_event.wait(seconds * self.scale)
+
+
+class StubEvaluator:
+    """Blocking stand-in for InterviewEvaluator, like the real SDK calls"""
+    
+    def __init__(self, clock: SimClock, rng: random.Random, evaluate: LatencyModel, generate: LatencyModel):
+        self.clock = clock
+        self.rng = rng
+        self.evaluate = evaluate
+        self.generate = generate
+    
+    def evaluate_answer(self, question: str, answer: str, topic: str, cancel_event: Optional[threading.Event] = None, usage: Optional[dict] = None):
+        finished = self.clock.block(self.evaluate.sample(self.rng), cancel_event)
+        self._record_usage("evaluation", len(answer.split()) * 2, 60 if finished else 10, usage)
+        if not finished:
+            return None
+        return round(self.rng.uniform(3, 9), 1), ["Missing specific metrics"]
+    
+    def generate_next_question(self, topic: str, difficulty: str, knowledge_map: dict, usage: Optional[dict] = None, **kwargs) -> str:
+        self.clock.block(self.generate.sample(self.rng))
+        self._record_usage("question_generation", 120, 30, usage)
+        return f"Tell me about a {difficulty} {topic.replace('_', ' ')} problem you solved."
+    
+    @staticmethod
+    def _record_usage(call: str, input_tokens: int, output_tokens: int, usage: Optional[dict]):
+        """Made-up token counts, added up per call like the real evaluator does"""
+        if usage is None:
+            return
+        totals = usage.setdefault(call, {})
+        for kind, count in (("input", input_tokens), ("output", output_tokens), ("cache_read", 0), ("cache_write", 0)):
+            totals[kind] = totals.get(kind, 0) + count
+    
+    def select_next_topic(self, knowledge_map: dict, previous_topics: List[str]) -> str:
+        ordered = sorted(knowledge_map.items(), key=lambda x: x[1])
+        for topic, _ in ordered:
+            if not previous_topics or topic != previous_topics[-1]:
+                return topic
+        return ordered[0][0]
+
+
+class SimulatedInterview:
+    """One candidate talking to one InterviewBotProcessor"""
+    
+    def __init__(self, index: int, storage: SessionStorage, evaluator: StubEvaluator, clock: SimClock, rng: random.Random, args):
+        self.clock = clock
+        self.rng = rng
+        self.args = args
+        self.tts = LatencyModel(args.tts_ms, args.tts_p99_ms)
+        self.stt = LatencyModel(args.stt_ms, args.stt_p99_ms)
+        self.bot_done = asyncio.Event()
+        self.speaking = False
+        self.speech_ended_at = None
+        self.turn_latencies: List[float] = []
+        
+        session_id = storage.create_session(f"sim_user_{index}")
+        self.bot = InterviewBotProcessor(session_id, storage, evaluator, tts_cache=None)
+        self.bot.transcript.silence_seconds = pipecat_bot.ANSWER_SILENCE_SECONDS * clock.scale
+        self.bot.push_frame = self._on_bot_frame
+    
+    async def _on_bot_frame(self, frame, direction=FrameDirection.DOWNSTREAM):
+        """Stands in for everything after the processor: TTS and the output transport"""
+        if direction == FrameDirection.DOWNSTREAM and isinstance(frame, (TTSSpeakFrame, TTSStartedFrame)) and not self.speaking:
+            self.speaking = True
+            asyncio.create_task(self._play_reply())
+    
+    async def _play_reply(self):
+        await self.clock.sleep(self.tts.sample(self.rng))
+        if self.speech_ended_at is not None:
+            self.turn_latencies.append((time.perf_counter() - self.speech_ended_at) / self.clock.scale)
+            self.speech_ended_at = None
+        await self.bot.process_frame(BotStartedSpeakingFrame(), FrameDirection.UPSTREAM)
+        
+        # Wait for any further segments of the same reply, then "play" it
+        await self.clock.sleep(self.args.bot_speech_seconds)
+        self.speaking = False
+        await self.bot.process_frame(BotStoppedSpeakingFrame(), FrameDirection.UPSTREAM)
+        self.bot_done.set()
+    
+    async def _answer(self):
+        """Scripted STT output for one spoken answer"""
+        push = self.bot.process_frame
+        await push(UserStartedSpeakingFrame(), FrameDirection.DOWNSTREAM)
+        
+        words = ANSWER_WORDS[:self.args.answer_words]
+        per_word = 1.0 / self.args.words_per_second
+        said = []
+        for i, word in enumerate(words, 1):
+            await self.clock.sleep(per_word)
+            said.append(word)
+            await push(InterimTranscriptionFrame(" ".join(said), "candidate", ""), FrameDirection.DOWNSTREAM)
+            # Deepgram finalizes roughly once per sentence
+            if word.endswith(".") or i == len(words):
+                await push(TranscriptionFrame(" ".join(said), "candidate", ""), FrameDirection.DOWNSTREAM)
+                said = []
+        
+        await self.clock.sleep(self.stt.sample(self.rng))
+        self.speech_ended_at = time.perf_counter()
+        await push(UserStoppedSpeakingFrame(), FrameDirection.DOWNSTREAM)
+    
+    async def run(self):
+        self.bot_done.clear()
+        await self.bot._ask_first_question()
+        while not self.bot.session_ended:
+            await self.bot_done.wait()
+            self.bot_done.clear()
+            if self.bot.session_ended:
+                break
+            await self._answer()
+        await self.bot.cleanup()
+
+
+async def monitor_loop_lag(samples: List[float], interval: float, stop: asyncio.Event):
+    """Measure how late the loop wakes a task that asked to sleep `interval` seconds"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def simulate(args) -> dict:
+    rng = random.Random(args.seed)
+    clock = SimClock(args.time_scale)
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.threads))
+    
+    storage = SessionStorage(redis_client=MemoryRedis())
+    evaluator = StubEvaluator(
+        clock, rng,
+        evaluate=LatencyModel(args.eval_ms, args.eval_p99_ms),
+        generate=LatencyModel(args.generate_ms, args.generate_p99_ms)
+    )
+    interviews = [SimulatedInterview(i, storage, evaluator, clock, rng, args) for i in range(args.interviews)]
+    
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(monitor_loop_lag(lag_samples, 0.01, stop))
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(interview.run() for interview in interviews))
+    wall = time.perf_counter() - start
+    stop.set()
+    await lag_task
+    
+    latencies = [latency for interview in interviews for latency in interview.turn_latencies]
+    return {
+        "interviews": args.interviews,
+        "turns": len(latencies),
+        "wall_seconds": round(wall, 3),
+        "simulated_seconds": round(wall / clock.scale, 1),
+        "turns_per_second": round(len(latencies) / (wall / clock.scale), 3),
+        "turn_latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "turn_latency_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "loop_lag_p50_ms": round(percentile(lag_samples, 50) * 1000, 2),
+        "loop_lag_p99_ms": round(percentile(lag_samples, 99) * 1000, 2),
+        "loop_lag_max_ms": round(max(lag_samples, default=0.0) * 1000, 2),
+        "loop_lag_mean_ms": round(statistics.fmean(lag_samples) * 1000, 2) if lag_samples else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interviews", type=int, default=200, help="Concurrent simulated interviews")
+    parser.add_argument("--time-scale", type=float, default=0.1, help="Real seconds per simulated second")
+    parser.add_argument("--threads", type=int, default=256, help="Executor threads for blocking evaluator/storage calls")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--answer-words", type=int, default=45)
+    parser.add_argument("--words-per-second", type=float, default=2.5)
+    parser.add_argument("--bot-speech-seconds", type=float, default=4.0, help="How long each bot reply plays")
+    parser.add_argument("--stt-ms", type=float, default=150)
+    parser.add_argument("--stt-p99-ms", type=float, default=400)
+    parser.add_argument("--eval-ms", type=float, default=900)
+    parser.add_argument("--eval-p99-ms", type=float, default=2500)
+    parser.add_argument("--generate-ms", type=float, default=700)
+    parser.add_argument("--generate-p99-ms", type=float, default=2000)
+    parser.add_argument("--tts-ms", type=float, default=250)
+    parser.add_argument("--tts-p99-ms", type=float, default=700)
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+    
+    # Per-frame bot logging would dominate the measurement
+    logger.remove()
+    
+    result = asyncio.run(simulate(args))
+    if args.json:
+        print(json.dumps(result))
+        return
+    
+    for key, value in result.items():
+        print(f"{key:<22}{value}")
+
+
+if __name__ == "__main__":
+    main()
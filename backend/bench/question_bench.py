@@ -0,0 +1,105 @@
+"""
+Question index benchmark: build time, memory and weak-point lookup latency by bank size
+Synthetic banks are spread over 10 topics x 3 difficulties; a hit is a lookup with at
+least one match above the similarity threshold. "load s" is a worker mapping the index
+another process already compiled
+
+Run from backend/: python -m bench.question_bench
+                   python -m bench.question_bench --questions 1000 100000 --json
+"""
+
+import json
+import time
+import random
+import argparse
+import tempfile
+from typing import Dict, List, Tuple
+
+from bench import percentile
+from question_bank import CompiledQuestionBank
+from question_index import QuestionIndex
+
+# Banks need a behavioral topic to fall back to (see question_bank.py)
+TOPICS = ["behavioral"] + [f"topic_{i}" for i in range(9)]
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+OPENERS = ["Tell me about a time you", "Describe how you would", "Walk me through how you", "Explain how you"]
+VERBS = ["designed", "debugged", "scaled", "negotiated", "prioritized", "measured", "migrated", "mentored", "estimated", "reviewed"]
+OBJECTS = [
+    "a distributed cache", "a team conflict", "an outage postmortem", "a hiring plan", "a slow database query",
+    "a product launch", "an API redesign", "a missed deadline", "stakeholder expectations", "a security incident",
+    "customer feedback", "a flaky test suite", "a data pipeline", "an on-call rotation", "a pricing change"
+]
+QUALIFIERS = ["with specific metrics", "under a tight deadline", "with limited data", "across three teams", "using the STAR format", "with a measurable result"]
+WEAK_POINTS = [
+    "Missing specific metrics", "No STAR format", "Vague impact statement", "Result could be stronger",
+    "Did not explain the tradeoffs", "No mention of stakeholder communication"
+]
+
+
+def synthetic_questions(size: int, rng: random.Random) -> List[Tuple[str, str, str]]:
+    """(text, topic, difficulty) for size distinct questions, spread evenly over the groups"""
+    questions = []
+    for i in range(size):
+        text = f"{rng.choice(OPENERS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(QUALIFIERS)} (#{i})?"
+        questions.append((text, TOPICS[i % len(TOPICS)], DIFFICULTIES[(i // len(TOPICS)) % len(DIFFICULTIES)]))
+    return questions
+
+
+def bench_size(size: int, lookups: int, rng: random.Random) -> Dict:
+    bank = CompiledQuestionBank((topic, difficulty, text) for text, topic, difficulty in synthetic_questions(size, rng))
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        QuestionIndex.load(bank, directory)
+        build_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        index = QuestionIndex.load(bank, directory)
+        load_seconds = time.perf_counter() - start
+        return measure(index, size, build_seconds, load_seconds, lookups, rng)
+
+
+def measure(index: QuestionIndex, size: int, build_seconds: float, load_seconds: float, lookups: int, rng: random.Random) -> Dict:
+    
+    latencies = []
+    hits = 0
+    for _ in range(lookups):
+        topic, difficulty = rng.choice(TOPICS), rng.choice(DIFFICULTIES)
+        weak_points = rng.sample(WEAK_POINTS, 2)
+        start = time.perf_counter()
+        hits += bool(index.matches(topic, difficulty, weak_points))
+        latencies.append(time.perf_counter() - start)
+    
+    return {
+        "questions": size,
+        "build_seconds": round(build_seconds, 3),
+        "load_seconds": round(load_seconds, 4),
+        "memory_mb": round(index.memory_bytes() / 1e6, 2),
+        "lookup_p50_us": round(percentile(latencies, 50) * 1e6, 1),
+        "lookup_p99_us": round(percentile(latencies, 99) * 1e6, 1),
+        "hit_rate": round(hits / lookups, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, nargs="+", default=[100, 1000, 10000, 100000], help="Bank sizes")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    results = [bench_size(size, args.lookups, rng) for size in args.questions]
+    
+    if args.json:
+        print(json.dumps(results))
+        return
+    
+    print(f"{'questions':>10}{'build s':>10}{'load s':>10}{'memory MB':>11}{'p50 us':>10}{'p99 us':>10}{'hit rate':>10}")
+    for r in results:
+        print(f"{r['questions']:>10}{r['build_seconds']:>10}{r['load_seconds']:>10}{r['memory_mb']:>11}{r['lookup_p50_us']:>10}{r['lookup_p99_us']:>10}{r['hit_rate']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+SessionStorage microbenchmarks over sessions per user and questions per session
+For each grid point a user is seeded directly in MemoryRedis, then add_question,
+get_knowledge_map, get_user_sessions and calculate_improvement are timed with their
+Redis round trips and bytes moved. Log-log slopes at the top of each axis give each
+method's growth in sessions (S) and questions per session (Q)
+
+Run from backend/: python -m bench.storage_bench
+                   python -m bench.storage_bench --sessions 1 10 100 --questions 1 10 --json
+"""
+
+import json
+import math
+import time
+import argparse
+import statistics
+from datetime import datetime
+from typing import Dict, List
+
+from keys import knowledge_key, new_session_id, session_key, user_sessions_key
+from storage import SessionStorage
+from bench.memory_redis import MemoryRedis
+
+TOPICS = ["leadership", "algorithms", "system_design", "conflict_resolution"]
+OPERATIONS = ["add_question", "get_knowledge_map", "get_user_sessions", "calculate_improvement"]
+
+
+def _size(value) -> int:
+    """Approximate wire size of a command argument or reply"""
+    if value is None:
+        return 0
+    if isinstance(value, (list, tuple)):
+        return sum(_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_size(k) + _size(v) for k, v in value.items())
+    return len(str(value))
+
+
+class CountingRedis:
+    """Wraps a client and counts round trips and bytes sent/received"""
+    
+    def __init__(self, client):
+        self._client = client
+        self.round_trips = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+    
+    def reset(self):
+        self.round_trips = self.bytes_sent = self.bytes_received = 0
+    
+    def pipeline(self, transaction: bool = True) -> "CountingPipeline":
+        return CountingPipeline(self, self._client.pipeline(transaction))
+    
+    def __getattr__(self, name: str):
+        method = getattr(self._client, name)
+        
+        def counted(*args, **kwargs):
+            result = method(*args, **kwargs)
+            self.round_trips += 1
+            self.bytes_sent += len(name) + _size(args) + _size(kwargs)
+            self.bytes_received += _size(result)
+            return result
+        return counted
+
+
+class CountingPipeline:
+    """A pipeline is one round trip, however many commands it carries"""
+    
+    def __init__(self, counter: CountingRedis, pipe):
+        self._counter = counter
+        self._pipe = pipe
+    
+    def __getattr__(self, name: str):
+        method = getattr(self._pipe, name)
+        
+        def queue(*args, **kwargs):
+            self._counter.bytes_sent += len(name) + _size(args) + _size(kwargs)
+            method(*args, **kwargs)
+            return self
+        return queue
+    
+    def execute(self) -> List:
+        results = self._pipe.execute()
+        self._counter.round_trips += 1
+        self._counter.bytes_received += _size(results)
+        return results
+
+
+def seed_user(redis_client, user_id: str, sessions: int, questions: int) -> List[str]:
+    """Write a user's sessions and knowledge map straight to Redis, in SessionStorage's layout"""
+    knowledge = {topic: [] for topic in TOPICS}
+    session_ids = []
+    for s in range(sessions):
+        session_id = new_session_id(user_id, f"sess_{s}")
+        entries = []
+        current_scores = {}
+        for q in range(questions):
+            topic = TOPICS[(s + q) % len(TOPICS)]
+            score = float((s * 7 + q * 3) % 10)
+            entries.append({
+                "question": "Describe a time you had to make a difficult technical decision.",
+                "answer": "In my previous role I led the migration of our billing system and cut latency by forty percent.",
+                "score": score,
+                "topic": topic,
+                "weak_points": ["Missing specific metrics"],
+                "timestamp": datetime.now().isoformat()
+            })
+            current_scores.setdefault(topic, []).append(score)
+            knowledge[topic].append(score)
+        
+        redis_client.set(session_key(session_id), json.dumps({
+            "id": session_id,
+            "user_id": user_id,
+            "started_at": datetime.now().isoformat(),
+            "ended_at": datetime.now().isoformat(),
+            "questions": entries,
+            "current_scores": current_scores
+        }))
+        redis_client.lpush(user_sessions_key(user_id), session_id)
+        session_ids.append(session_id)
+    
+    redis_client.set(knowledge_key(user_id), json.dumps({t: s for t, s in knowledge.items() if s}))
+    return session_ids
+
+
+def measure(fn, counter: CountingRedis, before=None, min_seconds: float = 0.2, max_runs: int = 50) -> Dict:
+    """Median time of repeated runs, with the round trips and bytes of one run"""
+    times = []
+    stats = None
+    while len(times) < 3 or (sum(times) < min_seconds and len(times) < max_runs):
+        if before:
+            before()
+        counter.reset()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+        if stats is None:
+            stats = (counter.round_trips, counter.bytes_sent, counter.bytes_received)
+    
+    return {
+        "ms": round(statistics.median(times) * 1000, 3),
+        "round_trips": stats[0],
+        "bytes_sent": stats[1],
+        "bytes_received": stats[2]
+    }
+
+
+def bench_point(sessions: int, questions: int) -> Dict:
+    memory = MemoryRedis()
+    counter = CountingRedis(memory)
+    storage = SessionStorage(redis_client=counter)
+    user_id = f"bench_{sessions}_{questions}"
+    session_ids = seed_user(memory, user_id, sessions, questions)
+    
+    # add_question grows the session and knowledge map; restore both before each run
+    target = session_key(session_ids[-1])
+    saved = {key: memory.get(key) for key in (target, knowledge_key(user_id))}
+    
+    def restore():
+        for key, value in saved.items():
+            memory.set(key, value)
+    
+    return {
+        "sessions": sessions,
+        "questions": questions,
+        "add_question": measure(
+            lambda: storage.add_question(session_ids[-1], "Q?", "A.", 7.0, "algorithms", []),
+            counter,
+            before=restore
+        ),
+        "get_knowledge_map": measure(lambda: storage.get_knowledge_map(user_id), counter),
+        "get_user_sessions": measure(lambda: storage.get_user_sessions(user_id), counter),
+        "calculate_improvement": measure(lambda: storage.calculate_improvement(user_id), counter)
+    }
+
+
+def exponent(points: List[Dict], axis: str, operation: str, metric: str) -> float:
+    """
+    Growth exponent k in metric ~ axis^k, from the two largest values of the axis
+    (where fixed per-call overhead no longer dominates), median over the other axis
+    """
+    other = "questions" if axis == "sessions" else "sessions"
+    slopes = []
+    for value in sorted({p[other] for p in points}):
+        line = sorted((p for p in points if p[other] == value), key=lambda p: p[axis])
+        if len(line) < 2:
+            continue
+        a, b = line[-2], line[-1]
+        ya, yb = max(a[operation][metric], 1e-9), max(b[operation][metric], 1e-9)
+        slopes.append(math.log(yb / ya) / math.log(b[axis] / a[axis]))
+    return round(statistics.median(slopes), 2) if slopes else float("nan")
+
+
+def big_o(sessions_exponent: float, questions_exponent: float) -> str:
+    """Nearest simple complexity class, e.g. O(S·Q) for exponents near 1 and 1"""
+    terms = []
+    for name, k in (("S", sessions_exponent), ("Q", questions_exponent)):
+        power = 0 if math.isnan(k) else round(k)
+        if power >= 1:
+            terms.append(name if power == 1 else f"{name}^{power}")
+    return f"O({'·'.join(terms) or '1'})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    parser.add_argument("--questions", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--max-total-questions", type=int, default=500_000, help="Skip grid points with more questions per user than this")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+    
+    points = []
+    skipped = []
+    for sessions in args.sessions:
+        for questions in args.questions:
+            if sessions * questions > args.max_total_questions:
+                skipped.append((sessions, questions))
+                continue
+            points.append(bench_point(sessions, questions))
+    
+    growth = {
+        operation: {
+            metric: {axis: exponent(points, axis, operation, metric) for axis in ("sessions", "questions")}
+            for metric in ("ms", "round_trips", "bytes_received")
+        }
+        for operation in OPERATIONS
+    }
+    
+    if args.json:
+        print(json.dumps({"points": points, "growth": growth, "skipped": skipped}))
+        return
+    
+    for operation in OPERATIONS:
+        g = growth[operation]
+        print(f"\n{operation}")
+        for metric, label in (("ms", "time"), ("round_trips", "round trips"), ("bytes_received", "bytes received")):
+            print(f"  {label:<15} ~ S^{g[metric]['sessions']} x Q^{g[metric]['questions']}  {big_o(g[metric]['sessions'], g[metric]['questions'])}")
+        print(f"{'sessions':>9}{'questions':>10}{'ms':>12}{'round trips':>13}{'KB sent':>11}{'KB recv':>11}")
+        for p in points:
+            m = p[operation]
+            print(f"{p['sessions']:>9}{p['questions']:>10}{m['ms']:>12}{m['round_trips']:>13}{m['bytes_sent'] / 1024:>11.1f}{m['bytes_received'] / 1024:>11.1f}")
+    
+    if skipped:
+        print(f"\nSkipped (over --max-total-questions): {skipped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Benchmark: end-of-turn handling for streaming STT
+Compares the old task-per-frame silence timer with TranscriptAssembler on a
+synthetic Deepgram-like stream of interim and final results
+
+Run from backend/: python -m bench.transcript_bench --seconds 60
+"""
+
+import time
+import asyncio
+import argparse
+import tracemalloc
+
+from transcript import TranscriptAssembler
+
+SILENCE_SECONDS = 2.0
+
+
+class CountingLoop(asyncio.SelectorEventLoop):
+    """Event loop that counts the tasks and timer handles it allocates"""
+    
+    def __init__(self):
+        super().__init__()
+        self.tasks_created = 0
+        self.handles_created = 0
+    
+    def create_task(self, coro, **kwargs):
+        self.tasks_created += 1
+        return super().create_task(coro, **kwargs)
+    
+    def call_at(self, when, callback, *args, **kwargs):
+        self.handles_created += 1
+        return super().call_at(when, callback, *args, **kwargs)
+
+
+class LegacySilenceTimer:
+    """The previous InterviewBotProcessor logic: replace the answer and restart a task per frame"""
+    
+    def __init__(self):
+        self.current_answer = ""
+        self._answer_timer = None
+    
+    def handle_text(self, text: str, is_final: bool):
+        if text != self.current_answer:
+            self.current_answer = text
+            if self._answer_timer:
+                self._answer_timer.cancel()
+            self._answer_timer = asyncio.create_task(self._silence_timer())
+    
+    async def _silence_timer(self):
+        try:
+            await asyncio.sleep(SILENCE_SECONDS)
+        except asyncio.CancelledError:
+            pass
+    
+    def answer(self) -> str:
+        if self._answer_timer:
+            self._answer_timer.cancel()
+        return self.current_answer
+
+
+class AssemblerAdapter:
+    def __init__(self):
+        self.assembler = TranscriptAssembler(SILENCE_SECONDS, lambda: None)
+    
+    def handle_text(self, text: str, is_final: bool):
+        if is_final:
+            self.assembler.add_final(text)
+        else:
+            self.assembler.add_interim(text)
+    
+    def answer(self) -> str:
+        return self.assembler.take()
+
+
+def speech_stream(seconds: float, interim_hz: float, words_per_second: float, utterance_seconds: float):
+    """Yield (text, is_final) like Deepgram: growing interim hypotheses, then one final per utterance"""
+    frames_per_utterance = max(1, int(utterance_seconds * interim_hz))
+    words_per_frame = words_per_second / interim_hz
+    utterances = int(seconds / utterance_seconds)
+    word = 0
+    for _ in range(utterances):
+        words = []
+        for _ in range(frames_per_utterance):
+            target = len(words) + words_per_frame
+            while len(words) < target:
+                words.append(f"w{word}")
+                word += 1
+            yield " ".join(words), False
+        yield " ".join(words), True
+
+
+async def feed(handler, frames):
+    for text, is_final in frames:
+        handler.handle_text(text, is_final)
+        # Let scheduled tasks start, as they would between real frames
+        await asyncio.sleep(0)
+    return handler.answer()
+
+
+def run(name: str, handler_factory, args) -> dict:
+    frames = list(speech_stream(args.seconds, args.interim_hz, args.words_per_second, args.utterance_seconds))
+    expected_words = sum(len(text.split()) for text, is_final in frames if is_final)
+    
+    loop = CountingLoop()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        answer = loop.run_until_complete(feed(handler_factory(), frames))
+        # Drain cancellations so they are included in the measurement
+        loop.run_until_complete(asyncio.sleep(0))
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        loop.close()
+    
+    allocations = loop.tasks_created + loop.handles_created
+    return {
+        "name": name,
+        "frames": len(frames),
+        "us_per_frame": elapsed / len(frames) * 1e6,
+        "tasks_per_speech_second": loop.tasks_created / args.seconds,
+        "handles_per_speech_second": loop.handles_created / args.seconds,
+        "allocations_per_speech_second": allocations / args.seconds,
+        "peak_kib": peak / 1024,
+        "words_kept": f"{len(answer.split())}/{expected_words}"
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0, help="Seconds of simulated speech")
+    parser.add_argument("--interim-hz", type=float, default=10.0, help="Interim results per second")
+    parser.add_argument("--words-per-second", type=float, default=2.5)
+    parser.add_argument("--utterance-seconds", type=float, default=4.0, help="Speech between final results")
+    args = parser.parse_args()
+    
+    results = [
+        run("legacy task-per-frame", LegacySilenceTimer, args),
+        run("TranscriptAssembler", AssemblerAdapter, args)
+    ]
+    
+    print(f"{args.seconds:.0f}s of speech, {args.interim_hz:g} interim results/s, final every {args.utterance_seconds:g}s\n")
+    print(f"{'implementation':<24}{'frames':>8}{'us/frame':>10}{'tasks/s':>10}{'handles/s':>11}{'allocs/s':>10}{'peak KiB':>10}{'words kept':>12}")
+    for r in results:
+        print(
+            f"{r['name']:<24}{r['frames']:>8}{r['us_per_frame']:>10.1f}{r['tasks_per_speech_second']:>10.1f}"
+            f"{r['handles_per_speech_second']:>11.1f}{r['allocations_per_speech_second']:>10.1f}{r['peak_kib']:>10.1f}{r['words_kept']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
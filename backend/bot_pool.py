@@ -0,0 +1,421 @@
+"""
+Bot supervisor that runs Pipecat interview pipelines in a pool of worker processes
+Keeps real-time audio off the API event loop and admits bots up to a fixed capacity
+"""
+
+import os
+import json
+import time
+import queue
+import asyncio
+import resource
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Dict, List, Optional, Set
+
+from keys import connect
+from leases import SessionLeases, LEASE_HEARTBEAT_SECONDS, owner_channel
+from metrics import REGISTRY, BOT_TAKEOVERS_TOTAL
+from question_index import get_question_index
+
+# Pool sizing - each worker process runs up to BOTS_PER_WORKER pipelines concurrently
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", 2))
+BOTS_PER_WORKER = int(os.getenv("BOTS_PER_WORKER", 4))
+
+# Used for wait estimates until real session durations have been observed
+EXPECTED_SESSION_SECONDS = float(os.getenv("EXPECTED_SESSION_SECONDS", 300))
+
+# Threads per worker for the bots' blocking evaluator and storage calls
+BOT_THREADS_PER_BOT = 4
+
+# How often workers report their gauges
+WORKER_STATS_INTERVAL = 5.0
+
+# A crashed worker is replaced, but not sooner than this after its slot was last started
+WORKER_RESTART_SECONDS = 5.0
+
+
+class BotSupervisor:
+    """Dispatches interview bots to worker processes with admission control"""
+    
+    def __init__(self, workers: int = BOT_WORKERS, bots_per_worker: int = BOTS_PER_WORKER):
+        self.workers = workers
+        self.bots_per_worker = bots_per_worker
+        self._ctx = mp.get_context("spawn")
+        self._processes: List[mp.Process] = []
+        self._commands: List[mp.Queue] = []
+        self._started_at: List[float] = []
+        self._stopping = False
+        self._events: mp.Queue = self._ctx.Queue()
+        
+        # Dispatch bookkeeping (only touched from the API event loop)
+        self._active: Dict[int, Dict[str, float]] = {}
+        self._pending: deque = deque()
+        self._worker_stats: Dict[int, Dict] = {}
+        self._worker_metrics: Dict[int, Dict] = {}
+        # Final counts of replaced workers, so pool-wide counters never go down
+        self._retired_metrics: Dict = {}
+        self._avg_session_seconds = EXPECTED_SESSION_SECONDS
+        self._sessions_completed = 0
+        self._event_task: Optional[asyncio.Task] = None
+        
+        # Cross-node ownership of running bots (see leases.py)
+        self.leases: Optional[SessionLeases] = None
+        self._takeover_task: Optional[asyncio.Task] = None
+    
+    @property
+    def capacity(self) -> int:
+        return self.workers * self.bots_per_worker
+    
+    def start(self):
+        """Spawn the worker processes and start consuming their events"""
+        # Compiled once here, so the workers only map the files (see question_index.py)
+        get_question_index()
+        for worker_id in range(self.workers):
+            self._processes.append(None)
+            self._commands.append(None)
+            self._started_at.append(0.0)
+            self._spawn(worker_id)
+        
+        self.leases = SessionLeases(connect())
+        self._event_task = asyncio.get_running_loop().create_task(self._consume_events())
+        self._takeover_task = asyncio.get_running_loop().create_task(self._takeover_loop())
+        print(f"✅ Bot pool started: {self.workers} workers x {self.bots_per_worker} bots")
+    
+    def _spawn(self, worker_id: int):
+        """Start a worker process in the slot, with a fresh command queue"""
+        commands = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, commands, self._events),
+            name=f"bot-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        self._processes[worker_id] = process
+        self._commands[worker_id] = commands
+        self._started_at[worker_id] = time.monotonic()
+        self._active[worker_id] = {}
+    
+    async def stop(self):
+        """Ask every worker to cancel its bots and exit"""
+        self._stopping = True
+        for commands in self._commands:
+            commands.put(("shutdown",))
+        if self._event_task:
+            self._event_task.cancel()
+        if self._takeover_task:
+            self._takeover_task.cancel()
+        for process in self._processes:
+            await asyncio.to_thread(process.join, 10.0)
+            if process.is_alive():
+                process.terminate()
+    
+    def submit(self, room_url: str, room_token: str, session_id: str) -> Dict:
+        """Start a bot now if a worker has room, otherwise queue it with a wait estimate"""
+        request = (room_url, room_token, session_id)
+        if not self._pending and self._dispatch(request):
+            return {"status": "running", "queue_position": 0, "estimated_wait_seconds": 0.0}
+        
+        self._pending.append(request)
+        position = len(self._pending)
+        return {
+            "status": "queued",
+            "queue_position": position,
+            "estimated_wait_seconds": self.estimated_wait(position)
+        }
+    
+    def end_session(self, session_id: str) -> bool:
+        """
+        Stop the bot for a session, or drop it from the queue if it never started
+        Returns False if this node has no bot for the session (it may be owned by another node)
+        """
+        for request in self._pending:
+            if request[2] == session_id:
+                self._pending.remove(request)
+                return True
+        
+        for worker_id, sessions in self._active.items():
+            if session_id in sessions:
+                self._commands[worker_id].put(("end", session_id))
+                return True
+        return False
+    
+    def estimated_wait(self, position: int) -> float:
+        """Expected seconds until the bot at this queue position gets a slot"""
+        return round(position * self._avg_session_seconds / self.capacity, 1)
+    
+    def stats(self) -> Dict:
+        """Pool-level and per-worker gauges"""
+        return {
+            "capacity": self.capacity,
+            "active_bots": sum(len(sessions) for sessions in self._active.values()),
+            "queued_bots": len(self._pending),
+            "avg_session_seconds": round(self._avg_session_seconds, 1),
+            "workers": [
+                {
+                    "worker_id": worker_id,
+                    "alive": self._processes[worker_id].is_alive(),
+                    "active_bots": len(self._active[worker_id]),
+                    **self._worker_stats.get(worker_id, {})
+                }
+                for worker_id in range(len(self._processes))
+            ]
+        }
+    
+    def metric_snapshots(self) -> List[Dict]:
+        """Latest metrics registry snapshot from each worker, plus the counts of workers that exited"""
+        return [self._retired_metrics, *self._worker_metrics.values()]
+    
+    def _dispatch(self, request: tuple) -> bool:
+        """Send a bot to the least loaded live worker, False if the pool is full"""
+        candidates = [
+            worker_id for worker_id, sessions in self._active.items()
+            if len(sessions) < self.bots_per_worker and self._processes[worker_id].is_alive()
+        ]
+        if not candidates:
+            return False
+        
+        worker_id = min(candidates, key=lambda w: len(self._active[w]))
+        room_url, room_token, session_id = request
+        self._active[worker_id][session_id] = time.monotonic()
+        self._commands[worker_id].put(("start", room_url, room_token, session_id))
+        print(f"✅ Voice bot for session {session_id} dispatched to worker {worker_id}")
+        return True
+    
+    def _free_slots(self) -> int:
+        if self._pending:
+            return 0
+        return sum(
+            self.bots_per_worker - len(sessions)
+            for worker_id, sessions in self._active.items() if self._processes[worker_id].is_alive()
+        )
+    
+    async def _takeover_loop(self):
+        """Claim and restart sessions whose owning worker, on any node, stopped renewing its lease"""
+        while True:
+            await asyncio.sleep(LEASE_HEARTBEAT_SECONDS)
+            try:
+                # Only claim what can start right away; a queued claim would expire and be claimed again
+                for session_id in await asyncio.to_thread(self.leases.expired, self._free_slots()):
+                    lease = await asyncio.to_thread(self.leases.claim, session_id)
+                    if lease is None:
+                        continue
+                    BOT_TAKEOVERS_TOTAL.inc()
+                    print(f"⚠️ Taking over session {session_id} (takeover {lease.get('takeovers')})")
+                    self.submit(lease["room_url"], lease["room_token"], session_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Lease takeover scan failed: {e}")
+    
+    def _drain_pending(self):
+        while self._pending and self._dispatch(self._pending[0]):
+            self._pending.popleft()
+    
+    async def _consume_events(self):
+        """Apply worker events (bot finished, gauges) and admit queued bots"""
+        while True:
+            try:
+                event = await asyncio.to_thread(self._events.get, True, 1.0)
+            except queue.Empty:
+                event = None
+            self._replace_dead_workers()
+            if event is None:
+                continue
+            
+            kind, worker_id = event[0], event[1]
+            if kind == "finished":
+                started = self._active[worker_id].pop(event[2], None)
+                if started is not None:
+                    self._record_duration(time.monotonic() - started)
+                self._drain_pending()
+            elif kind == "stats" and event[2]["pid"] == self._processes[worker_id].pid:
+                # (Stats still queued from a replaced worker are already in _retired_metrics)
+                self._worker_stats[worker_id] = event[2]
+                self._worker_metrics[worker_id] = event[3]
+    
+    def _replace_dead_workers(self):
+        """Start a new process in the slot of a worker that exited, so crashes don't shrink the pool"""
+        if self._stopping:
+            return
+        replaced = False
+        for worker_id, process in enumerate(self._processes):
+            if process.is_alive() or time.monotonic() - self._started_at[worker_id] < WORKER_RESTART_SECONDS:
+                continue
+            # Their leases lapse within BOT_LEASE_TTL_SECONDS and the sessions are taken over
+            print(f"❌ Bot worker {worker_id} exited (code {process.exitcode}), lost sessions: {list(self._active[worker_id])}")
+            self._worker_stats.pop(worker_id, None)
+            retired = self._worker_metrics.pop(worker_id, None)
+            if retired:
+                self._retired_metrics = REGISTRY.combine([self._retired_metrics, retired])
+            self._spawn(worker_id)
+            replaced = True
+        if replaced:
+            self._drain_pending()
+    
+    def _record_duration(self, seconds: float):
+        # Running mean, seeded with the configured expectation
+        self._sessions_completed += 1
+        self._avg_session_seconds += (seconds - self._avg_session_seconds) / (self._sessions_completed + 1)
+
+
+def _rss_bytes() -> int:
+    """Current resident set size, falling back to the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _worker_main(worker_id: int, commands: mp.Queue, events: mp.Queue):
+    """Entry point of a worker process"""
+    from dotenv import load_dotenv
+    
+    load_dotenv(override=True)
+    asyncio.run(_worker_loop(worker_id, commands, events))
+
+
+async def _worker_loop(worker_id: int, commands: mp.Queue, events: mp.Queue):
+    import redis.asyncio as aioredis
+    from storage import SessionStorage
+    from evaluator import InterviewEvaluator
+    from pipecat_bot import run_interview_bot
+    from question_bank import get_question_bank, on_reload
+    from question_index import question_id
+    from session_registry import SessionRegistry
+    from metrics import REGISTRY
+    
+    # Size the executor so every bot can have its evaluator and storage calls in flight at once
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=BOTS_PER_WORKER * BOT_THREADS_PER_BOT))
+    
+    storage = SessionStorage()
+    evaluator = InterviewEvaluator()
+    
+    # Questions other workers generated are matchable here too
+    generated = await asyncio.to_thread(storage.get_generated_questions)
+    get_question_index().add((q["text"], q["topic"], q["difficulty"]) for q in generated)
+    # Bank questions are tracked per user by bit offset (see served_questions.py), including
+    # ones a reloaded bank adds
+    register_bank = lambda bank: storage.served.register(question_id(text) for text, _, _ in bank)
+    on_reload(register_bank)
+    await asyncio.to_thread(register_bank, get_question_bank())
+    registry = SessionRegistry()
+    registry.start_reaper()
+    leases = SessionLeases(storage.redis)
+    bots: Dict[str, asyncio.Task] = {}
+    shutting_down = False
+    # Fire-and-forget tasks; the event loop only keeps weak references to them
+    running: Set[asyncio.Task] = set()
+    
+    def finished(task: asyncio.Task):
+        running.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"❌ Bot worker {worker_id} background task failed: {task.exception()!r}")
+    
+    def in_background(coro):
+        """Run coro without awaiting it, holding its task until it finishes and reporting its errors"""
+        task = asyncio.create_task(coro)
+        running.add(task)
+        task.add_done_callback(finished)
+    
+    def on_done(session_id: str):
+        bots.pop(session_id, None)
+        events.put(("finished", worker_id, session_id))
+        # On shutdown the lease is left to lapse, so another node resumes the interview
+        if not shutting_down:
+            in_background(asyncio.to_thread(leases.release, session_id))
+    
+    async def start_bot(room_url: str, room_token: str, session_id: str):
+        if not await asyncio.to_thread(leases.acquire, session_id, room_url, room_token):
+            print(f"⚠️ Session {session_id} already has a live bot on another worker")
+            events.put(("finished", worker_id, session_id))
+            return
+        
+        session = await asyncio.to_thread(storage.get_session, session_id)
+        if not session or session.get("ended_at"):
+            await asyncio.to_thread(leases.release, session_id)
+            events.put(("finished", worker_id, session_id))
+            return
+        
+        task = asyncio.create_task(run_interview_bot(room_url, room_token, session_id, storage, evaluator, registry))
+        task.add_done_callback(lambda _t, sid=session_id: on_done(sid))
+        bots[session_id] = task
+    
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(LEASE_HEARTBEAT_SECONDS)
+            try:
+                lost = await asyncio.to_thread(leases.renew, list(bots))
+            except Exception as e:
+                print(f"⚠️ Lease heartbeat failed: {e}")
+                continue
+            for session_id in lost:
+                # Another node took the session over; two bots must not share the room
+                print(f"⚠️ Lost the lease on session {session_id}, stopping its bot")
+                in_background(registry.release(session_id, "lease_lost"))
+    
+    async def listen_for_commands():
+        """Commands from API nodes that don't run this session's bot (see SessionLeases.signal)"""
+        client = aioredis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"), decode_responses=True)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(owner_channel(leases.owner))
+        while True:
+            try:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not message:
+                    continue
+                command = json.loads(message["data"])
+                if command["command"] == "end" and command["session_id"] in bots:
+                    in_background(registry.release(command["session_id"], "ended"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Bot command listener error: {e}")
+                await asyncio.sleep(1.0)
+    
+    async def report_stats():
+        last_cpu = sum(os.times()[:2])
+        last_wall = time.monotonic()
+        while True:
+            await asyncio.sleep(WORKER_STATS_INTERVAL)
+            cpu, wall = sum(os.times()[:2]), time.monotonic()
+            events.put(("stats", worker_id, {
+                "pid": os.getpid(),
+                "cpu_percent": round(100.0 * (cpu - last_cpu) / (wall - last_wall), 1),
+                "memory_rss_bytes": _rss_bytes(),
+                "running_bots": len(bots),
+                **registry.counts()
+            }, REGISTRY.snapshot()))
+            last_cpu, last_wall = cpu, wall
+    
+    background = [
+        asyncio.create_task(report_stats()),
+        asyncio.create_task(heartbeat()),
+        asyncio.create_task(listen_for_commands())
+    ]
+    
+    while True:
+        try:
+            command = await asyncio.to_thread(commands.get, True, 1.0)
+        except queue.Empty:
+            continue
+        
+        if command[0] == "start":
+            _, room_url, room_token, session_id = command
+            in_background(start_bot(room_url, room_token, session_id))
+        elif command[0] == "end":
+            in_background(registry.release(command[1], "ended"))
+        elif command[0] == "shutdown":
+            shutting_down = True
+            break
+    
+    for task in background:
+        task.cancel()
+    await registry.release_all()
+    tasks = list(bots.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
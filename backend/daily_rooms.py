@@ -0,0 +1,169 @@
+"""
+Async Daily REST client and a pool of pre-provisioned rooms
+Rooms and their bot tokens are created ahead of time so /start-session never
+waits on the Daily API
+"""
+
+import os
+import time
+import uuid
+import asyncio
+from collections import deque
+from typing import Dict, Optional
+
+import httpx
+
+# Overridable with DAILY_API_URL, e.g. to point at fake_daily.py
+DEFAULT_DAILY_API_URL = "https://api.daily.co/v1"
+
+# Pool sizing and room lifetime
+ROOM_POOL_SIZE = int(os.getenv("DAILY_ROOM_POOL_SIZE", 5))
+ROOM_TTL_SECONDS = int(os.getenv("DAILY_ROOM_TTL_SECONDS", 3600))
+
+# A pooled room must stay valid at least this long to be handed out
+ROOM_MIN_REMAINING_SECONDS = int(os.getenv("DAILY_ROOM_MIN_REMAINING_SECONDS", 900))
+
+
+def demo_room(session_id: str) -> Dict:
+    """Placeholder room used when no Daily API key is configured"""
+    return {
+        "url": f"https://demo.daily.co/interview-{session_id}",
+        "token": ""
+    }
+
+
+class DailyClient:
+    """Pooled async client for the Daily REST API"""
+    
+    def __init__(self, api_key: str, api_url: Optional[str] = None):
+        self._client = httpx.AsyncClient(
+            base_url=api_url or os.getenv("DAILY_API_URL", DEFAULT_DAILY_API_URL),
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            timeout=httpx.Timeout(5.0, connect=2.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
+    
+    async def create_room(self, name: str, expires_at: int) -> Dict:
+        response = await self._client.post("/rooms", json={
+            "name": name,
+            "privacy": "private",
+            "properties": {
+                "enable_chat": False,
+                "enable_screenshare": False,
+                "start_audio_off": False,
+                "start_video_off": True,
+                "max_participants": 2,
+                "exp": expires_at
+            }
+        })
+        response.raise_for_status()
+        return response.json()
+    
+    async def create_token(self, room_name: str, expires_at: int) -> str:
+        response = await self._client.post("/meeting-tokens", json={
+            "properties": {
+                "room_name": room_name,
+                "is_owner": True,
+                "exp": expires_at
+            }
+        })
+        response.raise_for_status()
+        return response.json().get("token", "")
+    
+    async def create_room_with_token(self, ttl_seconds: int = ROOM_TTL_SECONDS) -> Dict:
+        """Create a room and its bot token concurrently (the room name is chosen up front)"""
+        name = f"interview-{uuid.uuid4().hex[:12]}"
+        expires_at = int(time.time()) + ttl_seconds
+        room, token = await asyncio.gather(
+            self.create_room(name, expires_at),
+            self.create_token(name, expires_at)
+        )
+        return {
+            "url": room["url"],
+            "name": room["name"],
+            "token": token,
+            "expires_at": expires_at
+        }
+    
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class RoomPool:
+    """Background-filled FIFO of ready rooms with expiry"""
+    
+    def __init__(
+        self,
+        client: DailyClient,
+        size: int = ROOM_POOL_SIZE,
+        ttl_seconds: int = ROOM_TTL_SECONDS,
+        min_remaining_seconds: int = ROOM_MIN_REMAINING_SECONDS
+    ):
+        self.client = client
+        self.size = size
+        self.ttl_seconds = ttl_seconds
+        self.min_remaining_seconds = min_remaining_seconds
+        self._rooms: deque = deque()
+        self._wake = asyncio.Event()
+        self._fill_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+    
+    def start(self):
+        self._fill_task = asyncio.get_running_loop().create_task(self._fill_loop())
+    
+    async def stop(self):
+        if self._fill_task:
+            self._fill_task.cancel()
+        await self.client.aclose()
+    
+    async def acquire(self) -> Dict:
+        """Take a ready room, creating one inline only if the pool is empty"""
+        self._wake.set()
+        
+        # Rooms were created in order, so stale ones are always at the front
+        while self._rooms:
+            room = self._rooms.popleft()
+            if self._usable(room):
+                self.hits += 1
+                return room
+            self.expired += 1
+        
+        self.misses += 1
+        return await self.client.create_room_with_token(self.ttl_seconds)
+    
+    def stats(self) -> Dict:
+        return {
+            "ready": len(self._rooms),
+            "target": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired
+        }
+    
+    def _usable(self, room: Dict) -> bool:
+        return room["expires_at"] - time.time() >= self.min_remaining_seconds
+    
+    async def _fill_loop(self):
+        while True:
+            while self._rooms and not self._usable(self._rooms[0]):
+                self._rooms.popleft()
+                self.expired += 1
+            
+            while len(self._rooms) < self.size:
+                try:
+                    self._rooms.append(await self.client.create_room_with_token(self.ttl_seconds))
+                except Exception as e:
+                    print(f"❌ Error pre-creating Daily room: {e}")
+                    await asyncio.sleep(5.0)
+            
+            # Sleep until a room is taken, waking periodically to drop rooms nearing expiry
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=60.0)
+            except asyncio.TimeoutError:
+                pass
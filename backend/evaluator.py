@@ -3,31 +3,24 @@ Interview answer evaluation using Claude API with Weave observability
 """
 
 import os
+import threading
 from anthropic import Anthropic
 import weave
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from metrics import LLM_CALL_SECONDS, LLM_TOKENS_TOTAL
+from weaknesses import EVALUATION_FAILED
 
 # Initialize Weave (2 lines of code!)
 weave_project = os.getenv("WEAVE_PROJECT", "forge")
 weave.init(weave_project)
 
-class InterviewEvaluator:
-    def __init__(self):
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        print(f"✅ Initialized Claude API")
-        print(f"📊 Weave tracking enabled for project: {weave_project}")
-    
-    @weave.op()
-    def evaluate_answer(self, question: str, answer: str, topic: str) -> Tuple[float, List[str]]:
-        """Evaluate an interview answer using Claude"""
-        
-        prompt = f"""You are an expert interview coach evaluating a candidate's answer.
-
-Question: {question}
-Topic: {topic}
-Candidate's Answer: {answer}
+# Static instructions, sent as the system prompt ahead of what changes per call. At under 200
+# tokens they are well under the shortest prefix Claude caches (PROMPT_CACHE_MIN_TOKENS),
+# so today every call pays for them in full; see _system
+EVALUATION_INSTRUCTIONS = """You are an expert interview coach evaluating a candidate's answer.
 
-Evaluate this answer on a scale of 0-10 considering:
+Evaluate the answer on a scale of 0-10 considering:
 1. Completeness and depth
 2. Use of STAR method (Situation, Task, Action, Result) for behavioral questions
 3. Technical accuracy for technical questions
@@ -44,14 +37,115 @@ WEAK_POINTS:
 
 Be constructive and specific."""
 
+QUESTION_INSTRUCTIONS = """You are an expert interview coach creating personalized interview questions.
+
+Make every question realistic and commonly asked in real interviews.
+
+Provide ONLY the question, no additional commentary."""
+
+# Longest answer sent for evaluation; longer transcripts keep their start and their end
+ANSWER_TOKEN_BUDGET = int(os.getenv("ANSWER_TOKEN_BUDGET", 1500))
+
+# Rough characters per token of English, to budget without a token-counting round trip
+CHARS_PER_TOKEN = 4
+
+# Claude 3 Haiku caches no prompt prefix shorter than this
+PROMPT_CACHE_MIN_TOKENS = 2048
+
+
+def trim_to_budget(text: str, budget_tokens: int = ANSWER_TOKEN_BUDGET) -> str:
+    """Cut the middle out of text longer than about budget_tokens, saying how much was dropped"""
+    limit = budget_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    # The setup and the result of an answer matter most, the middle least
+    head = text[:limit * 2 // 3].rsplit(" ", 1)[0]
+    tail = text[-(limit // 3):].split(" ", 1)[-1]
+    omitted = len(text[len(head):len(text) - len(tail)].split())
+    return f"{head} [... {omitted} words omitted ...] {tail}"
+
+
+def _system(instructions: str) -> List[Dict]:
+    """
+    The system prompt, marked for the prompt cache only if it is long enough to be cached
+    Shorter prefixes are silently processed in full, so marking them would only suggest savings that never happen
+    """
+    block = {"type": "text", "text": instructions}
+    if len(instructions) / CHARS_PER_TOKEN >= PROMPT_CACHE_MIN_TOKENS:
+        block["cache_control"] = {"type": "ephemeral"}
+    return [block]
+
+
+def _record_usage(call: str, usage, into: Optional[Dict[str, Dict[str, int]]] = None):
+    """
+    Count a call's tokens in the metrics, and per call in into if given
+    Input tokens exclude a cached prefix, which is counted as cache_read or cache_write
+    """
+    tokens = {
+        "input": usage.input_tokens,
+        "output": usage.output_tokens,
+        "cache_read": usage.cache_read_input_tokens or 0,
+        "cache_write": usage.cache_creation_input_tokens or 0
+    }
+    for kind, count in tokens.items():
+        LLM_TOKENS_TOTAL.inc(count, call=call, kind=kind)
+    if into is not None:
+        totals = into.setdefault(call, {})
+        for kind, count in tokens.items():
+            totals[kind] = totals.get(kind, 0) + count
+
+class InterviewEvaluator:
+    def __init__(self):
+        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        print(f"✅ Initialized Claude API")
+        print(f"📊 Weave tracking enabled for project: {weave_project}")
+    
+    def _complete(self, call: str, instructions: str, prompt: str, max_tokens: int, cancel_event: Optional[threading.Event] = None, usage: Optional[Dict] = None) -> Optional[str]:
+        """
+        One Claude call, returns the response text; its tokens are added to usage if given
+        With a cancel_event the response is streamed, and None is returned as soon as the event is set
+        """
+        request = dict(
+            model="claude-3-haiku-20240307",
+            max_tokens=max_tokens,
+            system=_system(instructions),
+            messages=[{"role": "user", "content": prompt}]
+        )
+        if cancel_event is None:
+            with LLM_CALL_SECONDS.time(call=call):
+                response = self.client.messages.create(**request)
+            _record_usage(call, response.usage, usage)
+            return response.content[0].text
+        
+        if cancel_event.is_set():
+            return None
+        
+        parts = []
+        with LLM_CALL_SECONDS.time(call=call), self.client.messages.stream(**request) as stream:
+            for text in stream.text_stream:
+                if cancel_event.is_set():
+                    # Leaving the block closes the connection, so no more tokens are generated
+                    _record_usage(call, stream.current_message_snapshot.usage, usage)
+                    return None
+                parts.append(text)
+            _record_usage(call, stream.get_final_message().usage, usage)
+        return "".join(parts)
+    
+    @weave.op()
+    def evaluate_answer(self, question: str, answer: str, topic: str, cancel_event: Optional[threading.Event] = None, usage: Optional[Dict] = None) -> Optional[Tuple[float, List[str]]]:
+        """
+        Evaluate an interview answer using Claude, adding the tokens spent to usage if given
+        With a cancel_event the response is streamed, and None is returned as soon as the event is set
+        """
+        
+        prompt = f"""Question: {question}
+Topic: {topic}
+Candidate's Answer: {trim_to_budget(answer)}"""
+
         try:
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=1000,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            content = response.content[0].text
+            content = self._complete("evaluation", EVALUATION_INSTRUCTIONS, prompt, 1000, cancel_event, usage)
+            if content is None:
+                return None
             
             # Extract score
             score = 5.0
@@ -78,34 +172,29 @@ Be constructive and specific."""
             
         except Exception as e:
             print(f"❌ Error evaluating answer: {e}")
-            return 5.0, ["Unable to evaluate - API error"]
+            return 5.0, [EVALUATION_FAILED]
     
     @weave.op()
-    def generate_next_question(self, topic: str, difficulty: str, knowledge_map: Dict[str, float]) -> str:
-        """Generate next interview question based on weak areas"""
+    def generate_next_question(self, topic: str, difficulty: str, knowledge_map: Dict[str, float], weaknesses: Optional[List[str]] = None, cancel_event: Optional[threading.Event] = None, usage: Optional[Dict] = None) -> Optional[str]:
+        """
+        Generate next interview question based on weak areas and the candidate's recurring weaknesses
+        The tokens spent are added to usage if given. With a cancel_event the response is streamed, and None is returned as soon as the event is set
+        """
         
         weak_topics = sorted(knowledge_map.items(), key=lambda x: x[1])[:2]
         weak_topics_str = ", ".join([t for t, _ in weak_topics])
+        # A few cluster labels (see weaknesses.py) instead of the full answer history
+        weaknesses_str = "".join(f"\n- Recurring weakness in their answers: {w}" for w in weaknesses or [])
         
-        prompt = f"""You are an expert interview coach creating personalized interview questions.
-
-Generate a {difficulty} difficulty {topic} interview question.
+        prompt = f"""Generate a {difficulty} difficulty {topic} interview question.
 
 Context:
-- The candidate is weakest in: {weak_topics_str}
-- Focus the question on helping them improve these areas
-- Make it realistic and commonly asked in real interviews
-
-Provide ONLY the question, no additional commentary."""
+- The candidate is weakest in: {weak_topics_str}{weaknesses_str}
+- Focus the question on helping them improve these areas"""
 
         try:
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=500,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            return response.content[0].text.strip()
+            question = self._complete("question_generation", QUESTION_INSTRUCTIONS, prompt, 500, cancel_event, usage)
+            return question.strip() if question is not None else None
             
         except Exception as e:
             print(f"❌ Error generating question: {e}")
@@ -0,0 +1,73 @@
+"""
+Local stand-in for the Daily REST API, for tests and load runs
+Run with: python fake_daily.py  then set DAILY_API_URL=http://localhost:8765/v1
+"""
+
+import os
+import time
+import uuid
+import asyncio
+from fastapi import FastAPI, Header, HTTPException
+import uvicorn
+
+# Artificial per-request latency, to mimic the real API
+FAKE_DAILY_LATENCY_MS = float(os.getenv("FAKE_DAILY_LATENCY_MS", 0))
+
+app = FastAPI(title="Fake Daily API")
+
+rooms = {}
+tokens = {}
+
+
+def _check_auth(authorization: str):
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing bearer token")
+
+
+async def _simulate_latency():
+    if FAKE_DAILY_LATENCY_MS:
+        await asyncio.sleep(FAKE_DAILY_LATENCY_MS / 1000.0)
+
+
+@app.post("/v1/rooms")
+async def create_room(body: dict, authorization: str = Header(None)):
+    _check_auth(authorization)
+    await _simulate_latency()
+    
+    name = body.get("name") or uuid.uuid4().hex[:12]
+    if name in rooms:
+        raise HTTPException(status_code=400, detail=f"Room {name} already exists")
+    
+    room = {
+        "id": str(uuid.uuid4()),
+        "name": name,
+        "url": f"https://fake.daily.co/{name}",
+        "privacy": body.get("privacy", "public"),
+        "created_at": time.time(),
+        "config": body.get("properties", {})
+    }
+    rooms[name] = room
+    return room
+
+
+@app.get("/v1/rooms/{name}")
+async def get_room(name: str, authorization: str = Header(None)):
+    _check_auth(authorization)
+    if name not in rooms:
+        raise HTTPException(status_code=404, detail="Room not found")
+    return rooms[name]
+
+
+@app.post("/v1/meeting-tokens")
+async def create_meeting_token(body: dict, authorization: str = Header(None)):
+    _check_auth(authorization)
+    await _simulate_latency()
+    
+    properties = body.get("properties", {})
+    token = f"fake-token-{uuid.uuid4().hex}"
+    tokens[token] = properties
+    return {"token": token}
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("FAKE_DAILY_PORT", 8765)))
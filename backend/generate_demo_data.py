@@ -1,110 +1,225 @@
 """
-Generate synthetic demo data to show the self-improving aspect
-This creates 5 sessions with improving scores over time
+Generate synthetic data to show the self-improving aspect
+With no arguments this creates 5 sessions with improving scores for demo_user.
+With --users it fills Redis with seeded synthetic users at benchmark scale: sessions are
+built in memory, written with pipelined bulk writes, and sharded across processes
+
+Run from backend/: python generate_demo_data.py
+                   python generate_demo_data.py --users 200000 --sessions-per-user 10 --workers 8
 """
 
 import os
-import sys
+import math
+import time
+import random
+import argparse
+import multiprocessing
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from keys import connect, new_session_id
 from storage import SessionStorage
-from question_bank import get_question, get_all_topics
+from question_bank import get_question_bank, get_all_topics
+
+# Users per pipelined round trip, and per unit of work handed to a worker process
+PIPELINE_USERS = 100
+CHUNK_USERS = 2000
+
+TRAJECTORIES = ["improving", "plateau", "declining", "mixed"]
+# Share of each trajectory among a user's topics with --trajectory mixed
+MIXED_WEIGHTS = {"improving": 0.6, "plateau": 0.25, "declining": 0.15}
+
+DEMO_TOPICS = ["leadership", "algorithms", "system_design", "conflict_resolution"]
+
+# Define progression: scores improve over sessions
+# IMPORTANT: Each session should practice ALL topics to show clear progression
+DEMO_SESSIONS = [
+    {
+        "leadership": [4.0, 4.5, 5.0],  # Weak
+        "algorithms": [3.0, 3.5, 4.0],   # Very weak - focus area
+        "system_design": [5.0, 5.5, 6.0], # OK
+        "conflict_resolution": [4.5, 5.0, 5.5], # Weak
+    },
+    {
+        "leadership": [5.5, 6.0, 6.0],   # Improving
+        "algorithms": [5.0, 5.5, 6.0],   # Improving (focused practice)
+        "system_design": [6.0, 6.5, 7.0], # Improving
+        "conflict_resolution": [6.0, 6.5, 6.5], # Improving
+    },
+    {
+        "leadership": [6.5, 7.0, 7.0],   # Getting better
+        "algorithms": [6.5, 7.0, 7.5],   # Getting much better
+        "system_design": [7.0, 7.5, 7.5], # Good
+        "conflict_resolution": [7.0, 7.0, 7.5], # Good
+    },
+    {
+        "leadership": [7.5, 8.0, 8.0],   # Strong
+        "algorithms": [7.5, 8.0, 8.5],   # Much better - rapid improvement
+        "system_design": [8.0, 8.0, 8.5], # Strong
+        "conflict_resolution": [7.5, 8.0, 8.5], # Strong
+    },
+    {
+        "leadership": [8.0, 8.5, 9.0],   # Very strong
+        "algorithms": [8.5, 9.0, 9.0],   # Expert now! Biggest improvement
+        "system_design": [8.5, 8.5, 9.0], # Expert
+        "conflict_resolution": [8.5, 9.0, 9.0], # Expert
+    }
+]
+
+
+def weak_points_for(score: float) -> List[str]:
+    """Generate weak points based on score"""
+    if score < 5:
+        return ["Missing specific metrics", "Vague impact statement", "No STAR format"]
+    elif score < 7:
+        return ["Could provide more specific numbers", "Result could be stronger"]
+    return ["Minor: Could add one more concrete example"]
+
+
+def build_session(rng: random.Random, user_id: str, session_id: str, started_at: datetime, topic_scores: Dict[str, List[float]]) -> Dict:
+    """A finished session in SessionStorage's layout, one answered question per score"""
+    questions = []
+    current_scores = {}
+    timestamp = started_at
+    for topic, scores in topic_scores.items():
+        for score in scores:
+            timestamp += timedelta(seconds=rng.randint(60, 240))
+            questions.append({
+                "question": get_question_bank().random_question(topic, "medium", rng),
+                "answer": f"In my previous role at TechCorp, I {topic} by implementing a solution that resulted in measurable impact...",
+                "score": score,
+                "topic": topic,
+                "weak_points": weak_points_for(score),
+                "timestamp": timestamp.isoformat()
+            })
+            current_scores.setdefault(topic, []).append(score)
+    
+    return {
+        "id": session_id,
+        "user_id": user_id,
+        "started_at": started_at.isoformat(),
+        "ended_at": (timestamp + timedelta(seconds=30)).isoformat(),
+        "questions": questions,
+        "current_scores": current_scores
+    }
+
+
+def topic_curve(rng: random.Random, trajectory: str) -> Tuple[float, float, float]:
+    """Starting score, score approached over time, and learning rate per session"""
+    if trajectory == "mixed":
+        trajectory = rng.choices(list(MIXED_WEIGHTS), weights=list(MIXED_WEIGHTS.values()))[0]
+    
+    start = rng.uniform(2.0, 6.0)
+    if trajectory == "improving":
+        target = rng.uniform(start + 1.0, 9.5)
+    elif trajectory == "declining":
+        target = max(0.5, start - rng.uniform(1.0, 3.0))
+    else:
+        target = start
+    return start, target, rng.uniform(0.15, 0.8)
+
+
+def synthetic_user(user_index: int, args) -> Tuple[str, List[Dict]]:
+    """One user's sessions, oldest first; depends only on --seed and the user's index"""
+    rng = random.Random(f"{args.seed}:{user_index}")
+    user_id = f"{args.user_prefix}_{user_index}"
+    topics = args.topics
+    curves = {topic: topic_curve(rng, args.trajectory) for topic in topics}
+    
+    sessions = []
+    started_at = datetime.fromisoformat(args.start_date) + timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+    for s in range(args.sessions_per_user):
+        topic_scores = {}
+        for topic in topics:
+            start, target, rate = curves[topic]
+            level = target + (start - target) * math.exp(-rate * s)
+            # Half-point steps, like the evaluator's scores
+            topic_scores[topic] = [
+                min(10.0, max(0.0, round((level + rng.gauss(0, args.noise)) * 2) / 2))
+                for _ in range(args.questions_per_topic)
+            ]
+        sessions.append(build_session(rng, user_id, new_session_id(user_id, f"sess_{s}"), started_at, topic_scores))
+        started_at += timedelta(days=rng.randint(1, 7), minutes=rng.randint(0, 600))
+    return user_id, sessions
+
+
+_worker_storage: Optional[SessionStorage] = None
+
+
+def _init_worker(redis_url: str):
+    # One connection per process, made after fork
+    global _worker_storage
+    _worker_storage = SessionStorage(redis_client=connect(redis_url))
+
+
+def write_users(job: Tuple[int, int, argparse.Namespace]) -> int:
+    """Generate and write users [first, last) with one pipelined round trip per PIPELINE_USERS; returns sessions written"""
+    first, last, args = job
+    written = 0
+    pipe = _worker_storage.redis.pipeline(transaction=False)
+    for i, user_index in enumerate(range(first, last), 1):
+        user_id, sessions = synthetic_user(user_index, args)
+        _worker_storage.queue_user_history(pipe, user_id, sessions)
+        written += len(sessions)
+        if i % PIPELINE_USERS == 0:
+            pipe.execute()
+    pipe.execute()
+    return written
+
+
+def generate_synthetic_data(args):
+    """Fill Redis with --users synthetic users across --workers processes"""
+    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+    jobs = [(first, min(first + CHUNK_USERS, args.users), args) for first in range(0, args.users, CHUNK_USERS)]
+    
+    print(f"🎯 Generating {args.users} users x {args.sessions_per_user} sessions ({args.trajectory}, seed {args.seed})")
+    print(f"   Redis: {redis_url}, {args.workers} workers")
+    
+    start = time.perf_counter()
+    sessions = 0
+    users = 0
+    with multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(redis_url,)) as pool:
+        for (first, last, _), written in zip(jobs, pool.imap(write_users, jobs)):
+            users += last - first
+            sessions += written
+            elapsed = time.perf_counter() - start
+            print(f"⏳ {users}/{args.users} users, {sessions} sessions ({sessions / elapsed:,.0f} sessions/s)")
+    
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Wrote {sessions} sessions for {users} users in {elapsed:.1f}s")
+    print(f"   e.g. GET /knowledge-map?user_id={args.user_prefix}_0")
+
 
 def generate_demo_data():
     """Generate 5 demo sessions showing improvement"""
     
     storage = SessionStorage()
     user_id = "demo_user"
+    rng = random.Random(0)
     
     print("🎯 Generating demo data for showcase...")
     print(f"   User: {user_id}")
     
-    # Define progression: scores improve over sessions
-    # IMPORTANT: Each session should practice ALL topics to show clear progression
-    sessions_data = [
-        {
-            "session_num": 1,
-            "topics": {
-                "leadership": [4.0, 4.5, 5.0],  # Weak
-                "algorithms": [3.0, 3.5, 4.0],   # Very weak - focus area
-                "system_design": [5.0, 5.5, 6.0], # OK
-                "conflict_resolution": [4.5, 5.0, 5.5], # Weak
-            }
-        },
-        {
-            "session_num": 2,
-            "topics": {
-                "leadership": [5.5, 6.0, 6.0],   # Improving
-                "algorithms": [5.0, 5.5, 6.0],   # Improving (focused practice)
-                "system_design": [6.0, 6.5, 7.0], # Improving
-                "conflict_resolution": [6.0, 6.5, 6.5], # Improving
-            }
-        },
-        {
-            "session_num": 3,
-            "topics": {
-                "leadership": [6.5, 7.0, 7.0],   # Getting better
-                "algorithms": [6.5, 7.0, 7.5],   # Getting much better
-                "system_design": [7.0, 7.5, 7.5], # Good
-                "conflict_resolution": [7.0, 7.0, 7.5], # Good
-            }
-        },
-        {
-            "session_num": 4,
-            "topics": {
-                "leadership": [7.5, 8.0, 8.0],   # Strong
-                "algorithms": [7.5, 8.0, 8.5],   # Much better - rapid improvement
-                "system_design": [8.0, 8.0, 8.5], # Strong
-                "conflict_resolution": [7.5, 8.0, 8.5], # Strong
-            }
-        },
-        {
-            "session_num": 5,
-            "topics": {
-                "leadership": [8.0, 8.5, 9.0],   # Very strong
-                "algorithms": [8.5, 9.0, 9.0],   # Expert now! Biggest improvement
-                "system_design": [8.5, 8.5, 9.0], # Expert
-                "conflict_resolution": [8.5, 9.0, 9.0], # Expert
-            }
-        }
-    ]
-    
-    for session_data in sessions_data:
-        # Create session
-        session_id = storage.create_session(user_id)
-        print(f"\n📝 Session {session_data['session_num']} (ID: {session_id})")
+    sessions = []
+    started_at = datetime.now() - timedelta(days=7 * len(DEMO_SESSIONS))
+    for session_num, topic_scores in enumerate(DEMO_SESSIONS, 1):
+        session = build_session(rng, user_id, new_session_id(user_id, f"sess_{session_num}"), started_at, topic_scores)
+        sessions.append(session)
+        started_at += timedelta(days=7)
         
-        # Add questions for each topic
-        for topic, scores in session_data["topics"].items():
-            for idx, score in enumerate(scores):
-                question = get_question(topic, "medium")
-                
-                # Generate synthetic answer
-                answer = f"In my previous role at TechCorp, I {topic} by implementing a solution that resulted in measurable impact..."
-                
-                # Generate weak points based on score
-                if score < 5:
-                    weak_points = ["Missing specific metrics", "Vague impact statement", "No STAR format"]
-                elif score < 7:
-                    weak_points = ["Could provide more specific numbers", "Result could be stronger"]
-                else:
-                    weak_points = ["Minor: Could add one more concrete example"]
-                
-                storage.add_question(
-                    session_id=session_id,
-                    question=question,
-                    answer=answer,
-                    score=score,
-                    topic=topic,
-                    weak_points=weak_points
-                )
-                
+        print(f"\n📝 Session {session_num} (ID: {session['id']})")
+        for topic, scores in topic_scores.items():
+            for score in scores:
                 print(f"  ✓ {topic}: {score}/10")
-        
-        # Mark session as complete
-        storage.end_session(session_id)
+    
+    # Whole history in one round trip
+    pipe = storage.redis.pipeline(transaction=False)
+    storage.queue_user_history(pipe, user_id, sessions)
+    pipe.execute()
     
     print("\n✅ Demo data generated successfully!")
     print("\nResults:")
@@ -123,5 +238,26 @@ def generate_demo_data():
     
     print("\n🎉 Ready for demo! Start the frontend and backend to see the results.")
 
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, help="Synthetic users to generate (omit for the demo_user showcase)")
+    parser.add_argument("--sessions-per-user", type=int, default=10)
+    parser.add_argument("--questions-per-topic", type=int, default=3, help="Answered questions per topic in each session")
+    parser.add_argument("--topics", nargs="+", default=DEMO_TOPICS, choices=get_all_topics())
+    parser.add_argument("--trajectory", choices=TRAJECTORIES, default="mixed", help="How each user's topic scores move over sessions")
+    parser.add_argument("--noise", type=float, default=0.75, help="Std dev of per-answer score noise")
+    parser.add_argument("--start-date", default="2025-01-01", help="Earliest session date (ISO)")
+    parser.add_argument("--user-prefix", default="synthetic_user")
+    parser.add_argument("--seed", type=int, default=42, help="Same seed, same data, whatever the worker count")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    
+    if args.users is None:
+        generate_demo_data()
+    else:
+        generate_synthetic_data(args)
+
+
 if __name__ == "__main__":
-    generate_demo_data()
+    main()
@@ -0,0 +1,116 @@
+"""
+Redis key layout and client
+Every key belonging to a user carries the user id as a hash tag ({user_id}), so on Redis
+Cluster a user's sessions, session list, knowledge map and the rest share one slot and can be
+pipelined, MGET and scripted together. Session ids embed their user, so a session's keys
+follow from its id alone. Keys written before this layout are moved by migrate_keys.py
+"""
+
+import os
+import uuid
+from typing import List, Optional
+
+import redis
+
+# Session ids are "<local id>.<user id>"; local ids never contain the separator
+SESSION_ID_SEPARATOR = "."
+
+
+def connect(url: Optional[str] = None, cluster: Optional[bool] = None, decode_responses: bool = True):
+    """
+    Client for REDIS_URL, a RedisCluster one (REDIS_URL naming any node) when REDIS_CLUSTER is set
+    Pub/sub can stay on a plain connection to one node: PUBLISH on a cluster reaches every node
+    """
+    url = url or os.getenv("REDIS_URL", "redis://localhost:6379")
+    if cluster is None:
+        cluster = os.getenv("REDIS_CLUSTER", "").lower() in ("1", "true", "yes")
+    if cluster:
+        return redis.RedisCluster.from_url(url, decode_responses=decode_responses)
+    return redis.from_url(url, decode_responses=decode_responses)
+
+
+def get_all(redis_client, keys: List[str]) -> List[Optional[str]]:
+    """Like MGET, but the keys may belong to different users (and cluster slots)"""
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.get(key)
+    return pipe.execute()
+
+
+def _tag(user_id: str) -> str:
+    return "{" + user_id + "}"
+
+
+def new_session_id(user_id: str, local_id: Optional[str] = None) -> str:
+    return f"{local_id or 'sess_' + uuid.uuid4().hex[:8]}{SESSION_ID_SEPARATOR}{user_id}"
+
+
+def session_user(session_id: str) -> Optional[str]:
+    """The user a session id belongs to, None for ids from before this layout"""
+    _, separator, user_id = session_id.partition(SESSION_ID_SEPARATOR)
+    return user_id if separator else None
+
+
+def _session_scoped(prefix: str, session_id: str) -> str:
+    user_id = session_user(session_id)
+    if user_id is None:
+        # Unmigrated session: only reachable on a single instance
+        return f"{prefix}:{session_id}"
+    return f"{prefix}:{_tag(user_id)}:{session_id.partition(SESSION_ID_SEPARATOR)[0]}"
+
+
+def session_key(session_id: str) -> str:
+    return _session_scoped("session", session_id)
+
+
+def rehydrated_key(session_id: str) -> str:
+    """Full copy of an archived session, cached after a read (see archive.py)"""
+    return _session_scoped("rehydrated", session_id)
+
+
+def lease_key(session_id: str) -> str:
+    return _session_scoped("lease", session_id)
+
+
+def is_session_key(key: str) -> bool:
+    """session:{user}:id, not per-session keys of the old layout like session:id:lease"""
+    return key.startswith("session:{") or key.count(":") == 1
+
+
+def user_sessions_key(user_id: str) -> str:
+    """List of the user's session ids, newest first"""
+    return f"user:{_tag(user_id)}:sessions"
+
+
+def session_versions_key(user_id: str) -> str:
+    return f"user:{_tag(user_id)}:session_versions"
+
+
+def user_version_key(user_id: str) -> str:
+    return f"user:{_tag(user_id)}:version"
+
+
+def knowledge_key(user_id: str) -> str:
+    return f"knowledge:{_tag(user_id)}"
+
+
+def knowledge_user(key: str) -> str:
+    """The user id in a knowledge_key"""
+    return key[len("knowledge:{"):-1]
+
+
+def weaknesses_key(user_id: str) -> str:
+    return f"weaknesses:{_tag(user_id)}"
+
+
+def served_bitmap_key(user_id: str) -> str:
+    return f"user:{_tag(user_id)}:served"
+
+
+def served_bloom_key(user_id: str) -> str:
+    return f"user:{_tag(user_id)}:served:generated"
+
+
+def migrated_key(user_id: str) -> str:
+    """Set once migrate_keys.py has merged the user's old-layout keys"""
+    return f"user:{_tag(user_id)}:migrated"
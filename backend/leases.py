@@ -0,0 +1,154 @@
+"""
+Cross-node ownership leases for interview bots
+The worker running a session's bot holds a heartbeated lease on it in Redis, so any API
+node can find and signal the owner, and a session whose owner stops renewing is claimed
+and resumed by another node's bot pool
+"""
+
+import os
+import json
+import time
+import socket
+from typing import Dict, List, Optional
+
+from keys import lease_key
+
+# A lease not renewed for this long is up for takeover; owners renew three times per TTL
+LEASE_TTL_SECONDS = float(os.getenv("BOT_LEASE_TTL_SECONDS", 15))
+LEASE_HEARTBEAT_SECONDS = LEASE_TTL_SECONDS / 3
+
+# Takeovers per session before it is given up on (stops a session that crashes its bot from looping)
+MAX_TAKEOVERS = int(os.getenv("BOT_MAX_TAKEOVERS", 3))
+
+# Sorted set of leased sessions scored by expiry (ms), so expired leases are one range query away.
+# Only an index: each lease hash holds its own expiry, so every script touches a single key
+# (one cluster slot) and the index is updated next to it in the same pipeline
+LEASE_EXPIRY_KEY = "leases:expiry"
+
+# Owner "" marks a lease claimed for takeover whose new bot hasn't started yet
+_ACQUIRE = """
+local owner = redis.call('HGET', KEYS[1], 'owner')
+local expiry = tonumber(redis.call('HGET', KEYS[1], 'expires'))
+if owner and owner ~= '' and owner ~= ARGV[1] and expiry and expiry > tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'owner', ARGV[1], 'expires', ARGV[3], 'room_url', ARGV[4], 'room_token', ARGV[5])
+return 1
+"""
+
+_RENEW = """
+if redis.call('HGET', KEYS[1], 'owner') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'expires', ARGV[2])
+return 1
+"""
+
+_RELEASE = """
+if redis.call('HGET', KEYS[1], 'owner') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+# 0: not expired (renewed, or someone else claimed it first), -1: out of takeovers,
+# -2: no lease any more (a stale index entry), else the lease fields
+_CLAIM = """
+local expiry = tonumber(redis.call('HGET', KEYS[1], 'expires'))
+if not expiry then
+    return -2
+end
+if expiry > tonumber(ARGV[1]) then
+    return 0
+end
+if redis.call('HINCRBY', KEYS[1], 'takeovers', 1) > tonumber(ARGV[3]) then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+redis.call('HSET', KEYS[1], 'owner', '', 'expires', ARGV[2])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
+def owner_channel(owner: str) -> str:
+    """Pub/sub channel an owner listens on for commands about its sessions"""
+    return f"bot-owner:{owner}:commands"
+
+
+def process_owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class SessionLeases:
+    """Acquire, renew, release, claim and signal session leases"""
+    
+    def __init__(self, redis_client, owner: Optional[str] = None, ttl: float = LEASE_TTL_SECONDS):
+        self.redis = redis_client
+        self.owner = owner or process_owner_id()
+        self.ttl_ms = int(ttl * 1000)
+    
+    def acquire(self, session_id: str, room_url: str, room_token: str) -> bool:
+        """Take ownership unless another live owner holds the lease"""
+        now = _now_ms()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.eval(_ACQUIRE, 1, lease_key(session_id), self.owner, now, now + self.ttl_ms, room_url, room_token)
+        # Indexed even if the acquire fails: a later score only delays a takeover until the owner's next renewal
+        pipe.zadd(LEASE_EXPIRY_KEY, {session_id: now + self.ttl_ms})
+        acquired, _ = pipe.execute()
+        return bool(acquired)
+    
+    def renew(self, session_ids: List[str]) -> List[str]:
+        """Heartbeat every lease in one pipelined round trip, returns the ones no longer ours"""
+        if not session_ids:
+            return []
+        expires = _now_ms() + self.ttl_ms
+        pipe = self.redis.pipeline(transaction=False)
+        for session_id in session_ids:
+            pipe.eval(_RENEW, 1, lease_key(session_id), self.owner, expires)
+        pipe.zadd(LEASE_EXPIRY_KEY, {session_id: expires for session_id in session_ids})
+        *renewed, _ = pipe.execute()
+        return [session_id for session_id, ok in zip(session_ids, renewed) if not ok]
+    
+    def release(self, session_id: str) -> bool:
+        released = self.redis.eval(_RELEASE, 1, lease_key(session_id), self.owner)
+        if released:
+            self.redis.zrem(LEASE_EXPIRY_KEY, session_id)
+        return bool(released)
+    
+    def owner_of(self, session_id: str) -> Optional[str]:
+        return self.redis.hget(lease_key(session_id), "owner") or None
+    
+    def signal(self, session_id: str, command: str) -> bool:
+        """Send a command to whichever worker owns the session, False if nobody does"""
+        owner = self.owner_of(session_id)
+        if owner is None:
+            return False
+        self.redis.publish(owner_channel(owner), json.dumps({"command": command, "session_id": session_id}))
+        return True
+    
+    def expired(self, limit: int) -> List[str]:
+        """Sessions whose owner stopped renewing, oldest expiry first"""
+        if limit <= 0:
+            return []
+        return self.redis.zrangebyscore(LEASE_EXPIRY_KEY, "-inf", _now_ms(), start=0, num=limit)
+    
+    def claim(self, session_id: str, max_takeovers: int = MAX_TAKEOVERS) -> Optional[Dict]:
+        """
+        Reserve an expired lease for a takeover, returns its room details or None
+        The claim itself lasts one TTL, time enough for the new bot to acquire the lease
+        """
+        now = _now_ms()
+        result = self.redis.eval(_CLAIM, 1, lease_key(session_id), now, now + self.ttl_ms, max_takeovers)
+        if result == -1:
+            print(f"⚠️ Session {session_id} abandoned after {max_takeovers} bot takeovers")
+        if result in (-1, -2):
+            self.redis.zrem(LEASE_EXPIRY_KEY, session_id)
+        elif isinstance(result, list):
+            self.redis.zadd(LEASE_EXPIRY_KEY, {session_id: now + self.ttl_ms})
+            return dict(zip(result[::2], result[1::2]))
+        return None
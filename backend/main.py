@@ -4,20 +4,32 @@ Handles API endpoints for frontend communication
 """
 
 import os
-from fastapi import FastAPI, HTTPException
+import json
+import time
+import asyncio
+import itertools
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import uvicorn
-
-from storage import SessionStorage
-from bot import create_daily_room
-from evaluator import InterviewEvaluator
-import threading
+from typing import List, Optional
 
 # Load environment variables FIRST (force override to ignore stale shell vars)
+# Modules below read their settings at import time
 load_dotenv(override=True)
 
+from storage import SessionStorage, EXPORT_BATCH
+from daily_rooms import DailyClient, RoomPool, demo_room
+from evaluator import InterviewEvaluator
+from bot_pool import BotSupervisor
+from metrics import REGISTRY, HTTP_REQUEST_SECONDS
+from session_events import SessionEventHub
+from analytics import CohortAnalytics
+from archive import SessionArchiver, ARCHIVE_AFTER_SECONDS, run_archiver
+import threading
+
 # Check if voice is configured AFTER loading env
 VOICE_ENABLED = bool(os.getenv("DEEPGRAM_API_KEY")) and bool(os.getenv("DAILY_API_KEY"))
 
@@ -33,10 +45,81 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so per-user query strings don't explode cardinality
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=route.path if route else "unmatched",
+            status=status
+        )
+
+# Pool gauges, refreshed on every scrape
+BOT_POOL_GAUGE = REGISTRY.gauge("forge_bot_pool", "Bot pool capacity and occupancy", ["state"])
+BOT_WORKER_GAUGE = REGISTRY.gauge("forge_bot_worker", "Per-worker resource gauges", ["worker", "resource"])
+
+# Most users one /knowledge-maps request may ask for
+KNOWLEDGE_MAP_BATCH_MAX = int(os.getenv("KNOWLEDGE_MAP_BATCH_MAX", 500))
+
 # Initialize storage and evaluator
 storage = SessionStorage()
 evaluator = InterviewEvaluator()
 
+# Columnar score arrays, loaded on the first /analytics/cohort request
+cohort_analytics = CohortAnalytics(storage.redis)
+
+# Voice bots run in worker processes, started with the app
+bot_supervisor = BotSupervisor()
+
+# Daily rooms are pre-created in the background when a Daily API key is set
+room_pool = None
+
+# Fans bot-published session events out to SSE clients
+session_events = None
+
+@app.on_event("startup")
+async def start_bot_pool():
+    if VOICE_ENABLED:
+        bot_supervisor.start()
+
+@app.on_event("startup")
+async def start_room_pool():
+    global room_pool
+    daily_api_key = os.getenv("DAILY_API_KEY")
+    if daily_api_key:
+        room_pool = RoomPool(DailyClient(daily_api_key))
+        room_pool.start()
+
+@app.on_event("startup")
+async def start_session_events():
+    global session_events
+    session_events = SessionEventHub()
+    session_events.start()
+
+@app.on_event("startup")
+async def start_archiver():
+    # Every process runs the loop; a Redis lock lets one of them archive at a time
+    if ARCHIVE_AFTER_SECONDS > 0:
+        asyncio.get_running_loop().create_task(run_archiver(SessionArchiver(storage.redis, storage.archive)))
+
+@app.on_event("shutdown")
+async def stop_pools():
+    if VOICE_ENABLED:
+        await bot_supervisor.stop()
+    if room_pool:
+        await room_pool.stop()
+    if session_events:
+        await session_events.stop()
+
 # Request/Response models
 class StartSessionRequest(BaseModel):
     user_id: str
@@ -45,10 +128,16 @@ class StartSessionResponse(BaseModel):
     session_id: str
     daily_room_url: str
     daily_token: str = ""
+    bot_status: str = "disabled"
+    queue_position: int = 0
+    estimated_wait_seconds: float = 0.0
 
 class EndSessionRequest(BaseModel):
     session_id: str
 
+class KnowledgeMapsRequest(BaseModel):
+    user_ids: List[str]
+
 class SessionStatusResponse(BaseModel):
     current_question: str
     transcript: str
@@ -70,37 +159,38 @@ async def start_session(request: StartSessionRequest):
         # Create session in storage
         session_id = storage.create_session(request.user_id)
         
-        # Create Daily room
-        room_info = create_daily_room(session_id)
+        # Take a pre-created Daily room
+        if room_pool:
+            try:
+                room_info = await room_pool.acquire()
+            except Exception as e:
+                # Pool empty and Daily unreachable: keep the session usable, as before the pool
+                print(f"❌ Error creating Daily room, using demo URL: {e}")
+                room_info = demo_room(session_id)
+        else:
+            print("⚠️  No Daily API key - using demo URL")
+            room_info = demo_room(session_id)
         
-        # Start bot in the room if voice is enabled
+        # Hand the bot to the worker pool if voice is enabled
+        admission = {}
         if VOICE_ENABLED:
-            from pipecat_bot import run_interview_bot
-            import asyncio
-            
-            # Schedule bot to run in background using asyncio
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            # Create background task
-            loop.create_task(run_interview_bot(
+            admission = bot_supervisor.submit(
                 room_info["url"],
                 room_info.get("token", ""),  # Pass the token
-                session_id, 
-                storage, 
-                evaluator
-            ))
-            print(f"✅ Voice bot started for session {session_id}")
+                session_id
+            )
+            if admission["status"] == "queued":
+                print(f"⏳ Bot pool full - session {session_id} queued at position {admission['queue_position']} (~{admission['estimated_wait_seconds']}s)")
         else:
             print(f"⚠️  Voice disabled - missing API keys (need DEEPGRAM_API_KEY and DAILY_API_KEY)")
         
         return StartSessionResponse(
             session_id=session_id,
             daily_room_url=room_info["url"],
-            daily_token=room_info.get("token", "")
+            daily_token=room_info.get("token", ""),
+            bot_status=admission.get("status", "disabled"),
+            queue_position=admission.get("queue_position", 0),
+            estimated_wait_seconds=admission.get("estimated_wait_seconds", 0.0)
         )
     except Exception as e:
         import traceback
@@ -117,8 +207,12 @@ async def end_session(request: EndSessionRequest):
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        # Mark session as ended
+        # Mark session as ended and reclaim its bot
         storage.end_session(request.session_id)
+        storage.publish_event(request.session_id, "ended", {})
+        if VOICE_ENABLED and not bot_supervisor.end_session(request.session_id):
+            # The bot may be running on another node; its owner is found through the lease
+            bot_supervisor.leases.signal(request.session_id, "end")
         
         # Calculate final scores and improvement
         final_scores = storage.calculate_session_scores(request.session_id)
@@ -141,37 +235,196 @@ async def get_session_status(session_id: str):
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        # Get current state
-        questions = session.get("questions", [])
-        current_question = questions[-1]["question"] if questions else ""
-        transcript = questions[-1].get("answer", "") if questions else ""
-        
-        return SessionStatusResponse(
-            current_question=current_question,
-            transcript=transcript,
-            questions_asked=len(questions),
-            current_scores=session.get("current_scores", {})
-        )
+        return _session_status(session)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/session-events")
+async def get_session_events(session_id: str):
+    """Server-Sent Events stream of a session's questions, live transcript and scores"""
+    session = storage.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return StreamingResponse(
+        session_events.stream(session_id, _session_status(session).model_dump()),
+        media_type="text/event-stream",
+        # Stop reverse proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _session_status(session: dict) -> SessionStatusResponse:
+    questions = session.get("questions", [])
+    current_question = questions[-1]["question"] if questions else ""
+    transcript = questions[-1].get("answer", "") if questions else ""
+    
+    return SessionStatusResponse(
+        current_question=current_question,
+        transcript=transcript,
+        questions_asked=len(questions),
+        current_scores=session.get("current_scores", {})
+    )
+
 @app.get("/sessions")
-async def get_sessions(user_id: str):
-    """Get all sessions for a user"""
+async def get_sessions(user_id: str, request: Request):
+    """Get all sessions for a user (conditional on the user's data version)"""
     try:
-        sessions = storage.get_user_sessions(user_id)
-        return {"sessions": sessions}
+        return _conditional_response(request, user_id, "sessions", lambda: {"sessions": storage.get_user_sessions(user_id)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _conditional_response(request: Request, user_id: str, kind: str, build):
+    """
+    Serve a per-user read with a strong ETag from the user's write version
+    A matching If-None-Match gets a 304 after a single Redis read, without loading any session
+    """
+    # Read the version before the data, so the tag can only ever understate how fresh the body is
+    etag = f'"{kind}-{storage.get_user_version(user_id)}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers=headers)
+    
+    return JSONResponse(build(), headers=headers)
+
+@app.get("/bots")
+async def get_bot_pool_stats():
+    """Bot pool capacity, queue depth and per-worker CPU, memory and active-bot gauges"""
+    stats = bot_supervisor.stats()
+    stats["room_pool"] = room_pool.stats() if room_pool else None
+    stats["session_events"] = session_events.stats() if session_events else None
+    return stats
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics: HTTP latencies, per-stage turn latencies from every bot worker, pool gauges"""
+    if VOICE_ENABLED:
+        stats = bot_supervisor.stats()
+        for state in ("capacity", "active_bots", "queued_bots"):
+            BOT_POOL_GAUGE.set(stats[state], state=state)
+        BOT_WORKER_GAUGE.clear()
+        for worker in stats["workers"]:
+            for resource in ("active_bots", "cpu_percent", "memory_rss_bytes", "live_timers", "leaked_bots"):
+                if resource in worker:
+                    BOT_WORKER_GAUGE.set(worker[resource], worker=worker["worker_id"], resource=resource)
+    
+    return PlainTextResponse(
+        REGISTRY.render(bot_supervisor.metric_snapshots()),
+        media_type="text/plain; version=0.0.4"
+    )
+
 @app.get("/knowledge-map")
-async def get_knowledge_map(user_id: str):
-    """Get knowledge map and history for a user"""
+async def get_knowledge_map(user_id: str, request: Request, since: Optional[int] = None):
+    """
+    Get knowledge map and history for a user (conditional on the user's data version)
+    With since=<watermark> only history entries and topics changed after it are returned
+    """
+    try:
+        if since is not None:
+            return _conditional_response(request, user_id, f"knowledge-map-since-{since}", lambda: storage.get_knowledge_map_since(user_id, since))
+        return _conditional_response(request, user_id, "knowledge-map", lambda: storage.get_knowledge_map(user_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/knowledge-maps")
+async def get_knowledge_maps(request: KnowledgeMapsRequest):
+    """
+    Knowledge maps for a cohort of users, streamed as one JSON object per line
+    Reads are pipelined per group of users, so the first lines arrive before the whole cohort is loaded
+    """
+    user_ids = list(dict.fromkeys(request.user_ids))
+    if len(user_ids) > KNOWLEDGE_MAP_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {KNOWLEDGE_MAP_BATCH_MAX} user ids per request")
+    
+    # A sync generator is iterated in the threadpool, keeping Redis I/O off the event loop
+    lines = (json.dumps(knowledge_map) + "\n" for knowledge_map in storage.get_knowledge_maps(user_ids))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+@app.get("/export")
+async def export_history(user_id: str):
+    """
+    A user's full interview history as newline-delimited JSON, one session per line, oldest first
+    Sessions are read a batch at a time as the response is written, so memory stays bounded.
+    A session that can't be read fails the export (a 503, or a cut-off response once streaming)
+    """
+    sessions = storage.export_user_sessions(user_id)
+    try:
+        first = await asyncio.to_thread(next, sessions, None)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"History could not be read: {e}")
+    lines = (json.dumps(session) + "\n" for session in itertools.chain([first] if first else [], sessions))
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="forge-{user_id}.ndjson"'}
+    )
+
+@app.post("/import")
+async def import_history(request: Request, user_id: Optional[str] = None):
+    """
+    Bulk-load NDJSON from /export (e.g. another deployment's), streamed from the request body
+    Sessions go to their own user_id unless ?user_id= remaps them; ids that already exist are skipped
+    """
+    totals = {"received": 0, "imported": 0, "users": set()}
+    batch = []
+    
+    async def flush():
+        if batch:
+            target = batch[0]["user_id"]
+            totals["imported"] += await asyncio.to_thread(storage.import_sessions, target, list(batch))
+            totals["users"].add(target)
+            batch.clear()
+    
+    line_number = 0
+    async for line in _body_lines(request):
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            session = json.loads(line)
+            session["user_id"] = user_id or session["user_id"]
+            session["questions"], session["id"]
+            if "archived" in session:
+                # Written by exports that fell back to summaries when the archive was unreadable
+                raise ValueError("an archived summary without its questions")
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Line {line_number} is not an exported session ({e}); {totals['imported']} sessions imported before it")
+        
+        # One user per storage batch
+        if batch and (batch[0]["user_id"] != session["user_id"] or len(batch) >= EXPORT_BATCH):
+            await flush()
+        batch.append(session)
+        totals["received"] += 1
+    
+    await flush()
+    return {
+        "received": totals["received"],
+        "imported": totals["imported"],
+        "skipped": totals["received"] - totals["imported"],
+        "users": len(totals["users"])
+    }
+
+async def _body_lines(request: Request):
+    """Lines of a request body as it streams in, without buffering the whole body"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+@app.get("/analytics/cohort")
+async def get_cohort_analytics():
+    """Score percentiles, improvement distributions and topic correlations across all users"""
     try:
-        knowledge_map = storage.get_knowledge_map(user_id)
-        return knowledge_map
+        # Loading and recomputing are CPU/Redis-bound, so they run off the event loop
+        return await asyncio.to_thread(cohort_analytics.cohort)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
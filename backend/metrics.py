@@ -0,0 +1,208 @@
+"""
+Minimal in-process metrics with Prometheus text exposition
+Counters, gauges and histograms keyed by label values. Registries can be
+snapshotted and merged so bot worker processes report into the API's /metrics
+"""
+
+import os
+import time
+import bisect
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, spanning sub-millisecond Redis calls to multi-second LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Turns slower than this (end of candidate speech to bot audio) count as SLO violations
+TURN_LATENCY_SLO_SECONDS = float(os.getenv("TURN_LATENCY_SLO_SECONDS", 3.0))
+
+
+def _label_str(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple, object] = {}
+    
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+    
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+    
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+    
+    def render(self, values: Dict) -> List[str]:
+        return [f"{self.name}{_label_str(self.labelnames, key)} {_format(v)}" for key, v in sorted(values.items())]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+    
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = float(value)
+    
+    def clear(self):
+        self.values.clear()
+    
+    render = Counter.render
+
+
+class Histogram(Metric):
+    kind = "histogram"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+    
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self.values.get(key)
+        if state is None:
+            # Per-bucket (non-cumulative) counts, sum, count
+            state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+    
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def render(self, values: Dict) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format(bound)
+                labels = _label_str(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {_format(total)}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+    
+    def _register(self, metric: Metric) -> Metric:
+        self.metrics.setdefault(metric.name, metric)
+        return self.metrics[metric.name]
+    
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+    
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+    
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+    
+    def snapshot(self) -> Dict:
+        """Picklable copy of counter and histogram values (gauges are process-local)"""
+        snap = {}
+        for name, metric in self.metrics.items():
+            if isinstance(metric, Counter):
+                snap[name] = dict(metric.values)
+            elif isinstance(metric, Histogram):
+                snap[name] = {key: [list(counts), total, count] for key, (counts, total, count) in metric.values.items()}
+        return snap
+    
+    def combine(self, snapshots: Sequence[Dict]) -> Dict:
+        """One snapshot summing several, e.g. to keep the counts of a process that has exited"""
+        combined = {}
+        for name, metric in self.metrics.items():
+            if not isinstance(metric, Gauge):
+                combined[name] = _merge(metric, [snap.get(name, {}) for snap in snapshots])
+        return combined
+    
+    def render(self, snapshots: Sequence[Dict] = ()) -> str:
+        """Prometheus text format, summing this process's values with other processes' snapshots"""
+        lines = []
+        for name, metric in self.metrics.items():
+            values = _merge(metric, [metric.values] + [snap.get(name, {}) for snap in snapshots])
+            lines.extend(metric.header())
+            lines.extend(metric.render(values))
+        return "\n".join(lines) + "\n"
+
+
+def _merge(metric: Metric, sources: List[Dict]) -> Dict:
+    if isinstance(metric, Gauge):
+        return dict(sources[0])
+    
+    merged = {}
+    for values in sources:
+        for key, value in values.items():
+            if isinstance(metric, Histogram):
+                counts, total, count = merged.get(key, ([0] * (len(metric.buckets) + 1), 0.0, 0))
+                merged[key] = ([a + b for a, b in zip(counts, value[0])], total + value[1], count + value[2])
+            else:
+                merged[key] = merged.get(key, 0.0) + value
+    return merged
+
+
+REGISTRY = MetricsRegistry()
+
+# Voice turn stages: stt_final, silence_wait, evaluation, storage_write,
+# knowledge_map_read, question_lookup, question_generation, tts_first_audio
+TURN_STAGE_SECONDS = REGISTRY.histogram(
+    "forge_turn_stage_seconds", "Time spent in each stage of a voice turn", ["stage"]
+)
+TURN_SECONDS = REGISTRY.histogram(
+    "forge_turn_seconds", "End of candidate speech to first bot audio"
+)
+TURNS_TOTAL = REGISTRY.counter(
+    "forge_turns_total", "Completed voice turns"
+)
+TURN_SLO_VIOLATIONS = REGISTRY.counter(
+    "forge_turn_slo_violations_total", f"Turns slower than the {TURN_LATENCY_SLO_SECONDS}s latency SLO"
+)
+BARGE_INS_TOTAL = REGISTRY.counter(
+    "forge_barge_ins_total", "Times the candidate started talking while the bot had the floor"
+)
+# Kinds: evaluation, question_generation, tts
+CANCELLED_WORK_TOTAL = REGISTRY.counter(
+    "forge_cancelled_work_total", "In-flight bot work dropped because the candidate interrupted", ["kind"]
+)
+# Calls: evaluation, question_generation. Kinds: input (uncached), output, cache_read, cache_write
+LLM_TOKENS_TOTAL = REGISTRY.counter(
+    "forge_llm_tokens_total", "Claude tokens by call and kind", ["call", "kind"]
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "forge_llm_call_seconds", "Claude request latency, to the end of the response", ["call"]
+)
+BOT_TAKEOVERS_TOTAL = REGISTRY.counter(
+    "forge_bot_takeovers_total", "Sessions restarted on this node after their owner's lease lapsed"
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "forge_http_request_seconds", "HTTP request latency by route", ["method", "route", "status"]
+)
@@ -0,0 +1,194 @@
+"""
+Move Redis data from the old key layout to the per-user hash-tagged one (see keys.py)
+Sessions are re-keyed under ids that embed their user, and each user's other keys are merged
+with whatever the user already wrote under the new layout. Shared keys are copied as they are
+when the target is another instance. Stop the bots first: leases and rehydrated-session caches
+are not moved. Safe to run again
+
+Run from backend/: python migrate_keys.py --dry-run
+                   python migrate_keys.py --target redis://cluster-node:6379 --target-cluster --delete-old
+"""
+
+import os
+import json
+import argparse
+from typing import Callable, List, Set, Tuple
+
+from keys import (
+    SESSION_ID_SEPARATOR,
+    connect,
+    new_session_id,
+    session_key,
+    user_sessions_key,
+    session_versions_key,
+    user_version_key,
+    knowledge_key,
+    weaknesses_key,
+    served_bitmap_key,
+    served_bloom_key,
+    migrated_key
+)
+from archive import ENDED_SESSIONS_KEY
+from storage import GENERATED_QUESTIONS_KEY, KNOWLEDGE_LOG_KEY
+from served_questions import QUESTION_OFFSETS_KEY, QUESTION_OFFSETS_NEXT_KEY
+
+# Keys shared by all users, copied unchanged to another instance (its Redis must be at least as new)
+SHARED_KEYS = [ENDED_SESSIONS_KEY, KNOWLEDGE_LOG_KEY, GENERATED_QUESTIONS_KEY, QUESTION_OFFSETS_KEY, QUESTION_OFFSETS_NEXT_KEY]
+
+SCAN_BATCH = 5000
+
+
+def legacy_users(source) -> Set[str]:
+    """Users with keys in the old layout, found by their session list or knowledge map"""
+    users = set()
+    for key in source.scan_iter(match="user:*:sessions", count=SCAN_BATCH):
+        key = key.decode()
+        if not key.startswith("user:{"):
+            users.add(key[len("user:"):-len(":sessions")])
+    for key in source.scan_iter(match="knowledge:*", count=SCAN_BATCH):
+        key = key.decode()
+        if not key.startswith("knowledge:{"):
+            users.add(key[len("knowledge:"):])
+    return users
+
+
+def _merge_knowledge(old: bytes, new: bytes) -> str:
+    """Scores from before the migration go first, as they are older"""
+    merged = json.loads(old)
+    for topic, scores in json.loads(new).items():
+        merged[topic] = merged.get(topic, []) + scores
+    return json.dumps(merged)
+
+
+def _or_bits(old: bytes, new: bytes) -> bytes:
+    size = max(len(old), len(new))
+    return (int.from_bytes(old.ljust(size, b"\0"), "big") | int.from_bytes(new.ljust(size, b"\0"), "big")).to_bytes(size, "big")
+
+
+def _moved_keys(user_id: str) -> List[Tuple[str, str, Callable]]:
+    """
+    (old key, new key, merge) for the user's keys whose values carry over
+    merge(old, new) combines the old value with one the user already has in the new layout
+    """
+    return [
+        (f"knowledge:{user_id}", knowledge_key(user_id), _merge_knowledge),
+        # The live summary is the more recent one
+        (f"weaknesses:{user_id}", weaknesses_key(user_id), lambda old, new: new),
+        # Versions only go up: clients hold ETags and since= watermarks up to either
+        (f"user:{user_id}:version", user_version_key(user_id), lambda old, new: max(int(old), int(new))),
+        (f"user:{user_id}:served", served_bitmap_key(user_id), _or_bits),
+        (f"user:{user_id}:served:generated", served_bloom_key(user_id), _or_bits)
+    ]
+
+
+def _new_id(session_id: str, user_id: str) -> str:
+    return new_session_id(user_id, session_id.partition(SESSION_ID_SEPARATOR)[0])
+
+
+def copy_shared(source, target):
+    for key in SHARED_KEYS:
+        dumped = source.dump(key)
+        if dumped is not None:
+            target.restore(key, max(source.pttl(key), 0), dumped, replace=True)
+
+
+def migrate_user(source, target, user_id: str, delete_old: bool = False) -> int:
+    """
+    Write one user's keys in the new layout, merged with anything already written there; returns the sessions moved
+    One round trip to the source and two to the target. Sessions that exist in the new layout are
+    left as they are, and the other keys are merged only once (see migrated_key)
+    """
+    session_ids = [session_id.decode() for session_id in source.lrange(f"user:{user_id}:sessions", 0, -1)]
+    moved = _moved_keys(user_id)
+    
+    pipe = source.pipeline(transaction=False)
+    for session_id in session_ids:
+        pipe.get(f"session:{session_id}")
+        pipe.zscore(ENDED_SESSIONS_KEY, session_id)
+    pipe.hgetall(f"user:{user_id}:session_versions")
+    for old_key, _, _ in moved:
+        pipe.get(old_key)
+    results = pipe.execute()
+    per_session, versions, old_values = results[:2 * len(session_ids)], results[2 * len(session_ids)], results[2 * len(session_ids) + 1:]
+    
+    pipe = target.pipeline(transaction=False)
+    pipe.exists(migrated_key(user_id))
+    for _, new_key, _ in moved:
+        pipe.get(new_key)
+    migrated, *new_values = pipe.execute()
+    
+    pipe = target.pipeline(transaction=False)
+    ended = {}
+    for session_id, blob, score in zip(session_ids, per_session[::2], per_session[1::2]):
+        new_id = _new_id(session_id, user_id)
+        if blob is not None:
+            # Archived sessions keep their old id in the archive; the summary's id is what counts
+            pipe.set(session_key(new_id), json.dumps({**json.loads(blob), "id": new_id}), nx=True)
+        if score is not None:
+            ended[new_id] = score
+            pipe.zrem(ENDED_SESSIONS_KEY, session_id)
+    if ended:
+        pipe.zadd(ENDED_SESSIONS_KEY, ended, nx=True)
+    
+    # Merged in behind any sessions started under the new layout; LREM first so running again doesn't duplicate them
+    new_ids = [_new_id(session_id, user_id) for session_id in session_ids]
+    for new_id in new_ids:
+        pipe.lrem(user_sessions_key(user_id), 0, new_id)
+    if new_ids:
+        pipe.rpush(user_sessions_key(user_id), *new_ids)
+    for session_id, version in versions.items():
+        pipe.hsetnx(session_versions_key(user_id), _new_id(session_id.decode(), user_id), version)
+    
+    if not migrated:
+        for (_, new_key, merge), old, new in zip(moved, old_values, new_values):
+            if old is not None:
+                pipe.set(new_key, old if new is None else merge(old, new))
+        pipe.set(migrated_key(user_id), 1)
+    pipe.execute()
+    
+    if delete_old:
+        old_keys = [f"user:{user_id}:sessions", f"user:{user_id}:session_versions", *(old_key for old_key, _, _ in moved)]
+        for session_id in session_ids:
+            old_keys += [f"session:{session_id}", f"session:{session_id}:lease", f"session:{session_id}:rehydrated"]
+        source.delete(*old_keys)
+    return len(session_ids)
+
+
+def main():
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=os.getenv("REDIS_URL", "redis://localhost:6379"), help="Instance holding the old layout")
+    parser.add_argument("--target", help="Where to write the new layout (default: the source)")
+    parser.add_argument("--target-cluster", action="store_true", help="The target is a Redis Cluster")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be migrated")
+    parser.add_argument("--delete-old", action="store_true", help="Delete each user's old keys once copied")
+    args = parser.parse_args()
+    
+    # Raw bytes: DUMP payloads aren't UTF-8
+    source = connect(args.source, cluster=False, decode_responses=False)
+    if args.target is None and not args.target_cluster:
+        target = source
+    else:
+        target = connect(args.target or args.source, cluster=args.target_cluster, decode_responses=False)
+    
+    users = sorted(legacy_users(source))
+    print(f"⏳ {len(users)} users in the old layout on {args.source}")
+    if args.dry_run:
+        sessions = sum(source.llen(f"user:{user_id}:sessions") for user_id in users)
+        print(f"✅ Would migrate {len(users)} users and {sessions} sessions")
+        return
+    
+    if target is not source:
+        copy_shared(source, target)
+    sessions = 0
+    for done, user_id in enumerate(users, 1):
+        sessions += migrate_user(source, target, user_id, args.delete_old)
+        if done % 1000 == 0:
+            print(f"⏳ {done}/{len(users)} users")
+    print(f"✅ Migrated {len(users)} users and {sessions} sessions")
+
+
+if __name__ == "__main__":
+    main()
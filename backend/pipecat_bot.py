@@ -4,7 +4,11 @@ This is the REAL working version
 """
 
 import os
+import time
+import random
 import asyncio
+import itertools
+import threading
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineTask
@@ -13,11 +17,18 @@ from pipecat.frames.frames import (
     Frame,
     AudioRawFrame,
     TextFrame,
+    TranscriptionFrame,
+    InterimTranscriptionFrame,
     EndFrame,
     LLMMessagesFrame,
     TTSSpeakFrame,
+    TTSStartedFrame,
+    TTSAudioRawFrame,
+    TTSStoppedFrame,
     UserStartedSpeakingFrame,
-    UserStoppedSpeakingFrame
+    UserStoppedSpeakingFrame,
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame
 )
 from pipecat.services.deepgram.stt import DeepgramSTTService, LiveOptions
 from pipecat.services.deepgram.tts import DeepgramTTSService
@@ -25,21 +36,93 @@ from pipecat.transports.daily.transport import DailyParams, DailyTransport
 
 from loguru import logger
 
+from tts_cache import TTSCache, TTS_VOICE, TTS_SAMPLE_RATE
+from question_index import MATCH_CANDIDATES, get_question_index, question_id
+from transcript import TranscriptAssembler
+from metrics import (
+    TURN_STAGE_SECONDS,
+    TURN_SECONDS,
+    TURNS_TOTAL,
+    TURN_SLO_VIOLATIONS,
+    TURN_LATENCY_SLO_SECONDS,
+    BARGE_INS_TOTAL,
+    CANCELLED_WORK_TOTAL
+)
+
 
 # Demo limit - set to 3 for quick demos, increase for longer sessions
 MAX_QUESTIONS = 3
 
+# Silence after the last transcribed speech that ends the candidate's answer
+ANSWER_SILENCE_SECONDS = 2.0
+
+# Recurring weaknesses (see weaknesses.py) a question lookup or generated question targets
+TARGET_WEAKNESSES = 3
+
+# Longest the bot holds its reply while the candidate is still talking
+FLOOR_HOLD_SECONDS = 5.0
+
+# Fixed phrases, spoken as separate segments so they can be served from the TTS cache
+INTRO_TEXT = "Hello! I'm your AI interview coach. I'm going to ask you some interview questions to help you improve. Let's start with:"
+NEXT_QUESTION_TEXT = "Next question:"
+RESUME_TEXT = "Sorry, we lost the connection for a moment. Let's pick up where we left off:"
+FEEDBACK_STRONG = "Thank you. That was a strong answer."
+FEEDBACK_GOOD = "Thank you. Good answer, but there's room for improvement."
+FEEDBACK_WEAK = "Thank you. Let's work on strengthening that."
+SUMMARY_INTRO_TEXT = f"That concludes our {MAX_QUESTIONS}-question practice session! Here's your performance summary:"
+ADVICE_STRONG = "Great job overall! Keep practicing to stay sharp."
+ADVICE_GOOD = "Good effort! Focus on your weaker areas for improvement."
+ADVICE_WEAK = "There's room for growth. Consider practicing more with specific examples."
+GOODBYE_TEXT = "Check your dashboard to see your progress over time. Goodbye!"
+
+STATIC_UTTERANCES = [
+    INTRO_TEXT,
+    NEXT_QUESTION_TEXT,
+    RESUME_TEXT,
+    FEEDBACK_STRONG,
+    FEEDBACK_GOOD,
+    FEEDBACK_WEAK,
+    SUMMARY_INTRO_TEXT,
+    ADVICE_STRONG,
+    ADVICE_GOOD,
+    ADVICE_WEAK,
+    GOODBYE_TEXT,
+]
+
+# Cached audio is pushed in 1 second chunks (16-bit mono)
+CACHED_AUDIO_CHUNK_BYTES = TTS_SAMPLE_RATE * 2
+
+_tts_cache = None
+
+
+def _feedback_for(score: float) -> str:
+    if score >= 8:
+        return FEEDBACK_STRONG
+    elif score >= 6:
+        return FEEDBACK_GOOD
+    return FEEDBACK_WEAK
+
+
+def get_tts_cache() -> TTSCache:
+    """Process-wide TTS cache shared by every bot"""
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = TTSCache(voice=TTS_VOICE, sample_rate=TTS_SAMPLE_RATE)
+    return _tts_cache
+
 
 class InterviewBotProcessor(FrameProcessor):
     """
     Pipecat processor that handles interview logic
     """
     
-    def __init__(self, session_id: str, storage, evaluator, **kwargs):
+    def __init__(self, session_id: str, storage, evaluator, tts_cache: TTSCache = None, registry=None, **kwargs):
         super().__init__(**kwargs)
         self.session_id = session_id
         self.storage = storage
         self.evaluator = evaluator
+        self.tts_cache = tts_cache
+        self.registry = registry
         
         # Get session data
         self.session_data = storage.get_session(session_id)
@@ -50,11 +133,39 @@ class InterviewBotProcessor(FrameProcessor):
         self.last_question = None
         self.questions_asked = 0
         self.waiting_for_answer = False
-        self.current_answer = ""
+        self.transcript = TranscriptAssembler(ANSWER_SILENCE_SECONDS, self._on_end_of_turn)
         self.last_text_time = 0
-        self._answer_timer = None
+        self._turn_task = None
         self.session_ended = False
         
+        # Barge-in state: the answer being processed, whether it has been stored yet,
+        # and the signals that abort this turn's streaming evaluation and question generation
+        self._pending_answer = ""
+        self._answer_committed = False
+        self._evaluation_cancel = threading.Event()
+        self._generation_cancel = threading.Event()
+        self._bot_speaking = False
+        self._output_epoch = 0
+        self._user_quiet = asyncio.Event()
+        self._user_quiet.set()
+        
+        # Live transcript updates are coalesced into at most one in-flight publish
+        self._transcript_dirty = False
+        self._transcript_publisher = None
+        
+        # LLM tokens per call spent on the current question (generating it, evaluating the answers
+        # to it), stored with the answer in the session
+        self._question_usage = {}
+        
+        # Fire-and-forget writes; the event loop only keeps weak references to tasks
+        self._background_tasks = set()
+        
+        # Turn timing (perf_counter timestamps)
+        self._speech_ended_at = None
+        self._awaiting_stt_final = False
+        self._turn_started_at = None
+        self._speak_started_at = None
+        
         logger.info(f"Interview bot initialized for session {session_id} (max {MAX_QUESTIONS} questions)")
     
     async def process_frame(self, frame: Frame, direction: FrameDirection):
@@ -62,113 +173,285 @@ class InterviewBotProcessor(FrameProcessor):
         
         await super().process_frame(frame, direction)
         
+        if self.registry and isinstance(frame, (TextFrame, UserStartedSpeakingFrame)):
+            self.registry.touch(self.session_id)
+        
         # Handle text from speech-to-text
         if isinstance(frame, TextFrame):
-            await self._handle_user_text(frame.text)
+            if isinstance(frame, TranscriptionFrame) and self._awaiting_stt_final:
+                TURN_STAGE_SECONDS.observe(time.perf_counter() - self._speech_ended_at, stage="stt_final")
+                self._awaiting_stt_final = False
+            self._handle_user_text(frame)
         
-        # Detect when user starts speaking
+        # Detect when user starts speaking - hold off ending the turn while they talk
         elif isinstance(frame, UserStartedSpeakingFrame):
-            self.current_answer = ""
+            if self.transcript.text:
+                self.transcript.touch()
+            self._speech_ended_at = None
+            self._awaiting_stt_final = False
+            self._user_quiet.clear()
             logger.info("User started speaking")
+            if self._bot_speaking or (self._turn_task and not self._turn_task.done()):
+                await self._handle_barge_in()
+        
+        # First audio of our reply reached the transport, closing the turn
+        elif isinstance(frame, BotStartedSpeakingFrame):
+            self._record_turn_latency()
+        
+        elif isinstance(frame, BotStoppedSpeakingFrame):
+            self._bot_speaking = False
         
         # Detect when user stops speaking
         elif isinstance(frame, UserStoppedSpeakingFrame):
             logger.info("User stopped speaking")
-            # Answer is complete, process it
-            if self.current_answer:
-                await self._process_answer(self.current_answer)
+            self._user_quiet.set()
+            self._speech_ended_at = time.perf_counter()
+            self._awaiting_stt_final = True
+            # The answer is processed once the silence window passes (see _on_end_of_turn),
+            # so pauses between sentences don't cut a multi-utterance answer short
         
         # Pass frame down the pipeline
         await self.push_frame(frame, direction)
     
-    async def _handle_user_text(self, text: str):
+    @property
+    def current_answer(self) -> str:
+        return self.transcript.text
+    
+    def _handle_user_text(self, frame: TextFrame):
         """Handle transcribed text from user"""
-        logger.info(f"Received text: {text}")
+        if not self.waiting_for_answer:
+            return
         
-        # Check if it's new text
-        is_new_text = (text != self.current_answer)
+        self.last_text_time = asyncio.get_event_loop().time()
         
-        if is_new_text:
-            self.current_answer = text  # Use latest complete transcript
-            self.last_text_time = asyncio.get_event_loop().time()
-            
-            # Cancel existing timer if any
-            if hasattr(self, '_answer_timer') and self._answer_timer:
-                self._answer_timer.cancel()
-            
-            # Set timer to process answer after 2 seconds of silence
-            self._answer_timer = asyncio.create_task(self._silence_timer())
+        # Interim results only replace the tail; finals are appended to the answer
+        if isinstance(frame, InterimTranscriptionFrame):
+            self.transcript.add_interim(frame.text)
+        else:
+            logger.info(f"Received text: {frame.text}")
+            self.transcript.add_final(frame.text)
+        self._publish_transcript()
+    
+    def _on_end_of_turn(self):
+        """Called by the transcript assembler once the silence window has passed"""
+        if not self.waiting_for_answer or not self.transcript.text:
+            return
+        
+        logger.info("Silence detected, processing answer...")
+        TURN_STAGE_SECONDS.observe(asyncio.get_event_loop().time() - self.last_text_time, stage="silence_wait")
+        
+        # Stop collecting until the next question has been asked
+        self.waiting_for_answer = False
+        self._pending_answer = self.transcript.take()
+        self._answer_committed = False
+        self._evaluation_cancel = threading.Event()
+        self._generation_cancel = threading.Event()
+        self._turn_task = asyncio.create_task(self._process_answer(self._pending_answer))
+        if self.registry:
+            self.registry.track_timer(self.session_id, self._turn_task)
+    
+    async def _handle_barge_in(self):
+        """The candidate talked over the bot: stop its output and drop work nobody will hear"""
+        logger.info("Candidate interrupted the bot")
+        BARGE_INS_TOTAL.inc()
+        self._turn_started_at = None
+        self._speak_started_at = None
+        
+        turn = self._turn_task
+        if turn and not turn.done():
+            if not self._answer_committed:
+                # They hadn't finished answering - drop the evaluation and keep listening.
+                # Cancelling the task alone would leave its thread waiting on the full response
+                self._evaluation_cancel.set()
+                turn.cancel()
+                CANCELLED_WORK_TOTAL.inc(kind="evaluation")
+                self.transcript.restore(self._pending_answer)
+                self.waiting_for_answer = True
+                self._publish_transcript()
+            else:
+                # The answer is stored; stop the LLM and fall back to a bank question
+                self._generation_cancel.set()
+        
+        if self._bot_speaking:
+            self._bot_speaking = False
+            self._output_epoch += 1
+            CANCELLED_WORK_TOTAL.inc(kind="tts")
+            # Has the pipeline task interrupt every processor, flushing the TTS service's
+            # in-flight request and the transport's queued audio
+            await self.push_interruption_task_frame_and_wait()
     
-    async def _silence_timer(self):
-        """Wait for silence, then process answer"""
+    async def _wait_for_quiet(self):
+        """Hold a reply while the candidate is talking, up to FLOOR_HOLD_SECONDS"""
         try:
-            await asyncio.sleep(2.0)  # Wait 2 seconds
-            
-            # Check if we're still waiting for answer and have text
-            if self.waiting_for_answer and self.current_answer.strip():
-                logger.info("Silence detected, processing answer...")
-                await self._process_answer(self.current_answer.strip())
-                # Note: current_answer and waiting_for_answer are reset in _process_answer
-        except asyncio.CancelledError:
-            pass  # Timer was cancelled by new text
+            await asyncio.wait_for(self._user_quiet.wait(), FLOOR_HOLD_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+    
+    def _in_background(self, coro):
+        """Run coro without awaiting it, holding its task until it finishes so it isn't collected midway"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    def _publish(self, event: str, data: dict):
+        """Fire-and-forget push to the session's live subscribers (see session_events.py)"""
+        self._in_background(self._send_event(event, data))
+    
+    async def _send_event(self, event: str, data: dict):
+        try:
+            await asyncio.to_thread(self.storage.publish_event, self.session_id, event, data)
+        except Exception as e:
+            logger.warning(f"Failed to publish {event} event: {e}")
+    
+    def _publish_transcript(self):
+        """Interim results arrive several times a second; only the latest text needs to reach the page"""
+        self._transcript_dirty = True
+        if self._transcript_publisher is None or self._transcript_publisher.done():
+            self._transcript_publisher = asyncio.create_task(self._flush_transcript())
+    
+    async def _flush_transcript(self):
+        while self._transcript_dirty:
+            self._transcript_dirty = False
+            await self._send_event("transcript", {"text": self.transcript.text})
+    
+    async def cleanup(self):
+        await super().cleanup()
+        self.transcript.cancel()
     
     async def _ask_first_question(self):
         """Ask the first interview question"""
-        from question_bank import get_question, get_all_topics
+        from question_bank import get_all_topics
         
         topics = get_all_topics()
         self.current_topic = topics[0]  # Start with first topic
         
-        question = get_question(self.current_topic, "easy")
+        question = await self._unseen_bank_question(self.current_topic, "easy")
+        self._in_background(self._mark_served(question))
         self.last_question = question
         self.questions_asked = 1
         self.waiting_for_answer = True
         
         # Send to TTS
-        intro = f"Hello! I'm your AI interview coach. I'm going to ask you some interview questions to help you improve. Let's start with: {question}"
-        await self.push_frame(TTSSpeakFrame(intro))
+        self._publish("question", {"question": question, "topic": self.current_topic, "questions_asked": self.questions_asked})
+        await self._speak(INTRO_TEXT, question)
         
         logger.info(f"Asked first question: {question}")
     
+    async def _resume_interview(self):
+        """Pick up an interview another worker was running, from the answers already stored"""
+        session = await asyncio.to_thread(self.storage.get_session, self.session_id)
+        answered = session["questions"]
+        self.questions_asked = len(answered) + 1
+        
+        if self.questions_asked > MAX_QUESTIONS:
+            # Lost right after the last answer was stored
+            await self._end_session_with_summary(_feedback_for(answered[-1]["score"]), answered[-1]["score"])
+            return
+        
+        knowledge_map = await asyncio.to_thread(self.storage.get_knowledge_map, self.user_id)
+        question = await self._next_question(knowledge_map.get("topics", {}), [q["topic"] for q in answered])
+        self.last_question = question
+        self.waiting_for_answer = True
+        
+        self._publish("question", {"question": question, "topic": self.current_topic, "questions_asked": self.questions_asked})
+        await self._speak(RESUME_TEXT, question)
+        
+        logger.info(f"Resumed session {self.session_id} after {len(answered)} answers: {question}")
+    
     async def _process_answer(self, answer_text: str):
-        """Process user's answer and ask next question"""
+        """
+        Process user's answer and ask next question
+        Evaluator and storage calls block, so they run in the default executor to keep audio flowing
+        """
         
         if not self.last_question:
             return
         
         logger.info(f"Processing answer for topic: {self.current_topic}")
+        self._turn_started_at = self._speech_ended_at or time.perf_counter()
         
         # Evaluate the answer
-        score, weak_points = self.evaluator.evaluate_answer(
-            question=self.last_question,
-            answer=answer_text,
-            topic=self.current_topic
-        )
+        with TURN_STAGE_SECONDS.time(stage="evaluation"):
+            evaluation = await asyncio.to_thread(
+                self.evaluator.evaluate_answer,
+                question=self.last_question,
+                answer=answer_text,
+                topic=self.current_topic,
+                cancel_event=self._evaluation_cancel,
+                usage=self._question_usage
+            )
+        if evaluation is None:
+            return
+        score, weak_points = evaluation
         
         logger.info(f"Score: {score}/10, Weak points: {weak_points}")
         
-        # Store the result
-        self.storage.add_question(
-            session_id=self.session_id,
-            question=self.last_question,
-            answer=answer_text,
-            score=score,
-            topic=self.current_topic,
-            weak_points=weak_points
-        )
+        # Store the result - from here on an interruption no longer cancels the turn
+        self._answer_committed = True
+        with TURN_STAGE_SECONDS.time(stage="storage_write"):
+            await asyncio.to_thread(
+                self.storage.add_question,
+                session_id=self.session_id,
+                question=self.last_question,
+                answer=answer_text,
+                score=score,
+                topic=self.current_topic,
+                weak_points=weak_points,
+                usage=self._question_usage
+            )
+        logger.info(f"LLM tokens for this question: {self._question_usage}")
+        self._question_usage = {}
         
         self.questions_asked += 1
         
-        # Get updated knowledge map
-        knowledge_map = self.storage.get_knowledge_map(self.user_id)
-        topics_data = knowledge_map.get("topics", {})
+        # Get updated knowledge map and this session's topics
+        with TURN_STAGE_SECONDS.time(stage="knowledge_map_read"):
+            knowledge_map = await asyncio.to_thread(self.storage.get_knowledge_map, self.user_id)
+            topics_data = knowledge_map.get("topics", {})
+            session = await asyncio.to_thread(self.storage.get_session, self.session_id)
+        
+        self._publish("score", {
+            "question": self.last_question,
+            "answer": answer_text,
+            "score": score,
+            "topic": self.current_topic,
+            "weak_points": weak_points,
+            "current_scores": session.get("current_scores", {})
+        })
         
-        # Select next topic
-        session = self.storage.get_session(self.session_id)
         previous_topics = [q["topic"] for q in session["questions"]]
+        next_question = await self._next_question(topics_data, previous_topics)
         
+        self.last_question = next_question
+        
+        # Build feedback response
+        feedback = _feedback_for(score)
+        
+        # Check if we've hit the question limit
+        if self.questions_asked > MAX_QUESTIONS:
+            # End session with summary
+            await self._end_session_with_summary(feedback, score)
+            return
+        
+        await self._wait_for_quiet()
+        
+        # Reset for next answer before speaking, so talking over the question counts as answering it
+        self.transcript.reset()
+        self.waiting_for_answer = True  # CRITICAL FIX: re-enable answer detection
+        
+        # Send to TTS
+        self._publish("question", {"question": next_question, "topic": self.current_topic, "questions_asked": self.questions_asked})
+        self._publish_transcript()
+        await self._speak(feedback, NEXT_QUESTION_TEXT, next_question)
+        
+        logger.info(f"Asked next question: {next_question}")
+    
+    async def _next_question(self, topics_data: dict, previous_topics: list) -> str:
+        """Pick the next topic and difficulty from the knowledge map and generate a question for it"""
+        # Select next topic
         if topics_data:
-            self.current_topic = self.evaluator.select_next_topic(
+            self.current_topic = await asyncio.to_thread(
+                self.evaluator.select_next_topic,
                 topics_data,
                 previous_topics
             )
@@ -186,39 +469,71 @@ class InterviewBotProcessor(FrameProcessor):
         else:
             difficulty = "hard"
         
-        # Generate next question
-        next_question = self.evaluator.generate_next_question(
-            self.current_topic,
-            difficulty,
-            topics_data
-        )
-        
-        self.last_question = next_question
-        
-        # Build feedback response
-        if score >= 8:
-            feedback = "That was a strong answer. "
-        elif score >= 6:
-            feedback = "Good answer, but there's room for improvement. "
+        # A bank (or previously generated) question aimed at the user's recurring weaknesses,
+        # if one they haven't been asked before fits
+        with TURN_STAGE_SECONDS.time(stage="question_lookup"):
+            weaknesses = await asyncio.to_thread(self.storage.get_weaknesses, self.user_id, TARGET_WEAKNESSES)
+            matches = dict(get_question_index().matches(self.current_topic, difficulty, weaknesses))
+            unseen = await asyncio.to_thread(self.storage.served.unseen, self.user_id, list(matches))
+        if unseen:
+            next_question = matches[unseen[0]]
         else:
-            feedback = "Let's work on strengthening that. "
+            next_question = await self._generate_question(topics_data, difficulty, weaknesses)
         
-        # Check if we've hit the question limit
-        if self.questions_asked > MAX_QUESTIONS:
-            # End session with summary
-            await self._end_session_with_summary(feedback, score)
-            return
-        
-        response = f"Thank you. {feedback}Next question: {next_question}"
-        
-        # Send to TTS
-        await self.push_frame(TTSSpeakFrame(response))
+        self._in_background(self._mark_served(next_question))
+        return next_question
+    
+    async def _generate_question(self, topics_data: dict, difficulty: str, weaknesses: list) -> str:
+        with TURN_STAGE_SECONDS.time(stage="question_generation"):
+            next_question = await asyncio.to_thread(
+                self.evaluator.generate_next_question,
+                self.current_topic,
+                difficulty,
+                topics_data,
+                weaknesses=weaknesses,
+                cancel_event=self._generation_cancel,
+                usage=self._question_usage
+            )
         
-        logger.info(f"Asked next question: {next_question}")
+        if next_question is None:
+            CANCELLED_WORK_TOTAL.inc(kind="question_generation")
+            return await self._unseen_bank_question(self.current_topic, difficulty)
         
-        # Reset for next answer
-        self.current_answer = ""
-        self.waiting_for_answer = True  # CRITICAL FIX: re-enable answer detection
+        # Indexed for later lookups here, and stored for other workers' indexes
+        get_question_index().add([(next_question, self.current_topic, difficulty)])
+        self._in_background(self._save_generated(next_question, self.current_topic, difficulty))
+        return next_question
+    
+    async def _unseen_bank_question(self, topic: str, difficulty: str) -> str:
+        """
+        A random bank question the user hasn't been asked yet, or any one once they've had the whole group
+        The group is checked in growing batches, so the usual case is a single small lookup
+        """
+        from question_bank import get_question_bank
+        
+        bank = get_question_bank()
+        questions = bank.shuffled(topic, difficulty)
+        batch = MATCH_CANDIDATES
+        while True:
+            by_id = {question_id(text): text for text in itertools.islice(questions, batch)}
+            if not by_id:
+                return bank.random_question(topic, difficulty)
+            unseen = await asyncio.to_thread(self.storage.served.unseen, self.user_id, list(by_id))
+            if unseen:
+                return by_id[unseen[0]]
+            batch *= 4
+    
+    async def _mark_served(self, question: str):
+        try:
+            await asyncio.to_thread(self.storage.served.mark, self.user_id, [question_id(question)])
+        except Exception as e:
+            logger.warning(f"Failed to record served question: {e}")
+    
+    async def _save_generated(self, text: str, topic: str, difficulty: str):
+        try:
+            await asyncio.to_thread(self.storage.save_generated_question, question_id(text), text, topic, difficulty)
+        except Exception as e:
+            logger.warning(f"Failed to store generated question: {e}")
     
     async def _end_session_with_summary(self, last_feedback: str, last_score: float):
         """End the session with a performance summary"""
@@ -226,39 +541,90 @@ class InterviewBotProcessor(FrameProcessor):
         self.waiting_for_answer = False
         
         # Get final scores
-        knowledge_map = self.storage.get_knowledge_map(self.user_id)
+        knowledge_map = await asyncio.to_thread(self.storage.get_knowledge_map, self.user_id)
         topics_data = knowledge_map.get("topics", {})
         
         # Build summary
-        summary_parts = [f"Thank you. {last_feedback}"]
-        summary_parts.append(f"That concludes our {MAX_QUESTIONS}-question practice session!")
-        summary_parts.append("Here's your performance summary:")
+        summary_parts = [last_feedback, SUMMARY_INTRO_TEXT]
         
         if topics_data:
+            topic_lines = []
             for topic, score in sorted(topics_data.items(), key=lambda x: x[1], reverse=True):
                 percentage = int(score * 100)
-                summary_parts.append(f"{topic.replace('_', ' ').title()}: {percentage}%.")
+                topic_lines.append(f"{topic.replace('_', ' ').title()}: {percentage}%.")
+            summary_parts.append(" ".join(topic_lines))
         
         # Overall advice
         avg_score = sum(topics_data.values()) / len(topics_data) if topics_data else 0.5
         if avg_score >= 0.7:
-            summary_parts.append("Great job overall! Keep practicing to stay sharp.")
+            summary_parts.append(ADVICE_STRONG)
         elif avg_score >= 0.5:
-            summary_parts.append("Good effort! Focus on your weaker areas for improvement.")
+            summary_parts.append(ADVICE_GOOD)
         else:
-            summary_parts.append("There's room for growth. Consider practicing more with specific examples.")
-        
-        summary_parts.append("Check your dashboard to see your progress over time. Goodbye!")
+            summary_parts.append(ADVICE_WEAK)
         
-        summary = " ".join(summary_parts)
+        summary_parts.append(GOODBYE_TEXT)
         
         # Send summary via TTS
-        await self.push_frame(TTSSpeakFrame(summary))
+        await self._wait_for_quiet()
+        await self._speak(*summary_parts)
         
         # End the session in storage
-        self.storage.end_session(self.session_id)
+        await asyncio.to_thread(self.storage.end_session, self.session_id)
+        self._publish("ended", {})
         
         logger.info(f"Session {self.session_id} ended with summary")
+    
+    def _record_turn_latency(self):
+        """Close the open turn when the bot's reply starts playing"""
+        if self._speak_started_at is None:
+            return
+        
+        now = time.perf_counter()
+        TURN_STAGE_SECONDS.observe(now - self._speak_started_at, stage="tts_first_audio")
+        if self._turn_started_at is not None:
+            turn_seconds = now - self._turn_started_at
+            TURN_SECONDS.observe(turn_seconds)
+            TURNS_TOTAL.inc()
+            if turn_seconds > TURN_LATENCY_SLO_SECONDS:
+                TURN_SLO_VIOLATIONS.inc()
+        
+        self._speak_started_at = None
+        self._turn_started_at = None
+    
+    async def _speak(self, *segments: str):
+        """Speak segments in order, serving cached audio and sending the rest to TTS"""
+        self._speak_started_at = time.perf_counter()
+        self._bot_speaking = True
+        epoch = self._output_epoch
+        pending = []
+        for segment in segments:
+            # A barge-in bumps the epoch; whatever hasn't been pushed yet is dropped
+            if epoch != self._output_epoch:
+                return
+            audio = self.tts_cache.get(segment) if self.tts_cache else None
+            if audio is None:
+                pending.append(segment)
+                continue
+            
+            # Flush uncached text first so the utterance order is preserved
+            if pending:
+                await self.push_frame(TTSSpeakFrame(" ".join(pending)))
+                pending = []
+            await self._push_cached_audio(audio, epoch)
+        
+        if pending and epoch == self._output_epoch:
+            await self.push_frame(TTSSpeakFrame(" ".join(pending)))
+    
+    async def _push_cached_audio(self, audio, epoch: int):
+        """Push cached PCM straight towards the output transport, bypassing TTS"""
+        await self.push_frame(TTSStartedFrame())
+        for offset in range(0, len(audio), CACHED_AUDIO_CHUNK_BYTES):
+            if epoch != self._output_epoch:
+                return
+            chunk = audio[offset:offset + CACHED_AUDIO_CHUNK_BYTES]
+            await self.push_frame(TTSAudioRawFrame(chunk, self.tts_cache.sample_rate, 1))
+        await self.push_frame(TTSStoppedFrame())
 
 
 async def run_interview_bot(
@@ -266,10 +632,12 @@ async def run_interview_bot(
     room_token: str,
     session_id: str,
     storage,
-    evaluator
+    evaluator,
+    registry=None
 ):
     """
     Run the interview bot with Pipecat
+    When a SessionRegistry is given, the bot's pipeline, transport and timers are tracked in it
     """
     
     logger.info(f"Starting interview bot for session {session_id}")
@@ -306,14 +674,17 @@ async def run_interview_bot(
     # Deepgram for text-to-speech (using Deepgram TTS is easier than ElevenLabs)
     tts = DeepgramTTSService(
         api_key=os.getenv("DEEPGRAM_API_KEY"),
-        voice="aura-asteria-en"  # Female voice, clear and professional
+        voice=TTS_VOICE,  # Female voice, clear and professional
+        sample_rate=TTS_SAMPLE_RATE  # Must match the rendered audio in the TTS cache
     )
     
     # Our interview bot processor
     bot = InterviewBotProcessor(
         session_id=session_id,
         storage=storage,
-        evaluator=evaluator
+        evaluator=evaluator,
+        tts_cache=get_tts_cache(),
+        registry=registry
     )
     
     # Build pipeline
@@ -331,15 +702,29 @@ async def run_interview_bot(
     # Create runner
     runner = PipelineRunner()
     
+    if registry:
+        registry.register(session_id, asyncio.current_task(), pipeline_task=task, transport=transport)
+        
+        @transport.event_handler("on_participant_left")
+        async def on_participant_left(transport, participant, reason):
+            # Released from a separate task - the handler runs inside the pipeline being cancelled
+            asyncio.create_task(registry.release(session_id, "participant_left"))
+    
     # Start the bot
     logger.info("Starting pipeline...")
     
     # Create a task to ask first question after pipeline is ready
     async def ask_after_ready():
         await asyncio.sleep(2)  # Wait for pipeline to be fully ready
-        await bot._ask_first_question()
+        # A session with stored answers was started by a worker that has since died
+        if bot.session_data["questions"]:
+            await bot._resume_interview()
+        else:
+            await bot._ask_first_question()
     
-    asyncio.create_task(ask_after_ready())
+    greeting = asyncio.create_task(ask_after_ready())
+    if registry:
+        registry.track_timer(session_id, greeting)
     
     try:
         # Run the pipeline
@@ -348,6 +733,8 @@ async def run_interview_bot(
     except Exception as e:
         logger.error(f"Bot error: {e}")
     finally:
+        if registry:
+            registry.unregister(session_id)
         logger.info("Bot session ended")
 
 
@@ -1,106 +1,176 @@
-"""Question bank for different interview topics and difficulty levels"""
-
-QUESTION_BANK = {
-    "leadership": {
-        "easy": [
-            "Tell me about a time you helped a team member who was struggling.",
-            "Describe a situation where you had to motivate your team.",
-            "Have you ever had to give constructive feedback? How did you approach it?"
-        ],
-        "medium": [
-            "Tell me about a time you led a team through a difficult project.",
-            "Describe a situation where you had to influence people without direct authority.",
-            "Tell me about a time when your team disagreed with your decision. How did you handle it?"
-        ],
-        "hard": [
-            "Describe a time you had to make an unpopular decision as a leader.",
-            "Tell me about your biggest leadership failure and what you learned.",
-            "How do you balance being a strong leader with being collaborative?"
-        ]
-    },
-    "algorithms": {
-        "easy": [
-            "Explain how you would reverse a string.",
-            "How would you find if a string is a palindrome?",
-            "Describe how a hash table works."
-        ],
-        "medium": [
-            "How would you detect a cycle in a linked list?",
-            "Explain how you'd implement a LRU cache.",
-            "Walk me through finding the kth largest element in an array."
-        ],
-        "hard": [
-            "Design an algorithm to find the longest palindromic substring.",
-            "How would you implement a trie and what are its use cases?",
-            "Explain dynamic programming and give an example of when you'd use it."
-        ]
-    },
-    "system_design": {
-        "easy": [
-            "How would you design a URL shortener?",
-            "Explain the difference between SQL and NoSQL databases.",
-            "What is load balancing and why is it important?"
-        ],
-        "medium": [
-            "Design a rate limiter for an API.",
-            "How would you design a notification system?",
-            "Design a file storage system like Dropbox."
-        ],
-        "hard": [
-            "Design Twitter's feed system.",
-            "How would you design a distributed cache?",
-            "Design a real-time analytics system for a large e-commerce site."
-        ]
-    },
-    "conflict_resolution": {
-        "easy": [
-            "Tell me about a time you disagreed with a coworker.",
-            "How do you handle criticism?",
-            "Describe a situation where you had to compromise."
-        ],
-        "medium": [
-            "Tell me about a time you had to work with a difficult team member.",
-            "Describe a situation where you had to navigate office politics.",
-            "How do you handle it when your idea is rejected?"
-        ],
-        "hard": [
-            "Tell me about the most difficult conflict you've resolved.",
-            "Describe a time when you had to choose between two team members' ideas.",
-            "How do you handle a situation where upper management makes a decision you disagree with?"
-        ]
-    },
-    "behavioral": {
-        "easy": [
-            "Why are you interested in this role?",
-            "What are your biggest strengths?",
-            "Where do you see yourself in 5 years?"
-        ],
-        "medium": [
-            "Tell me about a time you failed and what you learned.",
-            "Describe your ideal work environment.",
-            "How do you prioritize when you have multiple deadlines?"
-        ],
-        "hard": [
-            "What's the biggest risk you've ever taken?",
-            "Tell me about a time you had to adapt to a major change.",
-            "Describe a situation where you had to learn something completely new quickly."
-        ]
-    }
-}
+"""
+Question bank for different interview topics and difficulty levels
+Questions live in a JSON Lines data file, one {"topic", "difficulty", "question"} object per
+line, compiled into a single UTF-8 buffer with an offsets array and a contiguous range per
+(topic, difficulty). When the file changes the bank is recompiled and swapped in whole
+"""
 
-def get_question(topic: str, difficulty: str = "medium") -> str:
-    """Get a random question for a topic and difficulty"""
-    import random
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+import numpy as np
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+QUESTION_BANK_PATH = os.getenv(
+    "QUESTION_BANK_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "question_bank.jsonl")
+)
+
+# How often the data file is checked for changes
+QUESTION_BANK_RELOAD_SECONDS = float(os.getenv("QUESTION_BANK_RELOAD_SECONDS", 5))
+
+# Where unknown topics and difficulties fall back to; every bank must have it
+DEFAULT_TOPIC = "behavioral"
+DEFAULT_DIFFICULTY = "medium"
+
+
+class CompiledQuestionBank:
+    """Immutable bank: every question in one buffer, each (topic, difficulty) a range of rows"""
+    
+    def __init__(self, questions: Iterable[Tuple[str, str, str]]):
+        grouped: Dict[Tuple[str, str], List[bytes]] = {}
+        for topic, difficulty, text in questions:
+            grouped.setdefault((topic, difficulty), []).append(text.encode("utf-8"))
+        
+        self.topics: List[str] = list(dict.fromkeys(topic for topic, _ in grouped))
+        missing = [topic for topic in self.topics if (topic, DEFAULT_DIFFICULTY) not in grouped]
+        if DEFAULT_TOPIC not in self.topics or missing:
+            raise ValueError(f"{DEFAULT_TOPIC} and every other topic need {DEFAULT_DIFFICULTY} questions (missing: {missing or [DEFAULT_TOPIC]})")
+        
+        # (topic, difficulty) -> [start, end) rows
+        self._groups: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        encoded = []
+        for group, texts in grouped.items():
+            self._groups[group] = (len(encoded), len(encoded) + len(texts))
+            encoded.extend(texts)
+        
+        # Row i is _buffer[_offsets[i]:_offsets[i + 1]]
+        self._offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=self._offsets[1:])
+        self._buffer = b"".join(encoded)
     
-    if topic not in QUESTION_BANK:
-        topic = "behavioral"
+    @classmethod
+    def load(cls, path: str) -> "CompiledQuestionBank":
+        with open(path, encoding="utf-8") as f:
+            rows = (json.loads(line) for line in f if line.strip())
+            return cls((row["topic"], row["difficulty"], row["question"]) for row in rows)
     
-    if difficulty not in QUESTION_BANK[topic]:
-        difficulty = "medium"
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
     
-    questions = QUESTION_BANK[topic][difficulty]
-    return random.choice(questions)
+    def __iter__(self) -> Iterator[Tuple[str, str, str]]:
+        """Every (text, topic, difficulty), grouped"""
+        for (topic, difficulty), (start, end) in self._groups.items():
+            for row in range(start, end):
+                yield self.text(row), topic, difficulty
+    
+    def text(self, row: int) -> str:
+        return self._buffer[self._offsets[row]:self._offsets[row + 1]].decode("utf-8")
+    
+    def rows(self, topic: str, difficulty: str) -> range:
+        """Rows of exactly this (topic, difficulty), without falling back; empty if there are none"""
+        return range(*self._groups.get((topic, difficulty), (0, 0)))
+    
+    def digest(self) -> str:
+        """Content hash, the same for the same questions in the same order in every process"""
+        h = hashlib.blake2b(self._offsets.tobytes(), digest_size=16)
+        h.update(self._buffer)
+        h.update(json.dumps(list(self._groups.items())).encode("utf-8"))
+        return h.hexdigest()
+    
+    def _range(self, topic: str, difficulty: str) -> Tuple[int, int]:
+        if topic not in self.topics:
+            topic = DEFAULT_TOPIC
+        if (topic, difficulty) not in self._groups:
+            difficulty = DEFAULT_DIFFICULTY
+        return self._groups[(topic, difficulty)]
+    
+    def shuffled(self, topic: str, difficulty: str, rng: random.Random = random) -> Iterator[str]:
+        """Every question of the group in random order, each decoded only when it is reached"""
+        rows = list(range(*self._range(topic, difficulty)))
+        rng.shuffle(rows)
+        return (self.text(row) for row in rows)
+    
+    def random_question(self, topic: str, difficulty: str, rng: random.Random = random) -> str:
+        return self.text(rng.randrange(*self._range(topic, difficulty)))
+    
+    def memory_bytes(self) -> int:
+        return len(self._buffer) + self._offsets.nbytes
+
+
+_bank: Optional[CompiledQuestionBank] = None
+_signature = None
+_checked_at = 0.0
+_reload_lock = threading.Lock()
+_reload_listeners: List[Callable[[CompiledQuestionBank], None]] = []
+
+
+def _file_signature() -> Tuple[int, int]:
+    stat = os.stat(QUESTION_BANK_PATH)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load(signature: Tuple[int, int]):
+    global _bank, _signature
+    bank = CompiledQuestionBank.load(QUESTION_BANK_PATH)
+    # One assignment: readers get either the old bank or the new one, never a mix
+    _bank, _signature = bank, signature
+    for listener in list(_reload_listeners):
+        try:
+            listener(bank)
+        except Exception as e:
+            print(f"⚠️ Question bank reload listener failed: {e}")
+
+
+def _reload(signature: Tuple[int, int]):
+    try:
+        _load(signature)
+        print(f"✅ Reloaded {len(_bank)} questions from {QUESTION_BANK_PATH}")
+    except Exception as e:
+        # Retried on the next check, e.g. once a half-written file is complete
+        print(f"⚠️ Keeping the current question bank, {QUESTION_BANK_PATH} failed to load: {e}")
+    finally:
+        _reload_lock.release()
+
+
+def on_reload(listener: Callable[[CompiledQuestionBank], None]):
+    """Call listener(bank) from the loading thread whenever a new bank is swapped in"""
+    _reload_listeners.append(listener)
+
+
+def get_question_bank() -> CompiledQuestionBank:
+    """
+    The current bank, loaded on first use
+    The file is checked at most every QUESTION_BANK_RELOAD_SECONDS; a changed one is
+    recompiled in a background thread while the current bank keeps serving
+    """
+    global _checked_at
+    if _bank is None:
+        with _reload_lock:
+            if _bank is None:
+                _load(_file_signature())
+        return _bank
+    
+    now = time.monotonic()
+    if now - _checked_at >= QUESTION_BANK_RELOAD_SECONDS and _reload_lock.acquire(blocking=False):
+        _checked_at = now
+        try:
+            signature = _file_signature()
+        except OSError:
+            signature = _signature
+        if signature != _signature:
+            threading.Thread(target=_reload, args=(signature,), daemon=True).start()
+        else:
+            _reload_lock.release()
+    return _bank
+
+def get_question(topic: str, difficulty: str = "medium") -> str:
+    """Get a random question for a topic and difficulty"""
+    return get_question_bank().random_question(topic, difficulty)
 
 def get_all_topics() -> list:
     """Get list of all available topics"""
-    return list(QUESTION_BANK.keys())
+    return list(get_question_bank().topics)
@@ -0,0 +1,233 @@
+"""
+Local similarity index over interview questions
+Bank and previously generated questions are embedded as signed, hashed TF-IDF vectors in
+NumPy, grouped by (topic, difficulty), so the question best matching a user's recent weak
+points is one small matrix-vector product away instead of an LLM call. The bank's vectors
+are sparse, compiled once per bank version and memory-mapped by every worker process
+"""
+
+import os
+import re
+import math
+import zlib
+import fcntl
+import shutil
+import hashlib
+import tempfile
+import threading
+import numpy as np
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from question_bank import CompiledQuestionBank, get_question_bank, on_reload
+
+# Embedding width; unigrams and bigrams are hashed into this many signed buckets
+INDEX_DIMENSIONS = 512
+
+# Compiled bank indexes, one directory per bank version, shared by the processes on a node
+QUESTION_INDEX_DIR = os.getenv(
+    "QUESTION_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".question_index")
+)
+_ARRAYS = ("idf", "indptr", "indices", "values")
+
+# Below this cosine similarity a bank question doesn't really target the weak points,
+# and the bot asks Claude for one instead
+QUESTION_INDEX_MIN_SIMILARITY = float(os.getenv("QUESTION_INDEX_MIN_SIMILARITY", 0.15))
+
+# Ranked matches handed back per lookup, for the caller to drop ones the user has seen
+MATCH_CANDIDATES = 16
+
+STOPWORDS = frozenset("""
+a about an and are as at be been but by can could did do does for from had has have how i if in into is it its
+me my no not of on or our so than that the their them then there these they this to was we were what when where
+which who why will with would you your
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+def question_id(text: str) -> str:
+    """Stable id of a question, the same in every process and deployment"""
+    return hashlib.blake2b(" ".join(text.lower().split()).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _terms(text: str) -> List[str]:
+    words = [w for w in _TOKEN.findall(text.lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def hashed_counts(text: str, dimensions: int = INDEX_DIMENSIONS) -> Dict[int, float]:
+    """Signed term counts per bucket (crc32 is stable across processes, unlike hash())"""
+    buckets: Dict[int, float] = {}
+    for term, count in Counter(_terms(text)).items():
+        h = zlib.crc32(term.encode("utf-8"))
+        bucket = h % dimensions
+        sign = 1.0 if h & 0x80000000 else -1.0
+        buckets[bucket] = buckets.get(bucket, 0.0) + sign * (1.0 + math.log(count))
+    return buckets
+
+
+def _row_sums(values: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+    """Sum of each sparse row; reduceat alone would give an empty row the next row's first value"""
+    sums = np.add.reduceat(np.append(values, np.float32(0)), indptr[:-1])
+    sums[indptr[:-1] == indptr[1:]] = 0
+    return sums
+
+
+def _best(scores: np.ndarray, limit: int) -> np.ndarray:
+    """Indexes of the (up to) limit highest scores that reach QUESTION_INDEX_MIN_SIMILARITY"""
+    k = min(len(scores), limit)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[scores[top] >= QUESTION_INDEX_MIN_SIMILARITY]
+
+
+def compile_bank(bank: CompiledQuestionBank) -> Dict[str, np.ndarray]:
+    """
+    Normalized TF-IDF rows aligned with the bank's rows, in CSR form: row i has buckets
+    indices[indptr[i]:indptr[i + 1]] with weights from values. About 4 bytes per term of a question
+    """
+    counts = [hashed_counts(text) for text, _, _ in bank]
+    
+    # Smoothed IDF per bucket, from the bank; generated questions reuse it
+    df = np.zeros(INDEX_DIMENSIONS, dtype=np.float32)
+    for buckets in counts:
+        df[list(buckets)] += 1
+    idf = (np.log((1 + len(counts)) / (1 + df)) + 1).astype(np.float32)
+    
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum([len(buckets) for buckets in counts], out=indptr[1:])
+    indices = np.fromiter((bucket for buckets in counts for bucket in buckets), dtype=np.uint16, count=indptr[-1])
+    values = np.fromiter((value for buckets in counts for value in buckets.values()), dtype=np.float32, count=indptr[-1])
+    values *= idf[indices]
+    norms = np.sqrt(_row_sums(values * values, indptr))
+    values /= np.repeat(np.where(norms > 0, norms, 1.0), np.diff(indptr))
+    return {"idf": idf, "indptr": indptr, "indices": indices, "values": values.astype(np.float16)}
+
+
+def _load_or_compile(bank: CompiledQuestionBank, directory: str) -> Dict[str, np.ndarray]:
+    """The bank's compiled index, memory-mapped; whichever process gets here first compiles it"""
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, f"{bank.digest()}-{INDEX_DIMENSIONS}")
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        # Held while compiling, so the other workers wait for the files instead of compiling too
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.isdir(target):
+            staging = tempfile.mkdtemp(dir=directory)
+            for name, array in compile_bank(bank).items():
+                np.save(os.path.join(staging, f"{name}.npy"), array)
+            os.rename(staging, target)
+        arrays = {name: np.load(os.path.join(target, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+        # Indexes of older banks; processes still using one keep their mapping after the files go
+        for entry in os.listdir(directory):
+            path = os.path.join(directory, entry)
+            if path != target and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+    return arrays
+
+
+class QuestionIndex:
+    """Sparse vectors of the bank's questions and dense ones of generated questions, by (topic, difficulty)"""
+    
+    def __init__(self, bank: CompiledQuestionBank, arrays: Optional[Dict[str, np.ndarray]] = None):
+        self.bank = bank
+        arrays = compile_bank(bank) if arrays is None else arrays
+        self.idf = arrays["idf"]
+        self._indptr, self._indices, self._values = arrays["indptr"], arrays["indices"], arrays["values"]
+        
+        self._lock = threading.Lock()
+        # Questions added after the bank, carried over when the bank is reloaded
+        self.generated: List[Tuple[str, str, str]] = []
+        # (topic, difficulty) -> texts, ids and float16 vectors of its generated questions
+        self._generated: Dict[Tuple[str, str], Tuple[List[str], List[str], np.ndarray]] = {}
+        self._known = set()
+    
+    @classmethod
+    def load(cls, bank: CompiledQuestionBank, directory: str = QUESTION_INDEX_DIR) -> "QuestionIndex":
+        """Index over the bank's shared compiled files (see _load_or_compile)"""
+        return cls(bank, _load_or_compile(bank, directory))
+    
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(INDEX_DIMENSIONS, dtype=np.float32)
+        for bucket, value in hashed_counts(text).items():
+            vector[bucket] = value
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def add(self, questions: Iterable[Tuple[str, str, str]]):
+        """Index (text, topic, difficulty) questions, e.g. ones Claude generated; duplicates are ignored"""
+        questions = list(questions)
+        with self._lock:
+            self.generated.extend(questions)
+            new: Dict[Tuple[str, str], List[Tuple[str, str, np.ndarray]]] = {}
+            for text, topic, difficulty in questions:
+                qid = question_id(text)
+                if qid not in self._known:
+                    self._known.add(qid)
+                    new.setdefault((topic, difficulty), []).append((text, qid, self.embed(text)))
+            
+            for group, rows in new.items():
+                texts, ids, vectors = self._generated.get(group, ([], [], np.empty((0, INDEX_DIMENSIONS), dtype=np.float16)))
+                # Replaced whole, so a concurrent lookup sees either the old or the new group
+                self._generated[group] = (
+                    texts + [text for text, _, _ in rows],
+                    ids + [qid for _, qid, _ in rows],
+                    np.vstack([vectors, np.stack([vector for _, _, vector in rows]).astype(np.float16)])
+                )
+    
+    def matches(self, topic: str, difficulty: str, weak_points: List[str], limit: int = MATCH_CANDIDATES) -> List[Tuple[str, str]]:
+        """
+        Up to limit (id, text) questions in (topic, difficulty), most similar to the weak points first
+        Only questions reaching QUESTION_INDEX_MIN_SIMILARITY are returned
+        """
+        query = self.embed(" ".join(weak_points))
+        if not query.any():
+            return []
+        
+        found = []
+        rows = self.bank.rows(topic, difficulty)
+        if rows:
+            lo, hi = self._indptr[rows.start], self._indptr[rows.stop]
+            scores = _row_sums(self._values[lo:hi] * query[self._indices[lo:hi]], self._indptr[rows.start:rows.stop + 1] - lo)
+            for i in _best(scores, limit):
+                text = self.bank.text(rows.start + i)
+                found.append((scores[i], question_id(text), text))
+        
+        generated = self._generated.get((topic, difficulty))
+        if generated:
+            texts, ids, vectors = generated
+            scores = vectors @ query
+            found.extend((scores[i], ids[i], texts[i]) for i in _best(scores, limit))
+        
+        found.sort(key=lambda match: -match[0])
+        return [(qid, text) for _, qid, text in found[:limit]]
+    
+    def memory_bytes(self) -> int:
+        """Bank vectors (shared between processes when loaded) plus this process's generated ones"""
+        arrays = (self.idf, self._indptr, self._indices, self._values)
+        return sum(array.nbytes for array in arrays) + sum(vectors.nbytes for _, _, vectors in self._generated.values())
+
+
+_question_index = None
+
+
+def get_question_index() -> QuestionIndex:
+    """Process-wide index over the bank"""
+    global _question_index
+    if _question_index is None:
+        _question_index = QuestionIndex.load(get_question_bank())
+    return _question_index
+
+
+def _rebuild(bank: CompiledQuestionBank):
+    """Reindex a reloaded bank off to the side, then swap it in"""
+    global _question_index
+    if _question_index is None:
+        return
+    index = QuestionIndex.load(bank)
+    index.add(_question_index.generated)
+    _question_index = index
+
+
+on_reload(_rebuild)
@@ -0,0 +1,128 @@
+"""
+Live session events pushed to browsers over Server-Sent Events
+Bots publish on a per-session Redis channel; each API process holds one pub/sub
+connection and fans messages out to its local subscribers
+"""
+
+import os
+import json
+import asyncio
+import redis.asyncio as aioredis
+from typing import Dict, Optional, Set
+
+# Events a subscriber may fall behind by before the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SESSION_EVENTS_QUEUE_SIZE", 100))
+
+# Comment lines sent on idle streams so proxies keep them open and dead clients are noticed
+SSE_KEEPALIVE_SECONDS = 15.0
+
+
+def session_channel(session_id: str) -> str:
+    return f"session:{session_id}:events"
+
+
+def channel_session(channel: str) -> str:
+    """Inverse of session_channel; session ids may contain ':' (user ids come from the URL)"""
+    return channel[len("session:"):-len(":events")]
+
+
+def encode_event(event: str, data: Dict) -> str:
+    """Wire format shared by publishers and the SSE stream"""
+    return json.dumps({"event": event, "data": data})
+
+
+def format_sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class SessionEventHub:
+    """One Redis subscription per session channel per process, shared by every local subscriber"""
+    
+    def __init__(self, redis_url: Optional[str] = None, client=None):
+        self.client = client or aioredis.from_url(redis_url or os.getenv("REDIS_URL", "redis://localhost:6379"), decode_responses=True)
+        self.pubsub = self.client.pubsub()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._lock = asyncio.Lock()
+        self._has_channels = asyncio.Event()
+        self._reader: Optional[asyncio.Task] = None
+    
+    def start(self):
+        self._reader = asyncio.get_running_loop().create_task(self._read_loop())
+        print("✅ Session event hub started")
+    
+    async def stop(self):
+        if self._reader:
+            self._reader.cancel()
+        await self.pubsub.aclose()
+        await self.client.aclose()
+    
+    async def subscribe(self, session_id: str) -> asyncio.Queue:
+        """Register a local subscriber, subscribing in Redis only for the session's first one"""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        async with self._lock:
+            subscribers = self._subscribers.setdefault(session_id, set())
+            if not subscribers:
+                await self.pubsub.subscribe(session_channel(session_id))
+                self._has_channels.set()
+            subscribers.add(queue)
+        return queue
+    
+    async def unsubscribe(self, session_id: str, queue: asyncio.Queue):
+        async with self._lock:
+            subscribers = self._subscribers.get(session_id)
+            if subscribers is None:
+                return
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[session_id]
+                await self.pubsub.unsubscribe(session_channel(session_id))
+                if not self._subscribers:
+                    self._has_channels.clear()
+    
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values())
+        }
+    
+    def _dispatch(self, session_id: str, message: Dict):
+        for queue in self._subscribers.get(session_id, ()):
+            if queue.full():
+                # A slow client loses its oldest update rather than stalling everyone else
+                queue.get_nowait()
+            queue.put_nowait(message)
+    
+    async def _read_loop(self):
+        while True:
+            try:
+                await self._has_channels.wait()
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not message or message["type"] != "message":
+                    continue
+                
+                # session:<id>:events
+                session_id = channel_session(message["channel"])
+                self._dispatch(session_id, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Session event reader error: {e}")
+                await asyncio.sleep(1.0)
+    
+    async def stream(self, session_id: str, snapshot: Dict):
+        """SSE body: the current status first, then every published event until the client goes away"""
+        queue = await self.subscribe(session_id)
+        try:
+            yield format_sse("status", snapshot)
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                yield format_sse(message["event"], message["data"])
+                if message["event"] == "ended":
+                    return
+        finally:
+            await self.unsubscribe(session_id, queue)
@@ -0,0 +1,156 @@
+"""
+Registry of the live resources owned by each interview bot
+Reclaims pipelines, timers and transports when a session ends, the candidate
+leaves, or the bot sits idle past its TTL
+"""
+
+import os
+import time
+import asyncio
+from typing import Dict, Optional, Set
+
+from loguru import logger
+
+# Bots with no candidate activity for this long are reaped
+BOT_IDLE_TTL_SECONDS = float(os.getenv("BOT_IDLE_TTL_SECONDS", 600))
+REAPER_INTERVAL_SECONDS = 30.0
+
+# How long a released bot gets to shut down cleanly before it is force-cancelled
+RELEASE_TIMEOUT_SECONDS = 10.0
+
+
+class BotResources:
+    """Everything a single bot keeps alive"""
+    
+    def __init__(self, session_id: str, runner_task: asyncio.Task):
+        self.session_id = session_id
+        self.runner_task = runner_task
+        self.pipeline_task = None
+        self.transport = None
+        self.timers: Set[asyncio.Task] = set()
+        self.created_at = time.monotonic()
+        self.last_activity = self.created_at
+        self.release_reason: Optional[str] = None
+    
+    def live_timers(self) -> int:
+        return sum(1 for timer in self.timers if not timer.done())
+    
+    def is_clean(self) -> bool:
+        return self.runner_task.done() and self.live_timers() == 0
+
+
+class SessionRegistry:
+    """Tracks bot resources per session and cancels them on end, leave or idle TTL"""
+    
+    def __init__(self, idle_ttl: float = BOT_IDLE_TTL_SECONDS):
+        self.idle_ttl = idle_ttl
+        self._bots: Dict[str, BotResources] = {}
+        self._leaked: Dict[str, BotResources] = {}
+        self._released = {"ended": 0, "participant_left": 0, "idle": 0, "shutdown": 0, "lease_lost": 0}
+        self._reaper: Optional[asyncio.Task] = None
+    
+    def register(self, session_id: str, runner_task: asyncio.Task, pipeline_task=None, transport=None) -> BotResources:
+        """Start tracking a bot, called from inside its runner task"""
+        resources = BotResources(session_id, runner_task)
+        resources.pipeline_task = pipeline_task
+        resources.transport = transport
+        self._bots[session_id] = resources
+        return resources
+    
+    def unregister(self, session_id: str):
+        """Forget a bot whose pipeline finished on its own"""
+        resources = self._bots.pop(session_id, None)
+        if resources:
+            for timer in resources.timers:
+                timer.cancel()
+    
+    def track_timer(self, session_id: str, timer: asyncio.Task):
+        """Tie an auxiliary task (silence timer, delayed greeting) to a bot's lifetime"""
+        resources = self._bots.get(session_id)
+        if resources is None:
+            return
+        resources.timers.add(timer)
+        timer.add_done_callback(resources.timers.discard)
+    
+    def touch(self, session_id: str):
+        """Record candidate activity so the bot is not considered idle"""
+        resources = self._bots.get(session_id)
+        if resources:
+            resources.last_activity = time.monotonic()
+    
+    async def release(self, session_id: str, reason: str) -> bool:
+        """
+        Stop a bot and verify its resources are gone, returns True if cleanup was complete
+        Must run in its own task, never inside the bot's runner task
+        """
+        resources = self._bots.pop(session_id, None)
+        if resources is None:
+            return True
+        
+        resources.release_reason = reason
+        self._released[reason] = self._released.get(reason, 0) + 1
+        logger.info(f"Releasing bot for session {session_id} ({reason})")
+        
+        for timer in resources.timers:
+            timer.cancel()
+        
+        # Cancelling the pipeline task lets the transport leave the room cleanly
+        if resources.pipeline_task is not None and not resources.runner_task.done():
+            await resources.pipeline_task.cancel()
+        
+        if not await _wait(resources.runner_task, RELEASE_TIMEOUT_SECONDS):
+            resources.runner_task.cancel()
+            await _wait(resources.runner_task, RELEASE_TIMEOUT_SECONDS)
+        
+        if resources.is_clean():
+            return True
+        
+        logger.error(f"Bot for session {session_id} leaked resources after release ({reason})")
+        self._leaked[session_id] = resources
+        return False
+    
+    async def release_all(self, reason: str = "shutdown"):
+        await asyncio.gather(*(self.release(session_id, reason) for session_id in list(self._bots)))
+    
+    def start_reaper(self):
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap_loop())
+    
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(REAPER_INTERVAL_SECONDS)
+            await self.reap()
+    
+    async def reap(self):
+        """Release idle bots and drop leaked entries that have since finished"""
+        now = time.monotonic()
+        idle = [
+            session_id for session_id, resources in self._bots.items()
+            if now - resources.last_activity > self.idle_ttl
+        ]
+        for session_id in idle:
+            await self.release(session_id, "idle")
+        
+        for session_id, resources in list(self._leaked.items()):
+            if resources.is_clean():
+                del self._leaked[session_id]
+    
+    def counts(self) -> Dict:
+        """Live and leaked resource gauges"""
+        live = list(self._bots.values())
+        leaked = list(self._leaked.values())
+        return {
+            "live_bots": len(live),
+            "live_pipelines": sum(1 for r in live if not r.runner_task.done()),
+            "live_transports": sum(1 for r in live if r.transport is not None and not r.runner_task.done()),
+            "live_timers": sum(r.live_timers() for r in live),
+            "leaked_bots": len(leaked),
+            "leaked_timers": sum(r.live_timers() for r in leaked),
+            "released": dict(self._released)
+        }
+
+
+async def _wait(task: asyncio.Task, timeout: float) -> bool:
+    """Wait for a task without propagating its result, True if it finished"""
+    await asyncio.wait({task}, timeout=timeout)
+    return task.done()
@@ -4,20 +4,76 @@ Redis storage layer for session data and knowledge tracking
 
 import os
 import json
-import redis
 from datetime import datetime
-from typing import Dict, List, Optional
-import uuid
+from typing import Dict, Iterator, List, Optional
+
+from session_events import session_channel, encode_event
+from served_questions import ServedQuestions
+from weaknesses import WeaknessSummary
+from archive import ColdArchive, ENDED_SESSIONS_KEY, ARCHIVE_CACHE_SECONDS, ended_score
+from keys import (
+    SESSION_ID_SEPARATOR,
+    connect,
+    new_session_id,
+    session_key,
+    rehydrated_key,
+    user_sessions_key,
+    session_versions_key,
+    user_version_key,
+    knowledge_key,
+    weaknesses_key
+)
+
+# Users whose reads share one pipelined round trip in get_knowledge_maps
+KNOWLEDGE_MAP_PIPELINE_USERS = int(os.getenv("KNOWLEDGE_MAP_PIPELINE_USERS", 50))
+
+# Sessions per round trip when exporting or importing a user's history
+EXPORT_BATCH = int(os.getenv("EXPORT_BATCH", 100))
+
+# Questions Claude generated, kept so later turns can reuse them without another call
+GENERATED_QUESTIONS_KEY = "questions:generated"
+
+# Write log of users whose knowledge map changed, consumed by analytics.py.
+# Capped; a reader that falls further behind than this reloads everything
+KNOWLEDGE_LOG_KEY = "log:knowledge"
+KNOWLEDGE_LOG_MAXLEN = int(os.getenv("KNOWLEDGE_LOG_MAXLEN", 1_000_000))
+
+# Advance a user's version by ARGV[1] writes and record session versions (ARGV: session id, offset
+# pairs) relative to the previous version, in one step: a reader in between would otherwise get a
+# watermark past a session version it never sees. Both keys share the user's hash tag
+ADVANCE_VERSIONS_SCRIPT = """
+local top = redis.call('INCRBY', KEYS[1], ARGV[1])
+local base = top - tonumber(ARGV[1])
+for i = 2, #ARGV, 2 do
+    redis.call('HSET', KEYS[2], ARGV[i], base + tonumber(ARGV[i + 1]))
+end
+return top
+"""
+
+def _owned_by(session: Dict, user_id: str) -> Dict:
+    """The session as user_id's, with an id that embeds that user"""
+    local_id = session["id"].partition(SESSION_ID_SEPARATOR)[0]
+    return {**session, "id": new_session_id(user_id, local_id), "user_id": user_id}
 
 class SessionStorage:
-    def __init__(self):
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-        self.redis = redis.from_url(redis_url, decode_responses=True)
-        print(f"✅ Connected to Redis at {redis_url}")
+    def __init__(self, redis_client=None, archive: Optional[ColdArchive] = None):
+        # Where archived sessions are rehydrated from (see archive.py)
+        self.archive = archive or ColdArchive()
+        
+        # An existing client (e.g. an in-process stand-in for benchmarks) can be passed in
+        if redis_client is not None:
+            self.redis = redis_client
+        else:
+            redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+            self.redis = connect(redis_url)
+            print(f"✅ Connected to Redis at {redis_url}")
+        
+        # Questions each user has already been asked (see served_questions.py)
+        self.served = ServedQuestions(self.redis)
     
     def create_session(self, user_id: str) -> str:
         """Create a new interview session"""
-        session_id = f"sess_{uuid.uuid4().hex[:8]}"
+        session_id = new_session_id(user_id)
         
         session_data = {
             "id": session_id,
@@ -29,27 +85,57 @@ class SessionStorage:
         }
         
         # Store session
-        self.redis.set(f"session:{session_id}", json.dumps(session_data))
+        self.redis.set(session_key(session_id), json.dumps(session_data))
         
         # Add to user's session list
-        self.redis.lpush(f"user:{user_id}:sessions", session_id)
+        self.redis.lpush(user_sessions_key(user_id), session_id)
+        self._bump_user_version(user_id, session_id)
         
         return session_id
     
     def get_session(self, session_id: str) -> Optional[Dict]:
-        """Get session data"""
-        data = self.redis.get(f"session:{session_id}")
-        return json.loads(data) if data else None
+        """Get session data, rehydrating it from the cold archive if it was archived"""
+        data, rehydrated = self.redis.mget([session_key(session_id), rehydrated_key(session_id)])
+        if not data:
+            return None
+        
+        session = json.loads(data)
+        if "archived" not in session:
+            return session
+        if rehydrated:
+            return json.loads(rehydrated)
+        return self._rehydrate(session)
+    
+    def _rehydrate(self, summary: Dict, cache: bool = True) -> Dict:
+        """
+        Full session for an archived summary, read from the cold archive
+        Raises if the archive can't be read: the summary has no questions, and passed off as the
+        session it would be written back over it by update_session or add_question
+        """
+        try:
+            # The summary's id wins: migrate_keys.py renames sessions but not archived frames
+            full = {**self.archive.read(summary["archived"]), "id": summary["id"]}
+        except Exception as e:
+            print(f"❌ Could not rehydrate session {summary['id']}: {e}")
+            raise
+        if cache:
+            self.redis.set(rehydrated_key(summary["id"]), json.dumps(full), ex=ARCHIVE_CACHE_SECONDS)
+        return full
     
     def update_session(self, session_id: str, updates: Dict):
         """Update session data"""
         session = self.get_session(session_id)
         if session:
             session.update(updates)
-            self.redis.set(f"session:{session_id}", json.dumps(session))
+            self.redis.set(session_key(session_id), json.dumps(session))
+            if session.get("ended_at"):
+                # Back to a full blob in Redis; archive it again later
+                self.redis.delete(rehydrated_key(session_id))
+                self.redis.zadd(ENDED_SESSIONS_KEY, {session_id: datetime.now().timestamp()})
+            self._bump_user_version(session["user_id"], session_id)
     
-    def add_question(self, session_id: str, question: str, answer: str, score: float, topic: str, weak_points: List[str]):
-        """Add a question and answer to the session"""
+    def add_question(self, session_id: str, question: str, answer: str, score: float, topic: str, weak_points: List[str], usage: Optional[Dict] = None):
+        """Add a question and answer to the session, with the LLM tokens spent on them if given"""
         session = self.get_session(session_id)
         if not session:
             return
@@ -62,6 +148,8 @@ class SessionStorage:
             "weak_points": weak_points,
             "timestamp": datetime.now().isoformat()
         }
+        if usage:
+            question_data["usage"] = usage
         
         session["questions"].append(question_data)
         
@@ -70,14 +158,26 @@ class SessionStorage:
             session["current_scores"][topic] = []
         session["current_scores"][topic].append(score)
         
-        self.redis.set(f"session:{session_id}", json.dumps(session))
+        self.redis.set(session_key(session_id), json.dumps(session))
         
-        # Update knowledge map
+        # Update knowledge map and recurring weaknesses
         self._update_knowledge_map(session["user_id"], topic, score)
+        self._update_weaknesses(session["user_id"], weak_points)
+        self._bump_user_version(session["user_id"], session_id)
+    
+    def _update_weaknesses(self, user_id: str, weak_points: List[str]):
+        key = weaknesses_key(user_id)
+        summary = WeaknessSummary.from_json(self.redis.get(key))
+        summary.add(weak_points)
+        self.redis.set(key, summary.to_json())
+    
+    def get_weaknesses(self, user_id: str, n: int = 3) -> List[str]:
+        """Labels of the user's n most recurring weaknesses (see weaknesses.py)"""
+        return WeaknessSummary.from_json(self.redis.get(weaknesses_key(user_id))).labels(n)
     
     def _update_knowledge_map(self, user_id: str, topic: str, score: float):
         """Update user's knowledge map with new score"""
-        key = f"knowledge:{user_id}"
+        key = knowledge_key(user_id)
         
         # Get current knowledge map
         data = self.redis.get(key)
@@ -89,13 +189,143 @@ class SessionStorage:
         knowledge_map[topic].append(score)
         
         self.redis.set(key, json.dumps(knowledge_map))
+        self.redis.xadd(KNOWLEDGE_LOG_KEY, {"user_id": user_id}, maxlen=KNOWLEDGE_LOG_MAXLEN, approximate=True)
+    
+    def publish_event(self, session_id: str, event: str, data: Dict) -> int:
+        """Push a live update to the session's event subscribers"""
+        return self.redis.publish(session_channel(session_id), encode_event(event, data))
     
     def end_session(self, session_id: str):
         """Mark session as ended"""
         session = self.get_session(session_id)
         if session:
             session["ended_at"] = datetime.now().isoformat()
-            self.redis.set(f"session:{session_id}", json.dumps(session))
+            self.redis.set(session_key(session_id), json.dumps(session))
+            # Queued for the archiver, by end time
+            self.redis.zadd(ENDED_SESSIONS_KEY, {session_id: ended_score(session["ended_at"])})
+            self._bump_user_version(session["user_id"], session_id)
+    
+    def queue_user_history(self, pipe, user_id: str, sessions: List[Dict]):
+        """
+        Queue on `pipe` the writes that replace a user's history with `sessions` (oldest first)
+        Leaves the keys create_session/add_question/end_session would have, without reading anything back
+        """
+        session_key_list = user_sessions_key(user_id)
+        versions_key = session_versions_key(user_id)
+        knowledge_map = {}
+        weaknesses = WeaknessSummary()
+        session_versions = {}
+        writes = 0
+        
+        for session in sessions:
+            pipe.set(session_key(session['id']), json.dumps(session))
+            for question in session["questions"]:
+                knowledge_map.setdefault(question["topic"], []).append(question["score"])
+                weaknesses.add(question.get("weak_points", []))
+            # One version per write the live path makes: create, each question, end
+            writes += len(session["questions"]) + (2 if session.get("ended_at") else 1)
+            session_versions[session["id"]] = writes
+        
+        pipe.delete(session_key_list, versions_key)
+        if sessions:
+            # LPUSH in chronological order leaves the list newest first
+            pipe.lpush(session_key_list, *(session["id"] for session in sessions))
+        pipe.set(knowledge_key(user_id), json.dumps(knowledge_map))
+        pipe.set(weaknesses_key(user_id), weaknesses.to_json())
+        ended = {session["id"]: ended_score(session["ended_at"]) for session in sessions if session.get("ended_at")}
+        if ended:
+            pipe.zadd(ENDED_SESSIONS_KEY, ended)
+        pipe.xadd(KNOWLEDGE_LOG_KEY, {"user_id": user_id}, maxlen=KNOWLEDGE_LOG_MAXLEN, approximate=True)
+        # Added on top of the current version, never reset: clients may hold ETags and watermarks up to it.
+        # At least one, as replacing a history with nothing is still a change
+        self._advance_versions(pipe, user_id, max(writes, 1), session_versions)
+    
+    def export_user_sessions(self, user_id: str) -> Iterator[Dict]:
+        """
+        A user's full sessions, oldest first, read EXPORT_BATCH per round trip
+        Archived sessions are rehydrated without being cached, so an export doesn't fill Redis.
+        One that can't be read raises rather than being exported without its questions
+        """
+        key = user_sessions_key(user_id)
+        start = 0
+        while True:
+            # Indexes from the tail stay put while new sessions are LPUSHed at the head
+            session_ids = self.redis.lrange(key, -(start + EXPORT_BATCH), -(start + 1))
+            if not session_ids:
+                return
+            for blob in self.redis.mget([session_key(session_id) for session_id in reversed(session_ids)]):
+                if not blob:
+                    continue
+                session = json.loads(blob)
+                yield self._rehydrate(session, cache=False) if "archived" in session else session
+            if len(session_ids) < EXPORT_BATCH:
+                return
+            start += EXPORT_BATCH
+    
+    def import_sessions(self, user_id: str, sessions: List[Dict]) -> int:
+        """
+        Append exported sessions (oldest first) to a user's history in two round trips
+        Session ids are re-keyed to embed user_id (see keys.py). Sessions whose id already exists
+        are skipped, so a failed import can simply be rerun.
+        Meant for users not being written to meanwhile: the knowledge map and weaknesses are read, then rewritten
+        """
+        sessions = [_owned_by(session, user_id) for session in sessions]
+        pipe = self.redis.pipeline(transaction=False)
+        for session in sessions:
+            pipe.exists(session_key(session['id']))
+        pipe.get(knowledge_key(user_id))
+        pipe.get(weaknesses_key(user_id))
+        *exists, knowledge, weakness_blob = pipe.execute()
+        new = [session for session, found in zip(sessions, exists) if not found]
+        if not new:
+            return 0
+        
+        knowledge_map = json.loads(knowledge) if knowledge else {}
+        weaknesses = WeaknessSummary.from_json(weakness_blob)
+        # As many versions as the live path would have made: create, each question, end
+        writes = [len(session["questions"]) + (2 if session.get("ended_at") else 1) for session in new]
+        
+        session_versions = {}
+        offset = 0
+        pipe = self.redis.pipeline(transaction=False)
+        for session, count in zip(new, writes):
+            pipe.set(session_key(session['id']), json.dumps(session))
+            for question in session["questions"]:
+                knowledge_map.setdefault(question["topic"], []).append(question["score"])
+                weaknesses.add(question.get("weak_points", []))
+            offset += count
+            session_versions[session["id"]] = offset
+            if session.get("ended_at"):
+                pipe.zadd(ENDED_SESSIONS_KEY, {session["id"]: ended_score(session["ended_at"])})
+        
+        pipe.lpush(user_sessions_key(user_id), *session_versions)
+        pipe.set(knowledge_key(user_id), json.dumps(knowledge_map))
+        pipe.set(weaknesses_key(user_id), weaknesses.to_json())
+        pipe.xadd(KNOWLEDGE_LOG_KEY, {"user_id": user_id}, maxlen=KNOWLEDGE_LOG_MAXLEN, approximate=True)
+        # Bumped last, after the data, as in _bump_user_version
+        self._advance_versions(pipe, user_id, offset, session_versions)
+        pipe.execute()
+        return len(new)
+    
+    def save_generated_question(self, question_id: str, text: str, topic: str, difficulty: str):
+        self.redis.hset(GENERATED_QUESTIONS_KEY, question_id, json.dumps({"text": text, "topic": topic, "difficulty": difficulty}))
+    
+    def get_generated_questions(self) -> List[Dict]:
+        return [json.loads(blob) for blob in self.redis.hgetall(GENERATED_QUESTIONS_KEY).values()]
+    
+    def get_user_version(self, user_id: str) -> int:
+        """Monotonic counter of writes to the user's sessions and knowledge map"""
+        return int(self.redis.get(user_version_key(user_id)) or 0)
+    
+    def _bump_user_version(self, user_id: str, session_id: str):
+        # Bumped after the data is written, so a reader that reads the version first
+        # never pairs a new version with old data
+        self._advance_versions(self.redis, user_id, 1, {session_id: 1})
+    
+    def _advance_versions(self, client, user_id: str, writes: int, session_offsets: Dict[str, int]):
+        """Add writes to the user's version; each session's version (for delta sync) is the old version plus its offset"""
+        args = [arg for item in session_offsets.items() for arg in item]
+        client.eval(ADVANCE_VERSIONS_SCRIPT, 2, user_version_key(user_id), session_versions_key(user_id), writes, *args)
     
     def calculate_session_scores(self, session_id: str) -> Dict[str, float]:
         """Calculate average scores per topic for a session"""
@@ -116,48 +346,48 @@ class SessionStorage:
             for topic, scores in topic_scores.items()
         }
     
+    def _stored_sessions(self, session_ids: List[str]) -> List[Dict]:
+        """
+        Sessions as stored in Redis, in one round trip (a user's keys share a slot)
+        Archived sessions stay summaries: rehydrating them for a listing would pull the user's
+        whole history back out of the archive and into Redis on every dashboard view
+        """
+        if not session_ids:
+            return []
+        return [json.loads(blob) for blob in self.redis.mget([session_key(session_id) for session_id in session_ids]) if blob]
+    
     def get_user_sessions(self, user_id: str) -> List[Dict]:
-        """Get all sessions for a user"""
-        session_ids = self.redis.lrange(f"user:{user_id}:sessions", 0, -1)
+        """Get all sessions for a user; archived ones are listed without their questions"""
+        session_ids = self.redis.lrange(user_sessions_key(user_id), 0, -1)
         
         sessions = []
-        for session_id in session_ids:
-            session = self.get_session(session_id)
-            if session:
-                # Calculate average score
-                total_score = 0
-                count = 0
-                for q in session["questions"]:
-                    total_score += q["score"]
-                    count += 1
-                
-                sessions.append({
-                    "id": session["id"],
-                    "date": session["started_at"],
-                    "started_at": session["started_at"],
-                    "ended_at": session.get("ended_at"),
-                    "questions_asked": len(session["questions"]),
-                    "average_score": total_score / count if count > 0 else 0,
-                    "questions": session["questions"]
-                })
+        for session in self._stored_sessions(session_ids):
+            if "archived" in session:
+                questions_asked, average_score, questions = session["questions_asked"], session["average_score"], []
+            else:
+                scores = [q["score"] for q in session["questions"]]
+                questions_asked, average_score, questions = len(scores), sum(scores) / len(scores) if scores else 0, session["questions"]
+            
+            sessions.append({
+                "id": session["id"],
+                "date": session["started_at"],
+                "started_at": session["started_at"],
+                "ended_at": session.get("ended_at"),
+                "questions_asked": questions_asked,
+                "average_score": average_score,
+                "questions": questions
+            })
         
         return sessions
     
     def get_knowledge_map(self, user_id: str) -> Dict:
         """Get user's knowledge map and history"""
-        key = f"knowledge:{user_id}"
-        data = self.redis.get(key)
-        knowledge_data = json.loads(data) if data else {}
+        # Read first: the data below is at least as new as this watermark
+        watermark = self.get_user_version(user_id)
+        topics = self._topic_scores(user_id)
         
-        # Calculate current scores (average of recent scores)
-        topics = {}
-        for topic, scores in knowledge_data.items():
-            # Use last 3 scores for current level
-            recent_scores = scores[-3:] if len(scores) >= 3 else scores
-            topics[topic] = sum(recent_scores) / len(recent_scores) / 10.0 if recent_scores else 0
-        
-        # Build history (session by session)
-        sessions = self.get_user_sessions(user_id)
+        # Build history (session by session) from current_scores, which archived summaries keep
+        sessions = self._stored_sessions(self.redis.lrange(user_sessions_key(user_id), 0, -1))
         
         # IMPORTANT: Reverse to get chronological order (oldest first)
         # Redis LPUSH stores newest first, but we want oldest → newest for progression
@@ -166,27 +396,111 @@ class SessionStorage:
         history = []
         
         for idx, session in enumerate(sessions_chronological, 1):
-            session_data = {"session": idx}
-            
-            # Calculate scores for each topic in this session
-            for question in session["questions"]:
-                topic = question["topic"]
-                if topic not in session_data:
-                    session_data[topic] = []
-                session_data[topic].append(question["score"])
-            
-            # Average scores for this session
-            for topic, scores in session_data.items():
-                if topic != "session":
-                    session_data[topic] = sum(scores) / len(scores) / 10.0
-            
-            history.append(session_data)
+            history.append(self._history_entry(idx, session))
         
         return {
             "topics": topics,
-            "history": history
+            "history": history,
+            "watermark": watermark
         }
     
+    def get_knowledge_map_since(self, user_id: str, since: int) -> Dict:
+        """
+        Knowledge map delta: history entries for sessions written after the `since` watermark,
+        scores for the topics those sessions touched, and the new watermark
+        """
+        watermark = self.get_user_version(user_id)
+        versions = self.redis.hgetall(session_versions_key(user_id))
+        changed = {session_id for session_id, version in versions.items() if int(version) > since}
+        if not changed:
+            return {"topics": {}, "history": [], "watermark": watermark}
+        
+        # Entries are numbered by chronological position; the list is newest first
+        session_ids = self.redis.lrange(user_sessions_key(user_id), 0, -1)
+        positions = {session_id: len(session_ids) - position for position, session_id in enumerate(session_ids) if session_id in changed}
+        history = [
+            self._history_entry(positions[session["id"]], session)
+            for session in self._stored_sessions(list(positions))
+        ]
+        history.reverse()
+        
+        touched = {topic for entry in history for topic in entry if topic != "session"}
+        topics = {topic: score for topic, score in self._topic_scores(user_id).items() if topic in touched}
+        
+        return {
+            "topics": topics,
+            "history": history,
+            "watermark": watermark
+        }
+    
+    def get_knowledge_maps(self, user_ids: List[str]) -> Iterator[Dict]:
+        """
+        Knowledge maps for many users, yielded as each group of users is read
+        Each group costs two pipelined round trips (per-user keys, then every session of the group)
+        instead of one request per session
+        """
+        for start in range(0, len(user_ids), KNOWLEDGE_MAP_PIPELINE_USERS):
+            group = user_ids[start:start + KNOWLEDGE_MAP_PIPELINE_USERS]
+            
+            pipe = self.redis.pipeline(transaction=False)
+            for user_id in group:
+                # Version first, as in get_knowledge_map
+                pipe.get(user_version_key(user_id))
+                pipe.get(knowledge_key(user_id))
+                pipe.lrange(user_sessions_key(user_id), 0, -1)
+            results = pipe.execute()
+            
+            pipe = self.redis.pipeline(transaction=False)
+            for session_ids in results[2::3]:
+                for session_id in session_ids:
+                    pipe.get(session_key(session_id))
+            session_blobs = iter(pipe.execute())
+            
+            for i, user_id in enumerate(group):
+                version, knowledge, session_ids = results[3 * i:3 * i + 3]
+                sessions = [json.loads(blob) for blob in (next(session_blobs) for _ in session_ids) if blob]
+                
+                # Newest first in Redis, numbered oldest first
+                history = [self._history_entry(idx, session) for idx, session in enumerate(reversed(sessions), 1)]
+                
+                yield {
+                    "user_id": user_id,
+                    "topics": self._current_levels(json.loads(knowledge) if knowledge else {}),
+                    "history": history,
+                    "watermark": int(version or 0)
+                }
+    
+    def _topic_scores(self, user_id: str) -> Dict[str, float]:
+        data = self.redis.get(knowledge_key(user_id))
+        return self._current_levels(json.loads(data) if data else {})
+    
+    def _current_levels(self, knowledge_data: Dict[str, List[float]]) -> Dict[str, float]:
+        """Current level per topic: average of the last 3 scores, normalized to 0-1"""
+        topics = {}
+        for topic, scores in knowledge_data.items():
+            # Use last 3 scores for current level
+            recent_scores = scores[-3:] if len(scores) >= 3 else scores
+            topics[topic] = sum(recent_scores) / len(recent_scores) / 10.0 if recent_scores else 0
+        return topics
+    
+    def _history_entry(self, idx: int, session: Dict) -> Dict:
+        """One point of the progress chart: per-topic average score in a session"""
+        session_data = {"session": idx}
+        
+        # Scores for each topic in this session. Stored sessions carry them in current_scores,
+        # which (unlike the questions) archived sessions' summaries keep
+        topic_scores = session.get("current_scores")
+        if topic_scores is None:
+            topic_scores = {}
+            for question in session["questions"]:
+                topic_scores.setdefault(question["topic"], []).append(question["score"])
+        
+        # Average scores for this session
+        for topic, scores in topic_scores.items():
+            session_data[topic] = sum(scores) / len(scores) / 10.0
+        
+        return session_data
+    
     def calculate_improvement(self, user_id: str) -> Dict[str, float]:
         """Calculate improvement per topic"""
         knowledge_map = self.get_knowledge_map(user_id)
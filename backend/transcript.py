@@ -0,0 +1,80 @@
+"""
+Incremental transcript assembly for streaming STT
+Final segments are appended, the latest interim result is kept as a separate
+tail, and end of turn is driven by one re-armed timer handle per assembler
+"""
+
+import asyncio
+from typing import Callable, List, Optional
+
+
+class TranscriptAssembler:
+    """Builds a candidate's answer from interim and final STT results"""
+    
+    def __init__(self, silence_seconds: float, on_end_of_turn: Callable[[], None]):
+        self.silence_seconds = silence_seconds
+        self.on_end_of_turn = on_end_of_turn
+        self.segments: List[str] = []
+        self.interim = ""
+        self._deadline = 0.0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @property
+    def text(self) -> str:
+        """Answer so far: every final segment plus the pending interim tail"""
+        parts = self.segments + [self.interim] if self.interim else self.segments
+        return " ".join(parts).strip()
+    
+    def add_final(self, text: str):
+        text = text.strip()
+        if text:
+            self.segments.append(text)
+        # A final result supersedes the interim hypothesis for the same audio
+        self.interim = ""
+        self.touch()
+    
+    def add_interim(self, text: str):
+        self.interim = text.strip()
+        self.touch()
+    
+    def touch(self):
+        """Push the end-of-turn deadline out by the silence window"""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        self._deadline = self._loop.time() + self.silence_seconds
+        
+        # Only arm a handle if none is pending; a pending one re-arms itself on expiry
+        if self._handle is None:
+            self._handle = self._loop.call_at(self._deadline, self._expire)
+    
+    def take(self) -> str:
+        """Return the assembled answer and start a new one"""
+        text = self.text
+        self.reset()
+        return text
+    
+    def restore(self, text: str):
+        """Put a taken answer back in front of anything heard since, e.g. when its turn is cancelled"""
+        if text:
+            self.segments.insert(0, text)
+        self.touch()
+    
+    def reset(self):
+        self.segments = []
+        self.interim = ""
+        self.cancel()
+    
+    def cancel(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+    
+    def _expire(self):
+        self._handle = None
+        remaining = self._deadline - self._loop.time()
+        if remaining > 0:
+            # Speech arrived since the handle was armed, wait out the rest of the window
+            self._handle = self._loop.call_at(self._deadline, self._expire)
+            return
+        self.on_end_of_turn()
@@ -0,0 +1,128 @@
+"""
+On-disk cache of rendered TTS audio
+Utterances are content-addressed by text, voice and sample rate and stored as
+raw PCM files that are memory-mapped when served
+"""
+
+import os
+import mmap
+import hashlib
+from typing import Dict, Iterable, Optional
+
+import httpx
+from loguru import logger
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tts_cache"))
+TTS_VOICE = "aura-asteria-en"
+TTS_SAMPLE_RATE = 24000
+
+# Deepgram REST endpoint used to render utterances when warming the cache
+DEEPGRAM_SPEAK_URL = "https://api.deepgram.com/v1/speak"
+
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace so trivially different strings share an entry"""
+    return " ".join(text.split())
+
+
+class TTSCache:
+    """Content-addressed store of 16-bit mono PCM utterances"""
+    
+    def __init__(self, cache_dir: str = TTS_CACHE_DIR, voice: str = TTS_VOICE, sample_rate: int = TTS_SAMPLE_RATE):
+        self.cache_dir = cache_dir
+        self.voice = voice
+        self.sample_rate = sample_rate
+        self._maps: Dict[str, mmap.mmap] = {}
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def key(self, text: str) -> str:
+        """Cache key for an utterance with this cache's voice and sample rate"""
+        material = f"{self.voice}\0{self.sample_rate}\0{_normalize(text)}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pcm")
+    
+    def get(self, text: str) -> Optional[mmap.mmap]:
+        """Return the mapped PCM for an utterance, or None on a miss"""
+        key = self.key(text)
+        mapped = self._maps.get(key)
+        if mapped is not None:
+            return mapped
+        
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        
+        self._maps[key] = mapped
+        return mapped
+    
+    def put(self, text: str, pcm: bytes):
+        """Store rendered PCM for an utterance (atomic replace)"""
+        path = self._path(self.key(text))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pcm)
+        os.replace(tmp_path, path)
+    
+    def render(self, text: str, api_key: str) -> bytes:
+        """Synthesize an utterance with Deepgram as raw linear16 PCM"""
+        response = httpx.post(
+            DEEPGRAM_SPEAK_URL,
+            params={
+                "model": self.voice,
+                "encoding": "linear16",
+                "sample_rate": self.sample_rate,
+                "container": "none"
+            },
+            headers={
+                "Authorization": f"Token {api_key}",
+                "Content-Type": "application/json"
+            },
+            json={"text": _normalize(text)},
+            timeout=30.0
+        )
+        response.raise_for_status()
+        return response.content
+    
+    def warm(self, texts: Iterable[str], api_key: str) -> int:
+        """Render every utterance that is not cached yet, returns how many were rendered"""
+        rendered = 0
+        for text in dict.fromkeys(_normalize(t) for t in texts):
+            if not text or self.get(text) is not None:
+                continue
+            self.put(text, self.render(text, api_key))
+            logger.info(f"Rendered TTS cache entry: {text[:60]}")
+            rendered += 1
+        return rendered
+
+
+def cacheable_utterances() -> list:
+    """Static bot phrases plus every question in the bank"""
+    from question_bank import get_question_bank
+    from pipecat_bot import STATIC_UTTERANCES
+    
+    utterances = list(STATIC_UTTERANCES)
+    utterances.extend(text for text, _, _ in get_question_bank())
+    return list(dict.fromkeys(utterances))
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    
+    api_key = os.getenv("DEEPGRAM_API_KEY")
+    if not api_key:
+        raise SystemExit("DEEPGRAM_API_KEY is required to warm the TTS cache")
+    
+    cache = TTSCache()
+    utterances = cacheable_utterances()
+    rendered = cache.warm(utterances, api_key)
+    print(f"✅ TTS cache warm: {rendered} rendered, {len(utterances) - rendered} already cached ({cache.cache_dir})")
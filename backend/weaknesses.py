@@ -0,0 +1,119 @@
+"""
+Incremental clustering of a user's free-text weak points
+Each weak point becomes a hashed term vector (see question_index.hashed_counts) and joins the
+nearest of a few per-user centroids, updated online like mini-batch k-means with one answer
+per batch. Cluster weights decay per answer, so weaknesses that keep coming back rank first
+"""
+
+import os
+import json
+import base64
+import numpy as np
+from typing import Dict, List, Optional
+
+from question_index import hashed_counts
+
+# Clusters kept per user; each is a float16 centroid plus a few label counts (~2KB per user)
+WEAKNESS_CLUSTERS = int(os.getenv("WEAKNESS_CLUSTERS", 6))
+WEAKNESS_DIMENSIONS = 128
+
+# A weak point at least this similar to a centroid joins that cluster
+WEAKNESS_JOIN_SIMILARITY = 0.3
+
+# Every answer scales the existing weights by this, so recent recurring weaknesses outrank old ones
+WEAKNESS_DECAY = 0.9
+
+# Label candidates per cluster (space-saving counts); the most frequent one names the cluster
+WEAKNESS_LABELS = 4
+
+# Centroids move by 1/count, but never by less than 1/this, so they keep following the user
+MAX_CENTROID_COUNT = 50
+
+# The weak point the evaluator reports for an answer it couldn't evaluate; not a weakness
+EVALUATION_FAILED = "Unable to evaluate - API error"
+
+
+def _vector(text: str) -> np.ndarray:
+    vector = np.zeros(WEAKNESS_DIMENSIONS, dtype=np.float32)
+    for bucket, value in hashed_counts(text, WEAKNESS_DIMENSIONS).items():
+        vector[bucket] = value
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class WeaknessSummary:
+    """A user's recurring weaknesses: at most WEAKNESS_CLUSTERS weighted, labelled centroids"""
+    
+    def __init__(self, clusters: Optional[List[Dict]] = None):
+        self.clusters = clusters or []
+    
+    @classmethod
+    def from_json(cls, blob: Optional[str]) -> "WeaknessSummary":
+        if not blob:
+            return cls()
+        clusters = json.loads(blob)
+        for cluster in clusters:
+            cluster["centroid"] = np.frombuffer(base64.b64decode(cluster["centroid"]), dtype=np.float16).astype(np.float32)
+        return cls(clusters)
+    
+    def to_json(self) -> str:
+        return json.dumps([
+            {**cluster, "centroid": base64.b64encode(cluster["centroid"].astype(np.float16).tobytes()).decode("ascii")}
+            for cluster in self.clusters
+        ])
+    
+    def add(self, weak_points: List[str]):
+        """Fold in one answer's weak points; constant work per weak point"""
+        if EVALUATION_FAILED in weak_points:
+            # Says nothing about the candidate, so it neither adds a weakness nor ages the others
+            return
+        
+        for cluster in self.clusters:
+            cluster["weight"] *= WEAKNESS_DECAY
+        
+        for text in weak_points:
+            vector = _vector(text)
+            if not vector.any():
+                continue
+            cluster = self._nearest(vector)
+            if cluster is None:
+                cluster = {"centroid": vector, "weight": 0.0, "count": 1, "labels": {}}
+                self._make_room()
+                self.clusters.append(cluster)
+            else:
+                cluster["count"] += 1
+                centroid = cluster["centroid"] + (vector - cluster["centroid"]) / min(cluster["count"], MAX_CENTROID_COUNT)
+                cluster["centroid"] = centroid / (np.linalg.norm(centroid) or 1.0)
+            cluster["weight"] += 1.0
+            _count_label(cluster["labels"], text.strip())
+    
+    def _nearest(self, vector: np.ndarray) -> Optional[Dict]:
+        """The cluster to join, None to start a new one"""
+        if not self.clusters:
+            return None
+        similarities = [float(cluster["centroid"] @ vector) for cluster in self.clusters]
+        best = int(np.argmax(similarities))
+        if similarities[best] >= WEAKNESS_JOIN_SIMILARITY:
+            return self.clusters[best]
+        # Too far from everything: merge anyway only when full and every cluster is still recurring
+        if len(self.clusters) >= WEAKNESS_CLUSTERS and min(cluster["weight"] for cluster in self.clusters) >= 1.0:
+            return self.clusters[best]
+        return None
+    
+    def _make_room(self):
+        if len(self.clusters) >= WEAKNESS_CLUSTERS:
+            del self.clusters[min(range(len(self.clusters)), key=lambda i: self.clusters[i]["weight"])]
+    
+    def labels(self, n: int) -> List[str]:
+        """Names of the n heaviest clusters, the most recurring weakness first"""
+        heaviest = sorted(self.clusters, key=lambda cluster: cluster["weight"], reverse=True)[:n]
+        return [max(cluster["labels"], key=cluster["labels"].get) for cluster in heaviest]
+
+
+def _count_label(labels: Dict[str, int], text: str):
+    if text in labels or len(labels) < WEAKNESS_LABELS:
+        labels[text] = labels.get(text, 0) + 1
+        return
+    # Space-saving: the new label takes over the rarest one's count
+    rarest = min(labels, key=labels.get)
+    labels[text] = labels.pop(rarest) + 1
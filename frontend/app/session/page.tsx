@@ -3,7 +3,7 @@
 import { useState, useEffect, useRef } from 'react'
 import { useRouter } from 'next/navigation'
 import { Mic, MicOff, Square, Loader2 } from 'lucide-react'
-import { startSession, endSession, getSessionStatus } from '@/lib/api'
+import { startSession, endSession, subscribeSessionEvents, SessionEvent } from '@/lib/api'
 import DailyIframe from '@daily-co/daily-js'
 
 export default function SessionPage() {
@@ -17,7 +17,7 @@ export default function SessionPage() {
   const [isMuted, setIsMuted] = useState(false)
   const [isInitialized, setIsInitialized] = useState(false)
   const callFrameRef = useRef<any>(null)
-  const pollingIntervalRef = useRef<any>(null)
+  const eventSourceRef = useRef<EventSource | null>(null)
 
   useEffect(() => {
     // Prevent double initialization (React Strict Mode calls effects twice)
@@ -29,8 +29,9 @@ export default function SessionPage() {
     
     return () => {
       // Cleanup on unmount
-      if (pollingIntervalRef.current) {
-        clearInterval(pollingIntervalRef.current)
+      if (eventSourceRef.current) {
+        eventSourceRef.current.close()
+        eventSourceRef.current = null
       }
       if (callFrameRef.current) {
         callFrameRef.current.destroy()
@@ -54,13 +55,8 @@ export default function SessionPage() {
       
       setStatus('active')
       
-      // Start polling for session status
-      pollingIntervalRef.current = setInterval(async () => {
-        if (data.session_id) {
-          const statusData = await getSessionStatus(data.session_id)
-          updateSessionStatus(statusData)
-        }
-      }, 2000)
+      // Subscribe to live updates pushed by the bot
+      eventSourceRef.current = subscribeSessionEvents(data.session_id, handleSessionEvent)
     } catch (error) {
       console.error('Failed to start session:', error)
       setStatus('idle')
@@ -101,21 +97,28 @@ export default function SessionPage() {
     callFrame.on('left-meeting', handleEndSession)
   }
 
-  const updateSessionStatus = (statusData: any) => {
-    if (statusData.current_question) {
-      setCurrentQuestion(statusData.current_question)
-    }
-    if (statusData.transcript) {
-      setTranscript(statusData.transcript)
-    }
-    if (statusData.questions_asked !== undefined) {
-      setQuestionsAsked(statusData.questions_asked)
+  const handleSessionEvent = ({ event, data }: SessionEvent) => {
+    switch (event) {
+      case 'status':
+        if (data.current_question) setCurrentQuestion(data.current_question)
+        if (data.transcript) setTranscript(data.transcript)
+        setQuestionsAsked(data.questions_asked)
+        break
+      case 'question':
+        setCurrentQuestion(data.question)
+        setQuestionsAsked(data.questions_asked)
+        setTranscript('')
+        break
+      case 'transcript':
+        setTranscript(data.text)
+        break
     }
   }
 
   const handleEndSession = async () => {
-    if (pollingIntervalRef.current) {
-      clearInterval(pollingIntervalRef.current)
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close()
+      eventSourceRef.current = null
     }
     
     if (callFrameRef.current) {
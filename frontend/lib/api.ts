@@ -27,6 +27,9 @@ export async function startSession(userId: string) {
     session_id: string
     daily_room_url: string
     daily_token?: string
+    bot_status?: 'running' | 'queued' | 'disabled'
+    queue_position?: number
+    estimated_wait_seconds?: number
   }>('/start-session', {
     method: 'POST',
     body: JSON.stringify({ user_id: userId }),
@@ -52,6 +55,25 @@ export async function getSessionStatus(sessionId: string) {
   }>(`/session-status?session_id=${sessionId}`)
 }
 
+export type SessionEvent =
+  | { event: 'status'; data: { current_question: string; transcript: string; questions_asked: number; current_scores: Record<string, number[]> } }
+  | { event: 'question'; data: { question: string; topic: string; questions_asked: number } }
+  | { event: 'transcript'; data: { text: string } }
+  | { event: 'score'; data: { question: string; answer: string; score: number; topic: string; weak_points: string[]; current_scores: Record<string, number[]> } }
+  | { event: 'ended'; data: {} }
+
+// Live session updates pushed by the bot (Server-Sent Events); the browser reconnects on its own
+export function subscribeSessionEvents(sessionId: string, onEvent: (event: SessionEvent) => void) {
+  const source = new EventSource(`${API_URL}/session-events?session_id=${sessionId}`)
+  for (const name of ['status', 'question', 'transcript', 'score', 'ended'] as const) {
+    source.addEventListener(name, (message) => {
+      onEvent({ event: name, data: JSON.parse((message as MessageEvent).data) } as SessionEvent)
+      if (name === 'ended') source.close()
+    })
+  }
+  return source
+}
+
 export async function getSessions(userId: string) {
   return fetchApi<{
     sessions: Array<{
@@ -63,12 +85,15 @@ export async function getSessions(userId: string) {
   }>(`/sessions?user_id=${userId}`)
 }
 
-export async function getKnowledgeMap(userId: string) {
+// With `since` (a previous response's watermark) only changed history entries and topics come back
+export async function getKnowledgeMap(userId: string, since?: number) {
+  const query = since === undefined ? '' : `&since=${since}`
   return fetchApi<{
     topics: Record<string, number>
     history: Array<{
       session: number
       [key: string]: number
     }>
-  }>(`/knowledge-map?user_id=${userId}`)
+    watermark: number
+  }>(`/knowledge-map?user_id=${userId}${query}`)
 }